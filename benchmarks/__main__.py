@@ -0,0 +1,72 @@
+import argparse
+import os
+import sys
+from datetime import datetime
+
+def _parser():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks do Sistema de Faltas')
+    parser.add_argument('--database-url', help='Banco usado (padrão: DATABASE_URL ou sqlite:///app.db)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='Gera dados sintéticos no banco')
+    generate.add_argument('--students', type=int, default=10000)
+    generate.add_argument('--classes', type=int, default=300)
+    generate.add_argument('--attendances', type=int, default=2000000)
+    generate.add_argument('--enrollments-per-student', type=float, default=1.5)
+    generate.add_argument('--batch-size', type=int, default=5000)
+    generate.add_argument('--seed', type=int, default=42)
+
+    run = commands.add_parser('run', help='Mede latência, vazão e queries por endpoint')
+    run.add_argument('--url', help='Servidor HTTP (ex.: gunicorn local); sem isso usa o test client do Flask')
+    run.add_argument('--requests', type=int, default=100, help='Requisições por endpoint')
+    run.add_argument('--concurrency', type=int, default=4)
+    run.add_argument('--endpoint', action='append', dest='endpoints', help='Limita aos endpoints nomeados')
+    run.add_argument('--username', default='admin')
+    run.add_argument('--password', default='admin123')
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--output', help='Salva o resumo em JSON')
+    run.add_argument('--compare', help='JSON de uma execução anterior para comparar o p95')
+    return parser
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    if args.database_url:
+        # Precisa estar definido antes de importar o app
+        os.environ['DATABASE_URL'] = args.database_url
+    log = lambda message: print(message, file=sys.stderr)
+
+    if args.command == 'generate':
+        from main import app
+        from benchmarks.generate import generate
+        with app.app_context():
+            generate(args.students, args.classes, args.attendances, args.enrollments_per_student,
+                     seed=args.seed, batch_size=args.batch_size, log=log)
+        return
+
+    from benchmarks import driver, report
+    if args.url:
+        transport = driver.HttpTransport(args.url)
+        backend = args.url
+    else:
+        from main import app
+        from models.user import db
+        with app.app_context():
+            engine = db.engine
+        transport = driver.TestClientTransport(app, engine)
+        backend = engine.url.render_as_string(hide_password=True)
+
+    results = driver.run(transport, args.username, args.password, args.requests, args.concurrency,
+                         args.endpoints, seed=args.seed, log=log)
+    summary = report.summarize(results)
+    print(report.format_table(summary, report.load(args.compare) if args.compare else None))
+
+    if args.output:
+        report.save(args.output, summary, {
+            'backend': backend,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+        })
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+import http.cookiejar
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from sqlalchemy import event
+
+# (nome, método, caminho, corpo) -- {student_id}, {class_id}, ... são sorteados a cada requisição
+ENDPOINTS = [
+    ('students.list', 'GET', '/api/students', None),
+    ('students.page', 'GET', '/api/students?limit=100', None),
+    ('students.search', 'GET', '/api/students/search?q=jo&fields=id,name', None),
+    ('students.get', 'GET', '/api/students/{student_id}', None),
+    ('students.classes', 'GET', '/api/students/{student_id}/classes', None),
+    ('students.update', 'PUT', '/api/students/{student_id}', {'cord_level': 'amarela'}),
+    ('classes.list', 'GET', '/api/classes', None),
+    ('classes.get', 'GET', '/api/classes/{class_id}', None),
+    ('classes.students', 'GET', '/api/classes/{class_id}/students', None),
+    ('classes.roll_call', 'GET', '/api/classes/{class_id}/attendance/{date}', None),
+    ('attendance.page', 'GET', '/api/attendance?limit=100', None),
+    ('attendance.by_class', 'GET', '/api/attendance?class_id={class_id}&limit=100', None),
+    ('attendance.get', 'GET', '/api/attendance/{attendance_id}', None),
+    ('attendance.export', 'GET', '/api/attendance/export?class_id={class_id}', None),
+    ('attendance.bulk', 'POST', '/api/attendance/bulk', 'roster'),
+    ('users.list', 'GET', '/api/users', None),
+    ('auth.me', 'GET', '/api/auth/me', None),
+    ('auth.check_session', 'GET', '/api/auth/check-session', None),
+    ('reports.frequency', 'GET', '/api/reports/frequency/{student_id}?start_date={start}&end_date={end}', None),
+    ('reports.class_frequency', 'GET', '/api/reports/class/{class_id}/frequency?start_date={start}&end_date={end}', None),
+    ('reports.at_risk', 'GET', '/api/reports/at-risk', None),
+    ('reports.general_stats', 'GET', '/api/reports/general-stats?start_date={start}&end_date={end}', None),
+    ('reports.dashboard', 'GET', '/api/reports/dashboard-stats', None),
+]
+
+class QueryCounter:
+    """Conta os statements SQL executados em cada thread (modo in-process)"""
+
+    def __init__(self, engine):
+        self.local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._count)
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        self.local.count = getattr(self.local, 'count', 0) + 1
+
+    def reset(self):
+        self.local.count = 0
+
+    def value(self):
+        return getattr(self.local, 'count', 0)
+
+class TestClientTransport:
+    """Requisições pelo test client do Flask, no mesmo processo (conta queries)"""
+
+    def __init__(self, app, engine):
+        self.app = app
+        self.counter = QueryCounter(engine)
+        self.local = threading.local()
+
+    def login(self, username, password):
+        client = self.app.test_client()
+        response = client.post('/api/auth/login', json={'username': username, 'password': password})
+        if response.status_code != 200:
+            raise RuntimeError(f'Login failed: {response.status_code} {response.get_data(as_text=True)}')
+        self.local.client = client
+
+    def request(self, method, path, body=None):
+        self.counter.reset()
+        started = time.perf_counter()
+        response = self.local.client.open(path, method=method, json=body)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+        payload = response.get_json(silent=True) if response.is_json else None
+        return response.status_code, elapsed, self.counter.value(), payload
+
+class HttpTransport:
+    """Requisições HTTP contra um servidor rodando (ex.: gunicorn local)"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.local = threading.local()
+
+    def login(self, username, password):
+        self.local.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+        status, _, _, payload = self.request('POST', '/api/auth/login', {'username': username, 'password': password})
+        if status != 200:
+            raise RuntimeError(f'Login failed: {status} {payload}')
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        if data is not None:
+            req.add_header('Content-Type', 'application/json')
+        started = time.perf_counter()
+        try:
+            with self.local.opener.open(req) as response:
+                raw, status, content_type = response.read(), response.status, response.headers.get('Content-Type', '')
+        except urllib.error.HTTPError as e:
+            raw, status, content_type = e.read(), e.code, e.headers.get('Content-Type', '')
+        elapsed = time.perf_counter() - started
+        payload = json.loads(raw) if content_type.startswith('application/json') and raw else None
+        # Sem acesso ao engine do servidor: contagem de queries indisponível
+        return status, elapsed, None, payload
+
+def _items(payload):
+    return payload['items'] if isinstance(payload, dict) else payload
+
+def discover(transport, period_days=90):
+    """IDs reais usados para preencher os caminhos dos endpoints"""
+    students = _items(transport.request('GET', '/api/students?fields=id&limit=500')[3])
+    classes = _items(transport.request('GET', '/api/classes?fields=id,day_of_week&limit=500')[3])
+    attendances = _items(transport.request('GET', '/api/attendance?fields=id,date&limit=500')[3])
+    if not students or not classes:
+        raise RuntimeError('Database is empty; run `python -m benchmarks generate` first')
+
+    end = date.fromisoformat(attendances[0]['date']) if attendances else date.today()
+    rosters = {}
+    for cls in classes[:20]:
+        roster = transport.request('GET', f'/api/classes/{cls["id"]}/students')[3] or []
+        if roster:
+            rosters[cls['id']] = [student['id'] for student in roster]
+
+    return {
+        'student_ids': [s['id'] for s in students],
+        'class_ids': [c['id'] for c in classes],
+        'attendance_ids': [a['id'] for a in attendances] or [0],
+        'rosters': rosters,
+        'start': (end - timedelta(days=period_days)).isoformat(),
+        'end': end.isoformat(),
+    }
+
+def _build_request(endpoint, context, rng):
+    _, method, path, body = endpoint
+    if body == 'roster':
+        class_id = rng.choice(list(context['rosters']))
+        body = {
+            'class_id': class_id,
+            'date': context['end'],
+            'students': [
+                {'student_id': student_id, 'present': rng.random() < 0.8}
+                for student_id in context['rosters'][class_id]
+            ]
+        }
+    values = {
+        'student_id': rng.choice(context['student_ids']),
+        'class_id': rng.choice(context['class_ids']),
+        'attendance_id': rng.choice(context['attendance_ids']),
+        'date': context['end'],
+        'start': context['start'],
+        'end': context['end'],
+    }
+    return method, path.format(**values), body
+
+def run(transport, username, password, requests=100, concurrency=4, endpoints=None, seed=42, log=print):
+    """Executa cada endpoint `requests` vezes com `concurrency` clientes em paralelo"""
+    transport.login(username, password)
+    context = discover(transport)
+    selected = [e for e in ENDPOINTS if not endpoints or e[0] in endpoints]
+    if not context['rosters']:
+        selected = [e for e in selected if e[3] != 'roster']
+
+    logged_in = threading.local()
+
+    def worker(endpoint, count, worker_seed):
+        if not getattr(logged_in, 'done', False):
+            transport.login(username, password)
+            logged_in.done = True
+        rng = random.Random(worker_seed)
+        samples = []
+        for _ in range(count):
+            method, path, body = _build_request(endpoint, context, rng)
+            status, elapsed, queries, _ = transport.request(method, path, body)
+            samples.append((status, elapsed, queries))
+        return samples
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index, endpoint in enumerate(selected):
+            shares = [requests // concurrency + (1 if i < requests % concurrency else 0) for i in range(concurrency)]
+            started = time.perf_counter()
+            futures = [
+                executor.submit(worker, endpoint, share, seed + index * 1000 + i)
+                for i, share in enumerate(shares) if share
+            ]
+            samples = [sample for future in futures for sample in future.result()]
+            results[endpoint[0]] = {
+                'method': endpoint[1],
+                'path': endpoint[2],
+                'wall_seconds': time.perf_counter() - started,
+                'samples': samples,
+            }
+            log(f'{endpoint[0]}: {len(samples)} requests')
+    return results
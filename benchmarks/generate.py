@@ -0,0 +1,113 @@
+import random
+from datetime import date, datetime, time, timedelta
+from models.user import db
+from models.student import Student
+from models.class_model import Class, StudentClass
+from models.attendance import Attendance
+from services import enrollments, rollups, streaks
+
+CORD_LEVELS = ['iniciante', 'crua', 'amarela', 'laranja', 'azul', 'verde', 'roxa', 'marrom', 'vermelha']
+FIRST_NAMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Felipe', 'Gabriela', 'Hugo', 'Iara', 'João',
+               'Júlia', 'Lucas', 'Marina', 'Natália', 'Otávio', 'Paula', 'Rafael', 'Sofia', 'Tiago', 'Vitória']
+LAST_NAMES = ['Silva', 'Santos', 'Oliveira', 'Souza', 'Lima', 'Pereira', 'Costa', 'Rodrigues', 'Almeida', 'Nascimento']
+
+def _batches(rows, size):
+    for i in range(0, len(rows), size):
+        yield rows[i:i + size]
+
+def _insert(table, rows, batch_size):
+    for batch in _batches(rows, batch_size):
+        db.session.execute(table.insert(), batch)
+    db.session.commit()
+
+def generate(students=10000, classes=300, attendances=2000000, enrollments_per_student=1.5,
+             seed=42, batch_size=5000, log=print):
+    """Preenche o banco com dados sintéticos na escala pedida (executemany em lotes)"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    today = date.today()
+
+    # IDs ficam por conta do banco (mantém as sequences do PostgreSQL em dia)
+    last_student_id = db.session.query(db.func.max(Student.id)).scalar() or 0
+    last_class_id = db.session.query(db.func.max(Class.id)).scalar() or 0
+
+    student_rows = []
+    for i in range(students):
+        minor = rng.random() < 0.35
+        age = rng.randint(5, 17) if minor else rng.randint(18, 60)
+        student_rows.append({
+            'name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {last_student_id + i + 1}',
+            'birth_date': today - timedelta(days=age * 365 + rng.randint(0, 364)),
+            'phone': f'(11) 9{rng.randint(10000000, 99999999)}',
+            'email': f'aluno{last_student_id + i + 1}@example.com',
+            'address': f'Rua {rng.choice(LAST_NAMES)}, {rng.randint(1, 2000)}',
+            'cord_level': rng.choice(CORD_LEVELS),
+            'registration_date': now,
+            'active': rng.random() > 0.05,
+            'guardian_name': f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}' if minor else None,
+            'guardian_phone': f'(11) 9{rng.randint(10000000, 99999999)}' if minor else None,
+            'guardian_relationship': rng.choice(['pai', 'mãe', 'avó']) if minor else None,
+        })
+    _insert(Student.__table__, student_rows, batch_size)
+    student_ids = [row[0] for row in db.session.query(Student.id).filter(Student.id > last_student_id)]
+    log(f'{students} students')
+
+    class_rows = [{
+        'name': f'Turma {last_class_id + i + 1}',
+        'day_of_week': i % 7,
+        'start_time': time(17 + i % 4, 0),
+        'end_time': time(18 + i % 4, 0),
+        'instructor': f'Mestre {rng.choice(LAST_NAMES)}',
+        'location': f'Academia {1 + i % 20}',
+        'max_students': None,
+        'active': True,
+        'created_date': now,
+    } for i in range(classes)]
+    _insert(Class.__table__, class_rows, batch_size)
+    class_days = dict(db.session.query(Class.id, Class.day_of_week).filter(Class.id > last_class_id))
+    log(f'{classes} classes')
+
+    rosters = {class_id: set() for class_id in class_days}
+    class_ids = list(rosters)
+    for student_id in student_ids:
+        count = max(1, int(enrollments_per_student) + (rng.random() < enrollments_per_student % 1))
+        for class_id in rng.sample(class_ids, min(count, len(class_ids))):
+            rosters[class_id].add(student_id)
+    enrollment_rows = [
+        {'student_id': student_id, 'class_id': class_id, 'enrollment_date': now, 'active': True}
+        for class_id, roster in rosters.items() for student_id in sorted(roster)
+    ]
+    _insert(StudentClass.__table__, enrollment_rows, batch_size)
+    log(f'{len(enrollment_rows)} enrollments')
+
+    # Uma chamada por semana em cada turma, voltando no tempo até atingir o total pedido
+    weeks = -(-attendances // max(len(enrollment_rows), 1))
+    created = 0
+    pending = []
+    for week in range(weeks):
+        for class_id, day_of_week in class_days.items():
+            class_date = today - timedelta(days=today.weekday() - day_of_week + 7 * (week + 1))
+            for student_id in sorted(rosters[class_id]):
+                if created >= attendances:
+                    break
+                pending.append({
+                    'student_id': student_id,
+                    'class_id': class_id,
+                    'date': class_date,
+                    'present': rng.random() < 0.8,
+                    'notes': None,
+                    'recorded_by': None,
+                    'recorded_at': now,
+                })
+                created += 1
+            if len(pending) >= batch_size:
+                _insert(Attendance.__table__, pending, batch_size)
+                pending = []
+        log(f'{created} attendances')
+    _insert(Attendance.__table__, pending, batch_size)
+
+    with db.engine.begin() as conn:
+        rollups.rebuild(conn)
+        streaks.rebuild(conn)
+        enrollments.recount(conn)
+    log('rollups, streaks and enrollment counts rebuilt')
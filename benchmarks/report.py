@@ -0,0 +1,66 @@
+import json
+import math
+
+def percentile(values, pct):
+    """Percentil pelo método nearest-rank (valores já ordenados)"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(values)))
+    return values[rank - 1]
+
+def summarize(results):
+    """Resumo por endpoint: p50/p95/p99 (ms), vazão, erros e queries por requisição"""
+    summary = {}
+    for name, result in results.items():
+        samples = result['samples']
+        latencies = sorted(elapsed * 1000 for _, elapsed, _ in samples)
+        queries = [count for _, _, count in samples if count is not None]
+        summary[name] = {
+            'method': result['method'],
+            'path': result['path'],
+            'requests': len(samples),
+            'errors': sum(1 for status, _, _ in samples if status >= 400),
+            'p50_ms': round(percentile(latencies, 50), 2),
+            'p95_ms': round(percentile(latencies, 95), 2),
+            'p99_ms': round(percentile(latencies, 99), 2),
+            'throughput_rps': round(len(samples) / result['wall_seconds'], 1) if result['wall_seconds'] else None,
+            'queries_per_request': round(sum(queries) / len(queries), 1) if queries else None,
+            'max_queries': max(queries) if queries else None,
+        }
+    return summary
+
+def _format(value):
+    return '-' if value is None else str(value)
+
+def format_table(summary, baseline=None):
+    """Tabela em texto; com `baseline`, mostra a variação do p95 em relação a ele"""
+    headers = ['endpoint', 'n', 'err', 'p50 ms', 'p95 ms', 'p99 ms', 'req/s', 'queries']
+    if baseline:
+        headers.append('p95 Δ')
+    rows = []
+    for name, stats in summary.items():
+        row = [name, stats['requests'], stats['errors'], stats['p50_ms'], stats['p95_ms'],
+               stats['p99_ms'], stats['throughput_rps'], stats['queries_per_request']]
+        if baseline:
+            previous = baseline.get(name)
+            if previous and previous['p95_ms']:
+                row.append(f'{(stats["p95_ms"] - previous["p95_ms"]) / previous["p95_ms"] * 100:+.1f}%')
+            else:
+                row.append(None)
+        rows.append([_format(value) for value in row])
+
+    widths = [max(len(headers[i]), *(len(row[i]) for row in rows)) if rows else len(headers[i])
+              for i in range(len(headers))]
+    lines = ['  '.join(h.ljust(w) if i == 0 else h.rjust(w) for i, (h, w) in enumerate(zip(headers, widths)))]
+    lines.append('  '.join('-' * w for w in widths))
+    for row in rows:
+        lines.append('  '.join(v.ljust(w) if i == 0 else v.rjust(w) for i, (v, w) in enumerate(zip(row, widths))))
+    return '\n'.join(lines)
+
+def save(path, summary, metadata):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'metadata': metadata, 'endpoints': summary}, f, indent=2, ensure_ascii=False)
+
+def load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['endpoints']
@@ -0,0 +1,114 @@
+import click
+import migrations
+from datetime import datetime, timedelta
+from models.user import db
+from services import assets, change_log, rollups, streaks
+from services.student_import import IMPORT_CHUNK_SIZE, MAX_IMPORT_CHUNK_SIZE, StudentImport
+from services.database import without_statement_timeout
+
+def register_commands(app):
+    """Register the maintenance commands on the Flask CLI"""
+
+    @app.cli.group('db')
+    def db_group():
+        """Schema migrations"""
+
+    @db_group.command('upgrade')
+    @click.argument('target', required=False)
+    def db_upgrade(target):
+        """Apply pending migrations (up to TARGET, if given)"""
+        db.create_all()
+        applied = migrations.upgrade(db.engine, target=target, log=click.echo)
+        if not applied:
+            click.echo('Database is up to date')
+
+    @db_group.command('downgrade')
+    @click.argument('target')
+    def db_downgrade(target):
+        """Revert migrations applied after TARGET"""
+        migrations.downgrade(db.engine, target, log=click.echo)
+
+    @db_group.command('current')
+    def db_current():
+        """Show the current schema revision"""
+        click.echo(migrations.current_revision(db.engine) or 'none')
+
+    @db_group.command('history')
+    def db_history():
+        """List migrations and whether they are applied"""
+        applied = migrations.applied_revisions(db.engine)
+        for module in migrations.load_migrations():
+            mark = 'x' if module.revision in applied else ' '
+            click.echo(f'[{mark}] {module.revision} {module.__doc__.strip()}')
+
+    @app.cli.group('rollups')
+    def rollups_group():
+        """Attendance rollup tables"""
+
+    @rollups_group.command('rebuild')
+    def rollups_rebuild():
+        """Recompute the rollups from the attendances table"""
+        with db.engine.begin() as conn:
+            without_statement_timeout(conn)
+            rollups.rebuild(conn)
+        click.echo('Attendance rollups rebuilt')
+
+    @app.cli.group('streaks')
+    def streaks_group():
+        """Absence streaks used by /api/reports/at-risk"""
+
+    @streaks_group.command('rebuild')
+    def streaks_rebuild():
+        """Recompute every streak and refresh the 30/90-day rates (run daily)"""
+        with db.engine.begin() as conn:
+            without_statement_timeout(conn)
+            streaks.rebuild(conn)
+        click.echo('Attendance streaks rebuilt')
+
+    @app.cli.group('students')
+    def students_group():
+        """Student maintenance"""
+
+    @students_group.command('import')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--dry-run', is_flag=True, help='Validate only, write nothing')
+    @click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, show_default=True,
+                  type=click.IntRange(1, MAX_IMPORT_CHUNK_SIZE), help='Rows per transaction')
+    def students_import(path, dry_run, chunk_size):
+        """Import students and class assignments from a CSV file"""
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            report = StudentImport(dry_run=dry_run, chunk_size=chunk_size).run(f)
+        for error in report['errors']:
+            click.echo(f"line {error['line']}: {'; '.join(error['errors'])}", err=True)
+        for refusal in report['enrollments_refused']:
+            click.echo(f"line {refusal['line']}: class {refusal['class_id']}: {refusal['error']}", err=True)
+        click.echo(
+            f"{report['rows']} rows: {report['created']} created, {report['existing']} already registered, "
+            f"{report['enrollments']} enrollments ({len(report['enrollments_refused'])} refused, class full), "
+            f"{report['rows_with_errors']} with errors"
+            + (' (dry run)' if dry_run else '')
+        )
+
+    @app.cli.group('changelog')
+    def changelog_group():
+        """Change log used by /api/sync"""
+
+    @changelog_group.command('prune')
+    @click.option('--days', default=30, show_default=True, help='Keep entries newer than this')
+    def changelog_prune(days):
+        """Delete old change log entries (older sync cursors get 410 and resync)"""
+        deleted = change_log.prune(datetime.utcnow() - timedelta(days=days))
+        db.session.commit()
+        click.echo(f'Deleted {deleted} change log entries')
+
+    @app.cli.group('assets')
+    def assets_group():
+        """Static asset pipeline"""
+
+    @assets_group.command('build')
+    def assets_build():
+        """Fingerprint and precompress static/ into static/dist"""
+        built, source_digest = assets.build(app.static_folder)
+        assets.write_build(app.static_folder, built, source_digest)
+        assets.asset_store.init_app(app)
+        click.echo(f'Built {len(built)} static assets into static/dist')
@@ -1,22 +1,43 @@
 import os
-from flask import Flask, send_from_directory, jsonify
+from flask import Flask, request, jsonify
 from flask_login import LoginManager
 from flask_cors import CORS
+import migrations
+from commands import register_commands
 from models.user import db, User
 from routes.user import user_bp
 from routes.student import student_bp
 from routes.class_routes import class_bp
 from routes.attendance import attendance_bp
-from routes.auth import auth_bp
+from routes.auth import auth_bp, login_limiter
 from routes.reports import reports_bp
+from routes.metrics import metrics_bp
+from routes.sync import sync_bp
+from routes.jobs import jobs_bp
 
 # Import all models to ensure they are registered with SQLAlchemy
 from models.student import Student
 from models.class_model import Class, StudentClass
 from models.attendance import Attendance
+from models.attendance_rollup import AttendanceStreak, ClassDailyAttendance, StudentMonthlyAttendance
+from models.rate_limit import RateLimitCounter
+from models.data_version import DataVersion
+from models.change_log import ChangeLog
+from models.job import Job
+from services.report_cache import report_cache
+from services.instrumentation import instrumentation
+from services.database import engine_options, init_engine
+from services.user_cache import user_cache
+from services.password_hashing import PasswordHashingBusy, password_hasher
+from services.json_provider import FastJSONProvider
+from services.assets import asset_store
+from services.jobs import job_queue
 
 app = Flask(__name__, static_folder='static')
 
+# JSON responses encoded with orjson (falls back to the stdlib encoder when it is not installed)
+app.json = FastJSONProvider(app)
+
 # Enable CORS for all routes
 CORS(app)
 
@@ -32,6 +53,59 @@ if database_url and database_url.startswith('postgres://'):
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url or 'sqlite:///app.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Engine profile: connection pool (PostgreSQL and SQLite files) and server-side statement timeout
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['DB_POOL_RECYCLE'] = int(os.environ.get('DB_POOL_RECYCLE', 280))
+app.config['DB_POOL_PRE_PING'] = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+app.config['DB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('DB_STATEMENT_TIMEOUT_MS', 30000))
+
+# SQLite pragmas applied on every new connection
+app.config['SQLITE_JOURNAL_MODE'] = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 20000))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'], app.config)
+
+# Login rate limit counters: 'database' (shared by all gunicorn workers) or 'memory' (per process)
+app.config['RATE_LIMIT_BACKEND'] = os.environ.get('RATE_LIMIT_BACKEND', 'database')
+app.config['RATE_LIMIT_SWEEP_INTERVAL'] = int(os.environ.get('RATE_LIMIT_SWEEP_INTERVAL', 300))
+
+# Report response cache (per process; invalidated by the data version counters)
+app.config['REPORT_CACHE_SIZE'] = int(os.environ.get('REPORT_CACHE_SIZE', 256))
+app.config['REPORT_CACHE_TTL'] = int(os.environ.get('REPORT_CACHE_TTL', 300))
+
+# Authenticated user snapshots (per process; local writes invalidate, other workers wait for the TTL)
+app.config['USER_CACHE_SIZE'] = int(os.environ.get('USER_CACHE_SIZE', 1024))
+app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+
+# Password hashing: werkzeug method (e.g. "scrypt:32768:8:1", "pbkdf2:sha256:600000"; empty = werkzeug default),
+# concurrent hashes per process (out of the gthread worker's threads, see Procfile) and how long a login
+# waits for a free slot before getting 503
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', '')
+app.config['PASSWORD_HASH_CONCURRENCY'] = int(os.environ.get('PASSWORD_HASH_CONCURRENCY', 2))
+app.config['PASSWORD_HASH_QUEUE_TIMEOUT'] = float(os.environ.get('PASSWORD_HASH_QUEUE_TIMEOUT', 10))
+
+# Per-request SQL instrumentation, Server-Timing header and /api/metrics
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+app.config['N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 5))
+
+# Background jobs (?async=1 on heavy reports): worker threads per process, polling interval,
+# how long results are kept and when a running job without progress is considered dead
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_POLL_INTERVAL'] = float(os.environ.get('JOB_POLL_INTERVAL', 2))
+app.config['JOB_RESULT_TTL'] = int(os.environ.get('JOB_RESULT_TTL', 3600))
+app.config['JOB_TIMEOUT'] = int(os.environ.get('JOB_TIMEOUT', 900))
+# Statement timeout for job queries (replaces DB_STATEMENT_TIMEOUT_MS inside jobs; 0 = no limit)
+app.config['JOB_STATEMENT_TIMEOUT_MS'] = int(os.environ.get('JOB_STATEMENT_TIMEOUT_MS', 900000))
+
+# Apply pending schema migrations on startup (set AUTO_MIGRATE=0 to run them only via the CLI)
+app.config['AUTO_MIGRATE'] = os.environ.get('AUTO_MIGRATE', '1') == '1'
+
 # Flask-Login configuration
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -41,7 +115,7 @@ login_manager.login_message_category = 'info'
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    return user_cache.load(int(user_id))
 
 # Register blueprints
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
@@ -50,15 +124,38 @@ app.register_blueprint(student_bp, url_prefix='/api')
 app.register_blueprint(class_bp, url_prefix='/api')
 app.register_blueprint(attendance_bp, url_prefix='/api')
 app.register_blueprint(reports_bp, url_prefix='/api')
+app.register_blueprint(metrics_bp, url_prefix='/api')
+app.register_blueprint(sync_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
 
 # Initialize database
 db.init_app(app)
+with app.app_context():
+    init_engine(app, db.engine)
+
+# Shared login rate limiter, report and user caches, password hashing, request instrumentation
+login_limiter.init_app(app)
+report_cache.init_app(app)
+user_cache.init_app(app)
+password_hasher.init_app(app)
+instrumentation.init_app(app)
+
+# Background job workers (started in each gunicorn worker on its first request)
+job_queue.init_app(app)
+
+# Static files: fingerprinted and precompressed, served from memory (flask --app main assets build)
+asset_store.init_app(app)
+
+# CLI commands (flask --app main db upgrade, ...)
+register_commands(app)
 
 def create_default_admin():
     """Create default admin user if no users exist"""
     try:
         with app.app_context():
             db.create_all()
+            if app.config['AUTO_MIGRATE']:
+                migrations.upgrade(db.engine)
             if User.query.count() == 0:
                 admin = User(
                     username='admin',
@@ -79,24 +176,30 @@ create_default_admin()
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    """Serve static files and SPA routing"""
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
+    """Serve static files and SPA routing (from the in-memory asset manifest)"""
+    if app.static_folder is None:
         return jsonify({"error": "Static folder not configured"}), 404
 
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
-    else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return jsonify({"error": "index.html not found"}), 404
+    found = asset_store.lookup(path) if path != "" else None
+    if found is not None:
+        asset, immutable = found
+        return asset_store.respond(asset, request, app.response_class, immutable=immutable)
+
+    index = asset_store.assets.get('index.html')
+    if index is None:
+        return jsonify({"error": "index.html not found"}), 404
+    return asset_store.respond(index, request, app.response_class)
 
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({"error": "Endpoint not found"}), 404
 
+@app.errorhandler(PasswordHashingBusy)
+def password_hashing_busy(error):
+    # Login/cadastro num pico: o cliente tenta de novo em instantes
+    db.session.rollback()
+    return jsonify({'error': 'Servidor ocupado. Tente novamente em instantes.'}), 503, {'Retry-After': '5'}
+
 @app.errorhandler(500)
 def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
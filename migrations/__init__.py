@@ -0,0 +1,101 @@
+# Migrações versionadas do esquema (no estilo do Alembic, sem dependências extras).
+# Cada módulo em migrations/versions define revision, down_revision, upgrade(conn)
+# e downgrade(conn). As revisões aplicadas ficam na tabela schema_migrations;
+# upgrade roda na inicialização da aplicação e via `flask --app main db upgrade`.
+import importlib
+import os
+from datetime import datetime
+from sqlalchemy import Column, DateTime, MetaData, String, Table, select
+from sqlalchemy.exc import IntegrityError
+from services.database import without_statement_timeout
+
+VERSIONS_DIR = os.path.join(os.path.dirname(__file__), 'versions')
+
+# Chave arbitrária para pg_advisory_xact_lock: workers subindo juntos não migram em paralelo
+ADVISORY_LOCK_KEY = 7_216_554
+
+metadata = MetaData()
+schema_migrations = Table(
+    'schema_migrations', metadata,
+    Column('revision', String(32), primary_key=True),
+    Column('applied_at', DateTime, nullable=False)
+)
+
+def load_migrations():
+    """Carrega os módulos de versions/ ordenados pela cadeia de revisões"""
+    modules = []
+    for filename in sorted(os.listdir(VERSIONS_DIR)):
+        if filename.endswith('.py') and not filename.startswith('_'):
+            modules.append(importlib.import_module(f'migrations.versions.{filename[:-3]}'))
+
+    previous = None
+    for module in modules:
+        if module.down_revision != previous:
+            raise RuntimeError(
+                f'Migration {module.revision} expects down_revision {module.down_revision}, found {previous}'
+            )
+        previous = module.revision
+    return modules
+
+def applied_revisions(engine):
+    """Revisões já aplicadas no banco"""
+    schema_migrations.create(engine, checkfirst=True)
+    with engine.connect() as conn:
+        return {row.revision for row in conn.execute(select(schema_migrations.c.revision))}
+
+def current_revision(engine):
+    """Última revisão aplicada (ou None em um banco sem migrações)"""
+    applied = applied_revisions(engine)
+    current = None
+    for module in load_migrations():
+        if module.revision in applied:
+            current = module.revision
+    return current
+
+def _lock(conn):
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(f'SELECT pg_advisory_xact_lock({ADVISORY_LOCK_KEY})')
+        # Backfills podem passar do statement_timeout configurado para as requisições
+        without_statement_timeout(conn)
+
+def upgrade(engine, target=None, log=print):
+    """Aplica, em ordem, as migrações pendentes até `target` (padrão: a mais recente)"""
+    applied = applied_revisions(engine)
+    done = []
+    for module in load_migrations():
+        if module.revision not in applied:
+            try:
+                with engine.begin() as conn:
+                    _lock(conn)
+                    already = conn.execute(
+                        select(schema_migrations.c.revision).where(schema_migrations.c.revision == module.revision)
+                    ).first()
+                    if not already:
+                        module.upgrade(conn)
+                        conn.execute(schema_migrations.insert().values(
+                            revision=module.revision, applied_at=datetime.utcnow()
+                        ))
+                        done.append(module.revision)
+                        log(f'Applied migration {module.revision}: {module.__doc__.strip()}')
+            except IntegrityError:
+                # Outro processo registrou a mesma revisão primeiro
+                pass
+        if module.revision == target:
+            break
+    return done
+
+def downgrade(engine, target, log=print):
+    """Desfaz, da mais recente para trás, as migrações posteriores a `target`"""
+    applied = applied_revisions(engine)
+    undone = []
+    for module in reversed(load_migrations()):
+        if module.revision == target:
+            break
+        if module.revision in applied:
+            with engine.begin() as conn:
+                _lock(conn)
+                module.downgrade(conn)
+                conn.execute(schema_migrations.delete().where(schema_migrations.c.revision == module.revision))
+            undone.append(module.revision)
+            log(f'Reverted migration {module.revision}: {module.__doc__.strip()}')
+    return undone
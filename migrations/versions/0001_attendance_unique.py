@@ -0,0 +1,42 @@
+"""Unique index on attendances (student_id, class_id, date)"""
+import logging
+from sqlalchemy import inspect, text
+
+revision = '0001'
+down_revision = None
+
+logger = logging.getLogger(__name__)
+
+KEY = {'student_id', 'class_id', 'date'}
+
+def _has_unique_constraint(conn):
+    # Bancos criados pelo create_all já têm a UniqueConstraint do modelo (e o índice dela)
+    return any(set(constraint['column_names']) == KEY for constraint in inspect(conn).get_unique_constraints('attendances'))
+
+def upgrade(conn):
+    if _has_unique_constraint(conn):
+        return
+
+    # Mantém o registro mais recente de cada chamada duplicada antes de exigir unicidade;
+    # as linhas apagadas vão para o log para poderem ser conferidas/restauradas
+    removed = conn.execute(text(
+        'SELECT id, student_id, class_id, date, present, notes, recorded_by, recorded_at FROM attendances '
+        'WHERE id NOT IN (SELECT MAX(id) FROM attendances GROUP BY student_id, class_id, date) ORDER BY id'
+    )).all()
+    if removed:
+        logger.warning('Removing %d duplicate attendance rows (the latest of each student/class/date is kept)', len(removed))
+        for row in removed:
+            logger.warning('Removed duplicate attendance: %s', dict(row._mapping))
+        conn.execute(text(
+            'DELETE FROM attendances WHERE id NOT IN ('
+            'SELECT MAX(id) FROM attendances GROUP BY student_id, class_id, date)'
+        ))
+    conn.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_attendance_student_class_date '
+        'ON attendances (student_id, class_id, date)'
+    ))
+
+def downgrade(conn):
+    # Só o índice criado aqui; a constraint do modelo fica (as linhas apagadas estão no log do upgrade)
+    if not _has_unique_constraint(conn):
+        conn.execute(text('DROP INDEX IF EXISTS uq_attendance_student_class_date'))
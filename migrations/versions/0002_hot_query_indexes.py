@@ -0,0 +1,29 @@
+"""Composite indexes for attendance and enrollment lookups"""
+from sqlalchemy import text
+
+revision = '0002'
+down_revision = '0001'
+
+INDEXES = [
+    ('ix_attendances_class_date', 'attendances', 'class_id, date'),
+    ('ix_attendances_student_date', 'attendances', 'student_id, date'),
+    ('ix_student_classes_class_active', 'student_classes', 'class_id, active'),
+    ('ix_student_classes_student_active', 'student_classes', 'student_id, active'),
+]
+
+# Índices parciais só com as linhas ativas (filter_by(active=True)), apenas no PostgreSQL
+PARTIAL_INDEXES = [
+    ('ix_student_classes_active_class_student', 'student_classes', 'class_id, student_id'),
+]
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'))
+
+    if conn.dialect.name == 'postgresql':
+        for name, table, columns in PARTIAL_INDEXES:
+            conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns}) WHERE active'))
+
+def downgrade(conn):
+    for name, _table, _columns in INDEXES + PARTIAL_INDEXES:
+        conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
@@ -0,0 +1,11 @@
+"""Index on attendances (date, id) for keyset pagination"""
+from sqlalchemy import text
+
+revision = '0003'
+down_revision = '0002'
+
+def upgrade(conn):
+    conn.execute(text('CREATE INDEX IF NOT EXISTS ix_attendances_date_id ON attendances (date, id)'))
+
+def downgrade(conn):
+    conn.execute(text('DROP INDEX IF EXISTS ix_attendances_date_id'))
@@ -0,0 +1,14 @@
+"""Backfill the attendance rollup tables"""
+from sqlalchemy import text
+from services import rollups
+
+revision = '0004'
+down_revision = '0003'
+
+def upgrade(conn):
+    # As tabelas são criadas pelo db.create_all(); aqui só preenchemos com o histórico
+    rollups.rebuild(conn)
+
+def downgrade(conn):
+    conn.execute(text('DELETE FROM attendance_class_daily'))
+    conn.execute(text('DELETE FROM attendance_student_monthly'))
@@ -0,0 +1,77 @@
+"""Student search index (FTS5 on SQLite, pg_trgm + unaccent on PostgreSQL)"""
+from sqlalchemy import text
+from services.search import PG_SEARCH_DOCUMENT, SEARCH_COLUMNS, SQLITE_FTS_TABLE
+
+revision = '0005'
+down_revision = '0004'
+
+def _columns(prefix=''):
+    return ', '.join(f'{prefix}{column}' for column in SEARCH_COLUMNS)
+
+def _upgrade_sqlite(conn):
+    fts5 = conn.execute(text("SELECT sqlite_compileoption_used('ENABLE_FTS5')")).scalar()
+    if not fts5:
+        # Sem FTS5 a busca usa LIKE (services.search)
+        return
+
+    conn.execute(text(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5('
+        f"{_columns()}, content='students', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    ))
+    # Tabela FTS "external content": os triggers mantêm o índice a cada escrita em students
+    conn.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN '
+        f'INSERT INTO {SQLITE_FTS_TABLE}(rowid, {_columns()}) VALUES (new.id, {_columns("new.")}); END'
+    ))
+    conn.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN '
+        f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {_columns()}) "
+        f"VALUES ('delete', old.id, {_columns('old.')}); END"
+    ))
+    conn.execute(text(
+        f'CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF {_columns()} ON students BEGIN '
+        f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, {_columns()}) "
+        f"VALUES ('delete', old.id, {_columns('old.')}); "
+        f'INSERT INTO {SQLITE_FTS_TABLE}(rowid, {_columns()}) VALUES (new.id, {_columns("new.")}); END'
+    ))
+    conn.execute(text(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')"))
+
+def _upgrade_postgresql(conn):
+    # As extensões podem não estar liberadas para o usuário do banco; nesse caso
+    # a busca continua funcionando com LIKE (services.search)
+    savepoint = conn.begin_nested()
+    try:
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS pg_trgm'))
+        conn.execute(text('CREATE EXTENSION IF NOT EXISTS unaccent'))
+        savepoint.commit()
+    except Exception as e:
+        savepoint.rollback()
+        print(f'Student search index skipped (pg_trgm/unaccent unavailable): {e}')
+        return
+
+    # unaccent() é STABLE; o wrapper IMMUTABLE permite usá-lo num índice
+    conn.execute(text(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS "
+        "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+    ))
+    conn.execute(text(
+        f'CREATE INDEX IF NOT EXISTS ix_students_search_trgm ON students '
+        f'USING gin (({PG_SEARCH_DOCUMENT}) gin_trgm_ops)'
+    ))
+
+def upgrade(conn):
+    if conn.dialect.name == 'postgresql':
+        _upgrade_postgresql(conn)
+    elif conn.dialect.name == 'sqlite':
+        _upgrade_sqlite(conn)
+
+def downgrade(conn):
+    if conn.dialect.name == 'postgresql':
+        conn.execute(text('DROP INDEX IF EXISTS ix_students_search_trgm'))
+        conn.execute(text('DROP FUNCTION IF EXISTS f_unaccent(text)'))
+    elif conn.dialect.name == 'sqlite':
+        for trigger in ('students_fts_insert', 'students_fts_delete', 'students_fts_update'):
+            conn.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+        conn.execute(text(f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}'))
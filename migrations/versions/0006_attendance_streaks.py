@@ -0,0 +1,13 @@
+"""Backfill the attendance streak table"""
+from sqlalchemy import text
+from services import streaks
+
+revision = '0006'
+down_revision = '0005'
+
+def upgrade(conn):
+    # A tabela é criada pelo db.create_all(); aqui só preenchemos com o histórico
+    streaks.rebuild(conn)
+
+def downgrade(conn):
+    conn.execute(text('DELETE FROM attendance_streaks'))
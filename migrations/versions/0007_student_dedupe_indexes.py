@@ -0,0 +1,19 @@
+"""Indexes for matching imported students by e-mail and phone"""
+from sqlalchemy import text
+
+revision = '0007'
+down_revision = '0006'
+
+INDEXES = [
+    # lower(email): a importação compara e-mails sem diferenciar maiúsculas
+    ('ix_students_email_lower', 'students', 'lower(email)'),
+    ('ix_students_phone', 'students', 'phone'),
+]
+
+def upgrade(conn):
+    for name, table, columns in INDEXES:
+        conn.execute(text(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})'))
+
+def downgrade(conn):
+    for name, _table, _columns in INDEXES:
+        conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
@@ -0,0 +1,16 @@
+"""Add classes.enrolled_count and backfill it from active enrollments"""
+from sqlalchemy import inspect, text
+from services import enrollments
+
+revision = '0008'
+down_revision = '0007'
+
+def upgrade(conn):
+    # Bancos novos já têm a coluna (db.create_all); nos existentes ela é adicionada aqui
+    columns = {column['name'] for column in inspect(conn).get_columns('classes')}
+    if 'enrolled_count' not in columns:
+        conn.execute(text('ALTER TABLE classes ADD COLUMN enrolled_count INTEGER NOT NULL DEFAULT 0'))
+    enrollments.recount(conn)
+
+def downgrade(conn):
+    conn.execute(text('ALTER TABLE classes DROP COLUMN enrolled_count'))
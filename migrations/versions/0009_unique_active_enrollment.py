@@ -0,0 +1,25 @@
+"""Unique index on active enrollments per (student_id, class_id)"""
+from sqlalchemy import text
+from services import enrollments
+
+revision = '0009'
+down_revision = '0008'
+
+def upgrade(conn):
+    # Matrículas ativas duplicadas (de matrículas simultâneas) ficam só com a mais antiga
+    conn.execute(text(
+        'UPDATE student_classes SET active = FALSE '
+        'WHERE active AND EXISTS ('
+        'SELECT 1 FROM student_classes older '
+        'WHERE older.student_id = student_classes.student_id '
+        'AND older.class_id = student_classes.class_id '
+        'AND older.active AND older.id < student_classes.id)'
+    ))
+    enrollments.recount(conn)
+    conn.execute(text(
+        'CREATE UNIQUE INDEX IF NOT EXISTS ux_student_classes_active_pair '
+        'ON student_classes (student_id, class_id) WHERE active'
+    ))
+
+def downgrade(conn):
+    conn.execute(text('DROP INDEX IF EXISTS ux_student_classes_active_pair'))
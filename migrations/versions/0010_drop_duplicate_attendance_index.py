@@ -0,0 +1,21 @@
+"""Drop the unique index that duplicates the attendances unique constraint"""
+from sqlalchemy import text
+
+revision = '0010'
+down_revision = '0009'
+
+def upgrade(conn):
+    # No SQLite a UniqueConstraint do modelo vira sqlite_autoindex_attendances_1; a 0001 ainda criava
+    # uq_attendance_student_class_date por cima dela. No PostgreSQL o índice da constraint tem o mesmo
+    # nome, então o CREATE ... IF NOT EXISTS da 0001 já não fazia nada.
+    if conn.dialect.name != 'sqlite':
+        return
+    autoindex = conn.execute(text(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = 'attendances' "
+        "AND name LIKE 'sqlite_autoindex_attendances_%'"
+    )).first()
+    if autoindex:
+        conn.execute(text('DROP INDEX IF EXISTS uq_attendance_student_class_date'))
+
+def downgrade(conn):
+    pass
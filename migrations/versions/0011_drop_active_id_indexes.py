@@ -0,0 +1,15 @@
+"""Drop the partial indexes on students.id and classes.id (the primary key already covers them)"""
+from sqlalchemy import text
+
+revision = '0011'
+down_revision = '0010'
+
+# Criados pela 0002 em bancos PostgreSQL já migrados; só custavam escrita
+INDEXES = ['ix_students_active', 'ix_classes_active']
+
+def upgrade(conn):
+    for name in INDEXES:
+        conn.execute(text(f'DROP INDEX IF EXISTS {name}'))
+
+def downgrade(conn):
+    pass
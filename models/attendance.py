@@ -3,6 +3,13 @@ from models.user import db
 
 class Attendance(db.Model):
     __tablename__ = 'attendances'
+    __table_args__ = (
+        # Uma única presença por aluno, turma e dia (alvo do ON CONFLICT no registro em lote)
+        db.UniqueConstraint('student_id', 'class_id', 'date', name='uq_attendance_student_class_date'),
+        db.Index('ix_attendances_class_date', 'class_id', 'date'),
+        db.Index('ix_attendances_student_date', 'student_id', 'date'),
+        db.Index('ix_attendances_date_id', 'date', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
@@ -0,0 +1,46 @@
+from models.user import db
+
+# Totais de presença mantidos na mesma transação de cada escrita em routes/attendance.py
+# (services/rollups.py). Os relatórios leem daqui em vez de varrer a tabela attendances.
+
+class ClassDailyAttendance(db.Model):
+    __tablename__ = 'attendance_class_daily'
+    
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    present_count = db.Column(db.Integer, nullable=False, default=0)
+    absent_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ClassDailyAttendance class_id={self.class_id} date={self.date}>'
+
+class StudentMonthlyAttendance(db.Model):
+    __tablename__ = 'attendance_student_monthly'
+    
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    month = db.Column(db.Date, primary_key=True)  # primeiro dia do mês
+    present_count = db.Column(db.Integer, nullable=False, default=0)
+    absent_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<StudentMonthlyAttendance student_id={self.student_id} month={self.month}>'
+
+class AttendanceStreak(db.Model):
+    __tablename__ = 'attendance_streaks'
+    __table_args__ = (
+        # /reports/at-risk filtra por faltas seguidas
+        db.Index('ix_attendance_streaks_absences', 'current_absences'),
+    )
+    
+    # Estado por aluno e turma, recalculado para os pares afetados em cada escrita (services/streaks.py)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), primary_key=True)
+    class_id = db.Column(db.Integer, db.ForeignKey('classes.id'), primary_key=True)
+    current_absences = db.Column(db.Integer, nullable=False, default=0)  # faltas desde a última presença
+    last_present_date = db.Column(db.Date, nullable=True)
+    last_attendance_date = db.Column(db.Date, nullable=False)
+    rate_30 = db.Column(db.Float, nullable=True)  # % de presença nos últimos 30 dias (None sem aulas)
+    rate_90 = db.Column(db.Float, nullable=True)
+    refreshed_on = db.Column(db.Date, nullable=False)  # dia de referência das janelas
+
+    def __repr__(self):
+        return f'<AttendanceStreak student_id={self.student_id} class_id={self.class_id}>'
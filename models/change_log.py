@@ -0,0 +1,16 @@
+from datetime import datetime
+from models.user import db
+
+class ChangeLog(db.Model):
+    __tablename__ = 'change_log'
+    # AUTOINCREMENT no SQLite: seq nunca é reutilizado depois de podar o log
+    __table_args__ = {'sqlite_autoincrement': True}
+    
+    # Uma linha por registro alterado; seq cresce na ordem de commit (ver services.change_log)
+    seq = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    entity = db.Column(db.String(20), nullable=False)  # student, class, enrollment, attendance
+    entity_id = db.Column(db.Integer, nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<ChangeLog {self.seq} {self.entity}:{self.entity_id}>'
@@ -13,6 +13,8 @@ class Class(db.Model):
     instructor = db.Column(db.String(100), nullable=True)
     location = db.Column(db.String(200), nullable=True)
     max_students = db.Column(db.Integer, nullable=True)
+    # Matrículas ativas, mantido por services.enrollments (UPDATE condicional garante max_students)
+    enrolled_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     active = db.Column(db.Boolean, default=True)
     created_date = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -36,6 +38,7 @@ class Class(db.Model):
             'instructor': self.instructor,
             'location': self.location,
             'max_students': self.max_students,
+            'enrolled_count': self.enrolled_count,
             'active': self.active,
             'created_date': self.created_date.isoformat()
         }
@@ -43,6 +46,15 @@ class Class(db.Model):
 # Tabela de associação many-to-many entre Student e Class
 class StudentClass(db.Model):
     __tablename__ = 'student_classes'
+    __table_args__ = (
+        db.Index('ix_student_classes_class_active', 'class_id', 'active'),
+        db.Index('ix_student_classes_student_active', 'student_id', 'active'),
+        # No máximo uma matrícula ativa por aluno e turma (migração 0009)
+        db.Index(
+            'ux_student_classes_active_pair', 'student_id', 'class_id', unique=True,
+            sqlite_where=db.text('active'), postgresql_where=db.text('active')
+        ),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
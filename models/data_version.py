@@ -0,0 +1,12 @@
+from models.user import db
+
+class DataVersion(db.Model):
+    __tablename__ = 'data_versions'
+    
+    # Contador de alterações por conjunto de dados (attendance, students, classes, users),
+    # incrementado na mesma transação das rotas de escrita
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DataVersion {self.name}={self.version}>'
@@ -0,0 +1,46 @@
+from datetime import datetime
+from sqlalchemy.orm import deferred
+from models.user import db
+
+class Job(db.Model):
+    __tablename__ = 'jobs'
+    __table_args__ = (
+        # Workers buscam o próximo job da fila por (status, created_at)
+        db.Index('ix_jobs_status_created', 'status', 'created_at'),
+    )
+    
+    # Relatório/exportação executado em segundo plano por services.jobs
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False)  # JSON
+    dedupe_key = db.Column(db.String(64), nullable=False, index=True)  # hash de kind + params + versões dos dados
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, done, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    # Conteúdo pronto da resposta; deferred para consultas de status não carregarem o resultado
+    result = deferred(db.Column(db.LargeBinary, nullable=True))
+    content_type = db.Column(db.String(100), nullable=True)
+    filename = db.Column(db.String(255), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime, nullable=True)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    expires_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'content_type': self.content_type,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'expires_at': self.expires_at.isoformat() if self.expires_at else None
+        }
+
+    def __repr__(self):
+        return f'<Job {self.id} {self.kind} {self.status}>'
@@ -0,0 +1,14 @@
+from models.user import db
+
+class RateLimitCounter(db.Model):
+    __tablename__ = 'rate_limit_counters'
+    
+    # Contador de janela deslizante: tamanho fixo por chave, compartilhado entre workers
+    key = db.Column(db.String(255), primary_key=True)
+    window_index = db.Column(db.Integer, nullable=False)  # janela atual (epoch // duração)
+    current_count = db.Column(db.Integer, nullable=False, default=0)
+    previous_count = db.Column(db.Integer, nullable=False, default=0)
+    expires_at = db.Column(db.Float, nullable=False, index=True)  # epoch em segundos
+
+    def __repr__(self):
+        return f'<RateLimitCounter {self.key}>'
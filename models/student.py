@@ -1,5 +1,6 @@
-from datetime import datetime, date
+from datetime import datetime
 from models.user import db
+from services.dates import request_today
 
 class Student(db.Model):
     __tablename__ = 'students'
@@ -35,7 +36,7 @@ class Student(db.Model):
         """Verifica se o aluno é menor de idade"""
         if not self.birth_date:
             return False
-        today = date.today()
+        today = request_today()
         age = today.year - self.birth_date.year - ((today.month, today.day) < (self.birth_date.month, self.birth_date.day))
         return age < 18
 
@@ -43,7 +44,7 @@ class Student(db.Model):
         """Calcula a idade do aluno"""
         if not self.birth_date:
             return None
-        today = date.today()
+        today = request_today()
         return today.year - self.birth_date.year - ((today.month, today.day) < (self.birth_date.month, self.birth_date.day))
 
     def to_dict(self):
@@ -1,10 +1,13 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.password_hashing import password_hasher
 from datetime import datetime
 
 db = SQLAlchemy()
 
+# Usuário ativo no dashboard: fez login nos últimos N dias
+ACTIVE_USER_DAYS = 30
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     
@@ -20,11 +23,15 @@ class User(UserMixin, db.Model):
     
     def set_password(self, password):
         """Set password hash"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = password_hasher.hash(password)
     
     def check_password(self, password):
         """Check password against hash"""
-        return check_password_hash(self.password_hash, password)
+        return password_hasher.verify(self.password_hash, password)
+    
+    def password_needs_rehash(self):
+        """Hash gerado com parâmetros diferentes de PASSWORD_HASH_METHOD"""
+        return password_hasher.needs_rehash(self.password_hash)
     
     def to_dict(self):
         """Convert user to dictionary"""
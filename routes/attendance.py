@@ -1,50 +1,113 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from datetime import datetime
+from sqlalchemy import and_, select
 from models.attendance import Attendance, db
 from models.student import Student
 from models.class_model import Class, StudentClass
+from services import change_log
+from services.attendance_changes import AttendanceChange, apply_attendance_changes, presence_state
+from services.export import export_bytes, export_response, validate_export_format
+from services.jobs import async_requested, enqueue_response, job_queue
+from services.pagination import keyset_list
+from services.serializers import attendance_serializer
+from services.sql import upsert_insert
 
 attendance_bp = Blueprint('attendance', __name__)
 
+def filter_attendance_query(query, args):
+    """Apply the student/class/date filters shared by the list and export endpoints"""
+    student_id = args.get('student_id', type=int)
+    class_id = args.get('class_id', type=int)
+    date = args.get('date')
+    start_date = args.get('start_date')
+    end_date = args.get('end_date')
+    
+    if student_id:
+        query = query.filter(Attendance.student_id == student_id)
+    
+    if class_id:
+        query = query.filter(Attendance.class_id == class_id)
+    
+    try:
+        if date:
+            date_obj = datetime.strptime(date, '%Y-%m-%d').date()
+            query = query.filter(Attendance.date == date_obj)
+        
+        if start_date and end_date:
+            start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
+            end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
+            query = query.filter(Attendance.date >= start_date_obj, Attendance.date <= end_date_obj)
+    except ValueError:
+        raise ValueError('Invalid date format. Use YYYY-MM-DD')
+    
+    return query
+
 @attendance_bp.route('/attendance', methods=['GET'])
 @login_required
 def get_attendance():
     """Get attendance records with optional filters"""
     try:
-        # Get query parameters
-        student_id = request.args.get('student_id', type=int)
-        class_id = request.args.get('class_id', type=int)
-        date = request.args.get('date')
-        start_date = request.args.get('start_date')
-        end_date = request.args.get('end_date')
-        
-        # Build query
-        query = Attendance.query
-        
-        if student_id:
-            query = query.filter(Attendance.student_id == student_id)
-        
-        if class_id:
-            query = query.filter(Attendance.class_id == class_id)
-        
-        if date:
-            try:
-                date_obj = datetime.strptime(date, '%Y-%m-%d').date()
-                query = query.filter(Attendance.date == date_obj)
-            except ValueError:
-                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
-        
-        if start_date and end_date:
-            try:
-                start_date_obj = datetime.strptime(start_date, '%Y-%m-%d').date()
-                end_date_obj = datetime.strptime(end_date, '%Y-%m-%d').date()
-                query = query.filter(Attendance.date >= start_date_obj, Attendance.date <= end_date_obj)
-            except ValueError:
-                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
-        
-        attendances = query.order_by(Attendance.date.desc()).all()
-        return jsonify([att.to_dict() for att in attendances])
+        try:
+            query = filter_attendance_query(Attendance.query, request.args)
+            # Projeção (fields=) e paginação por cursor em (date, id)
+            result = keyset_list(
+                query, attendance_serializer, [Attendance.date, Attendance.id], request.args, descending=True
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+EXPORT_COLUMNS = [
+    'id', 'date', 'student_id', 'student_name', 'class_id', 'class_name',
+    'present', 'notes', 'recorded_by', 'recorded_at'
+]
+
+def export_statement(args):
+    """Registros com nomes de aluno e turma, filtrados como em GET /attendance"""
+    statement = select(
+        Attendance.id,
+        Attendance.date,
+        Attendance.student_id,
+        Student.name,
+        Attendance.class_id,
+        Class.name,
+        Attendance.present,
+        Attendance.notes,
+        Attendance.recorded_by,
+        Attendance.recorded_at
+    ).join(
+        Student, Student.id == Attendance.student_id
+    ).join(
+        Class, Class.id == Attendance.class_id
+    ).order_by(Attendance.date, Attendance.id)
+    return filter_attendance_query(statement, args)
+
+@job_queue.task('attendance_export')
+def export_attendance_job(params, progress):
+    """Job de /attendance/export?async=1"""
+    return export_bytes(
+        export_statement(params), EXPORT_COLUMNS, params.get('format', 'csv'), 'attendance', progress=progress
+    )
+
+@attendance_bp.route('/attendance/export', methods=['GET'])
+@login_required
+def export_attendance():
+    """Stream attendance records as CSV or NDJSON (same filters as GET /attendance; async=1 runs it as a job)"""
+    try:
+        try:
+            statement = export_statement(request.args)
+            export_format = request.args.get('format', 'csv')
+            if async_requested():
+                validate_export_format(export_format)
+                params = {key: value for key, value in request.args.items() if key != 'async'}
+                return enqueue_response('attendance_export', params, depends_on=('attendance', 'students', 'classes'))
+            
+            return export_response(statement, EXPORT_COLUMNS, export_format, 'attendance')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -92,11 +155,17 @@ def create_attendance():
         
         if existing_attendance:
             # Update existing record
+            change = AttendanceChange(
+                existing_attendance.student_id, existing_attendance.class_id, attendance_date,
+                presence_state(existing_attendance.present), presence_state(data.get('present', True))
+            )
             existing_attendance.present = data.get('present', True)
             existing_attendance.notes = data.get('notes')
             existing_attendance.recorded_by = current_user.id
             existing_attendance.recorded_at = datetime.utcnow()
             
+            apply_attendance_changes([change])
+            change_log.record('attendance', existing_attendance.id)
             db.session.commit()
             return jsonify(existing_attendance.to_dict())
         else:
@@ -111,6 +180,12 @@ def create_attendance():
             )
             
             db.session.add(attendance)
+            db.session.flush()
+            apply_attendance_changes([AttendanceChange(
+                attendance.student_id, attendance.class_id, attendance_date,
+                None, presence_state(attendance.present)
+            )])
+            change_log.record('attendance', attendance.id)
             db.session.commit()
             return jsonify(attendance.to_dict()), 201
     except Exception as e:
@@ -137,13 +212,19 @@ def update_attendance(attendance_id):
         
         # Update fields
         if 'present' in data:
+            change = AttendanceChange(
+                attendance.student_id, attendance.class_id, attendance.date,
+                presence_state(attendance.present), presence_state(data['present'])
+            )
             attendance.present = data['present']
+            apply_attendance_changes([change])
         if 'notes' in data:
             attendance.notes = data['notes']
         
         attendance.recorded_by = current_user.id
         attendance.recorded_at = datetime.utcnow()
         
+        change_log.record('attendance', attendance.id)
         db.session.commit()
         return jsonify(attendance.to_dict())
     except Exception as e:
@@ -156,7 +237,15 @@ def delete_attendance(attendance_id):
     """Delete an attendance record"""
     try:
         attendance = Attendance.query.get_or_404(attendance_id)
+        change = AttendanceChange(
+            attendance.student_id, attendance.class_id, attendance.date,
+            presence_state(attendance.present), None
+        )
+        attendance_id = attendance.id
         db.session.delete(attendance)
+        db.session.flush()
+        apply_attendance_changes([change])
+        change_log.record('attendance', attendance_id)
         db.session.commit()
         return '', 204
     except Exception as e:
@@ -180,78 +269,107 @@ def bulk_attendance():
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
         # Validate class exists
-        class_obj = Class.query.get(data['class_id'])
+        class_id = data['class_id']
+        class_obj = Class.query.get(class_id)
         if not class_obj:
             return jsonify({'error': 'Class not found'}), 404
         
-        results = []
+        entries = [student_data for student_data in data['students'] if student_data.get('student_id')]
+        student_ids = {student_data['student_id'] for student_data in entries}
         
-        for student_data in data['students']:
-            if not student_data.get('student_id'):
-                continue
+        # Validate the whole roster in one query: student exists, is enrolled
+        # and already has attendance for this date (-> updated instead of created)
+        roster = {}
+        if student_ids:
+            roster_rows = db.session.query(
+                Student.id, StudentClass.id, Attendance.id, Attendance.present
+            ).outerjoin(
+                StudentClass, and_(
+                    StudentClass.student_id == Student.id,
+                    StudentClass.class_id == class_id,
+                    StudentClass.active == True
+                )
+            ).outerjoin(
+                Attendance, and_(
+                    Attendance.student_id == Student.id,
+                    Attendance.class_id == class_id,
+                    Attendance.date == attendance_date
+                )
+            ).filter(Student.id.in_(student_ids)).all()
             
+            for student_id, enrollment_id, attendance_id, present in roster_rows:
+                enrolled, previous = roster.get(student_id, (False, None))
+                if attendance_id is not None:
+                    previous = presence_state(present)
+                roster[student_id] = (enrolled or enrollment_id is not None, previous)
+        
+        results = []
+        rows_by_student = {}
+        recorded_at = datetime.utcnow()
+        
+        for student_data in entries:
             student_id = student_data['student_id']
-            present = student_data.get('present', True)
-            notes = student_data.get('notes')
             
-            # Validate student exists and is enrolled
-            student = Student.query.get(student_id)
-            if not student:
+            if student_id not in roster:
                 results.append({
                     'student_id': student_id,
                     'error': 'Student not found'
                 })
                 continue
             
-            enrollment = StudentClass.query.filter_by(
-                student_id=student_id,
-                class_id=data['class_id'],
-                active=True
-            ).first()
-            
-            if not enrollment:
+            enrolled, previous = roster[student_id]
+            if not enrolled:
                 results.append({
                     'student_id': student_id,
                     'error': 'Student not enrolled in this class'
                 })
                 continue
             
-            # Check if attendance already exists
-            existing_attendance = Attendance.query.filter_by(
-                student_id=student_id,
-                class_id=data['class_id'],
-                date=attendance_date
-            ).first()
+            # A student repeated in the same payload updates the row created by its first entry
+            status = 'updated' if previous is not None or student_id in rows_by_student else 'created'
+            rows_by_student[student_id] = {
+                'student_id': student_id,
+                'class_id': class_id,
+                'date': attendance_date,
+                'present': student_data.get('present', True),
+                'notes': student_data.get('notes'),
+                'recorded_by': current_user.id,
+                'recorded_at': recorded_at
+            }
+            results.append({
+                'student_id': student_id,
+                'status': status
+            })
+        
+        # Write every row in a single INSERT ... ON CONFLICT DO UPDATE
+        saved = {}
+        if rows_by_student:
+            stmt = upsert_insert(Attendance.__table__).values(list(rows_by_student.values()))
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['student_id', 'class_id', 'date'],
+                set_={
+                    'present': stmt.excluded.present,
+                    'notes': stmt.excluded.notes,
+                    'recorded_by': stmt.excluded.recorded_by,
+                    'recorded_at': stmt.excluded.recorded_at
+                }
+            ).returning(*Attendance.__table__.c)
             
-            if existing_attendance:
-                # Update existing record
-                existing_attendance.present = present
-                existing_attendance.notes = notes
-                existing_attendance.recorded_by = current_user.id
-                existing_attendance.recorded_at = datetime.utcnow()
-                
-                results.append({
-                    'student_id': student_id,
-                    'status': 'updated',
-                    'attendance': existing_attendance.to_dict()
-                })
-            else:
-                # Create new record
-                attendance = Attendance(
-                    student_id=student_id,
-                    class_id=data['class_id'],
-                    date=attendance_date,
-                    present=present,
-                    notes=notes,
-                    recorded_by=current_user.id
+            for row in db.session.execute(stmt):
+                saved[row.student_id] = Attendance(**row._mapping).to_dict()
+            
+            apply_attendance_changes([
+                AttendanceChange(
+                    student_id, class_id, attendance_date,
+                    roster[student_id][1], presence_state(row['present'])
                 )
-                
-                db.session.add(attendance)
-                results.append({
-                    'student_id': student_id,
-                    'status': 'created',
-                    'attendance': attendance.to_dict()
-                })
+                for student_id, row in rows_by_student.items()
+            ])
+            change_log.record('attendance', *[attendance['id'] for attendance in saved.values()])
+        
+        for result in results:
+            if 'status' in result:
+                result['attendance'] = saved[result['student_id']]
         
         db.session.commit()
         return jsonify({
@@ -1,34 +1,25 @@
 from flask import Blueprint, request, jsonify, session
 from flask_login import login_user, logout_user, login_required, current_user
 from datetime import datetime, timedelta
-from models.user import User, db
+from models.user import ACTIVE_USER_DAYS, User, db
+from services import versions
+from services.password_hashing import PasswordHashingBusy
+from services.rate_limit import RateLimiter
+from services.user_cache import user_cache
 import re
 
 auth_bp = Blueprint('auth', __name__)
 
-# Simple rate limiting storage (in production, use Redis or similar)
-login_attempts = {}
+# Failed logins per IP: 5 attempts in a sliding 15-minute window, shared by all workers
+login_limiter = RateLimiter('login', limit=5, window_seconds=15 * 60)
 
 def is_rate_limited(ip_address):
     """Check if IP is rate limited for login attempts"""
-    now = datetime.utcnow()
-    if ip_address in login_attempts:
-        attempts = login_attempts[ip_address]
-        # Remove attempts older than 15 minutes
-        attempts = [attempt for attempt in attempts if now - attempt < timedelta(minutes=15)]
-        login_attempts[ip_address] = attempts
-        
-        # Check if more than 5 attempts in 15 minutes
-        if len(attempts) >= 5:
-            return True
-    return False
+    return login_limiter.is_limited(ip_address)
 
 def record_login_attempt(ip_address):
     """Record a failed login attempt"""
-    now = datetime.utcnow()
-    if ip_address not in login_attempts:
-        login_attempts[ip_address] = []
-    login_attempts[ip_address].append(now)
+    login_limiter.hit(ip_address)
 
 def validate_password_strength(password):
     """Validate password strength"""
@@ -72,9 +63,19 @@ def login():
             record_login_attempt(client_ip)
             return jsonify({'error': 'Usuário ou senha inválidos'}), 401
         
-        # Update last login
-        user.last_login = datetime.utcnow()
+        # Parâmetros de hash mudaram desde que a senha foi gravada: regrava com os atuais
+        if user.password_needs_rehash():
+            user.set_password(password)
+        
+        # Update last login; a versão de users (cache do dashboard) só muda quando o login
+        # coloca o usuário de volta na janela de usuários ativos, não a cada login
+        now = datetime.utcnow()
+        previous_login = user.last_login
+        user.last_login = now
+        if previous_login is None or previous_login < now - timedelta(days=ACTIVE_USER_DAYS):
+            versions.bump('users')
         db.session.commit()
+        user_cache.invalidate(user.id)
         
         # Log in user
         login_user(user, remember=True)
@@ -83,6 +84,9 @@ def login():
             'message': 'Login realizado com sucesso',
             'user': user.to_dict()
         }), 200
+    except PasswordHashingBusy:
+        # 503 pelo errorhandler de main.py
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -154,12 +158,16 @@ def register():
         user.set_password(data['password'])
         
         db.session.add(user)
+        versions.bump('users')
         db.session.commit()
         
         return jsonify({
             'message': 'User registered successfully',
             'user': user.to_dict()
         }), 201
+    except PasswordHashingBusy:
+        # 503 pelo errorhandler de main.py
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -174,8 +182,11 @@ def change_password():
         if not data or not data.get('current_password') or not data.get('new_password'):
             return jsonify({'error': 'Senha atual e nova senha são obrigatórias'}), 400
         
+        # current_user é um snapshot em cache; a senha é conferida e gravada no User
+        user = User.query.get(current_user.id)
+        
         # Verify current password
-        if not current_user.check_password(data['current_password']):
+        if not user.check_password(data['current_password']):
             return jsonify({'error': 'Senha atual incorreta'}), 400
         
         # Validate new password strength
@@ -184,14 +195,18 @@ def change_password():
             return jsonify({'error': message}), 400
         
         # Check if new password is different from current
-        if current_user.check_password(data['new_password']):
+        if user.check_password(data['new_password']):
             return jsonify({'error': 'A nova senha deve ser diferente da senha atual'}), 400
         
         # Update password
-        current_user.set_password(data['new_password'])
+        user.set_password(data['new_password'])
         db.session.commit()
+        user_cache.invalidate(user.id)
         
         return jsonify({'message': 'Senha alterada com sucesso'}), 200
+    except PasswordHashingBusy:
+        # 503 pelo errorhandler de main.py
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -1,19 +1,32 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required
 from datetime import datetime, time
+from sqlalchemy import and_
 from models.class_model import Class, StudentClass, db
 from models.student import Student
 from models.attendance import Attendance
+from services import change_log, versions
+from services.enrollments import enroll_students, lock_class, release_seats, reserve_seats
+from services.etags import versioned_etag
+from services.pagination import keyset_list
+from services.serializers import attendance_serializer, class_serializer, student_serializer
 
 class_bp = Blueprint('class', __name__)
 
+# Lean projection used by the roll-call screen (no guardian data)
+ROLL_CALL_FIELDS = ['id', 'name', 'cord_level', 'is_minor']
+
 @class_bp.route('/classes', methods=['GET'])
 @login_required
+@versioned_etag('classes', 'enrollments')
 def get_classes():
-    """Get all active classes"""
+    """Get active classes (supports fields=, limit= and cursor=)"""
     try:
-        classes = Class.query.filter_by(active=True).all()
-        return jsonify([class_obj.to_dict() for class_obj in classes])
+        try:
+            result = keyset_list(Class.query.filter_by(active=True), class_serializer, [Class.id], request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -55,6 +68,9 @@ def create_class():
         )
         
         db.session.add(class_obj)
+        db.session.flush()
+        versions.bump('classes')
+        change_log.record('class', class_obj.id)
         db.session.commit()
         return jsonify(class_obj.to_dict()), 201
     except Exception as e:
@@ -63,6 +79,7 @@ def create_class():
 
 @class_bp.route('/classes/<int:class_id>', methods=['GET'])
 @login_required
+@versioned_etag('classes', 'enrollments')
 def get_class(class_id):
     """Get a specific class"""
     try:
@@ -111,6 +128,8 @@ def update_class(class_id):
         if class_obj.start_time >= class_obj.end_time:
             return jsonify({'error': 'Start time must be before end time'}), 400
         
+        versions.bump('classes')
+        change_log.record('class', class_obj.id)
         db.session.commit()
         return jsonify(class_obj.to_dict())
     except Exception as e:
@@ -124,6 +143,8 @@ def delete_class(class_id):
     try:
         class_obj = Class.query.get_or_404(class_id)
         class_obj.active = False
+        versions.bump('classes')
+        change_log.record('class', class_obj.id)
         db.session.commit()
         return '', 204
     except Exception as e:
@@ -132,17 +153,29 @@ def delete_class(class_id):
 
 @class_bp.route('/classes/<int:class_id>/students', methods=['GET'])
 @login_required
+@versioned_etag('students', 'enrollments', daily=True)
 def get_class_students(class_id):
-    """Get all students enrolled in a specific class"""
+    """Get all students enrolled in a specific class (supports fields=)"""
     try:
         class_obj = Class.query.get_or_404(class_id)
-        student_classes = StudentClass.query.filter_by(class_id=class_id, active=True).all()
+        try:
+            keys = student_serializer.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Uma consulta só, direto em tuplas (sem carregar cada Student pelo relacionamento)
+        rows = db.session.query(
+            *student_serializer.columns(keys), StudentClass.enrollment_date
+        ).join(
+            StudentClass, StudentClass.student_id == Student.id
+        ).filter(
+            StudentClass.class_id == class_id,
+            StudentClass.active == True
+        ).order_by(StudentClass.id).all()
         
-        students_data = []
-        for sc in student_classes:
-            student_data = sc.student.to_dict()
-            student_data['enrollment_date'] = sc.enrollment_date.isoformat()
-            students_data.append(student_data)
+        students_data = student_serializer.serialize_rows(rows, keys)
+        for student_data, row in zip(students_data, rows):
+            student_data['enrollment_date'] = row[-1].isoformat()
         
         return jsonify(students_data)
     except Exception as e:
@@ -157,20 +190,23 @@ def add_student_to_class(class_id, student_id):
         class_obj = Class.query.get_or_404(class_id)
         student = Student.query.get_or_404(student_id)
         
-        # Check if already enrolled
+        # Check if already enrolled (com a turma travada, para não duplicar com uma matrícula simultânea)
+        lock_class(class_id)
         existing = StudentClass.query.filter_by(student_id=student_id, class_id=class_id, active=True).first()
         if existing:
             return jsonify({'error': 'Student already enrolled in this class'}), 400
         
-        # Check max_students limit
-        if class_obj.max_students:
-            current_count = StudentClass.query.filter_by(class_id=class_id, active=True).count()
-            if current_count >= class_obj.max_students:
-                return jsonify({'error': 'Class is full'}), 400
+        # Reserva a vaga no contador da turma (atômico: não passa de max_students)
+        if not reserve_seats(class_id, 1):
+            db.session.rollback()
+            return jsonify({'error': 'Class is full'}), 400
         
         # Create enrollment
         enrollment = StudentClass(student_id=student_id, class_id=class_id)
         db.session.add(enrollment)
+        db.session.flush()
+        versions.bump('enrollments')
+        change_log.record('enrollment', enrollment.id)
         db.session.commit()
         
         return jsonify(enrollment.to_dict()), 201
@@ -178,6 +214,33 @@ def add_student_to_class(class_id, student_id):
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@class_bp.route('/classes/<int:class_id>/students/bulk', methods=['POST'])
+@login_required
+def add_students_to_class(class_id):
+    """Matricula vários alunos (`student_ids`) numa transação, com resultado por aluno"""
+    try:
+        data = request.json or {}
+        student_ids = data.get('student_ids')
+        if not isinstance(student_ids, list) or not student_ids:
+            return jsonify({'error': 'student_ids must be a non-empty list'}), 400
+        if not all(isinstance(student_id, int) and not isinstance(student_id, bool) for student_id in student_ids):
+            return jsonify({'error': 'student_ids must contain integer ids'}), 400
+        
+        class_obj = db.session.get(Class, class_id)
+        if not class_obj:
+            return jsonify({'error': 'Class not found'}), 404
+        
+        results = enroll_students(class_id, student_ids)
+        db.session.commit()
+        return jsonify({
+            'message': 'Bulk enrollment processed',
+            'enrolled': sum(1 for result in results if 'status' in result),
+            'results': results
+        })
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @class_bp.route('/classes/<int:class_id>/students/<int:student_id>', methods=['DELETE'])
 @login_required
 def remove_student_from_class(class_id, student_id):
@@ -185,6 +248,9 @@ def remove_student_from_class(class_id, student_id):
     try:
         enrollment = StudentClass.query.filter_by(student_id=student_id, class_id=class_id, active=True).first_or_404()
         enrollment.active = False
+        release_seats(class_id)
+        versions.bump('enrollments')
+        change_log.record('enrollment', enrollment.id)
         db.session.commit()
         return '', 204
     except Exception as e:
@@ -193,6 +259,7 @@ def remove_student_from_class(class_id, student_id):
 
 @class_bp.route('/classes/<int:class_id>/attendance/<date>', methods=['GET'])
 @login_required
+@versioned_etag('students', 'enrollments', 'attendance', daily=True)
 def get_class_attendance(class_id, date):
     """Get attendance for a specific class and date"""
     try:
@@ -202,26 +269,32 @@ def get_class_attendance(class_id, date):
         except ValueError:
             return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
-        # Get all students enrolled in the class
-        student_classes = StudentClass.query.filter_by(class_id=class_id, active=True).all()
-        
-        students_with_attendance = []
-        for sc in student_classes:
-            student_data = sc.student.to_dict()
-            
-            # Get attendance record for this student, class, and date
-            attendance = Attendance.query.filter_by(
-                student_id=sc.student_id,
-                class_id=class_id,
-                date=attendance_date
-            ).first()
-            
-            if attendance:
-                student_data['attendance'] = attendance.to_dict()
-            else:
-                student_data['attendance'] = None
-            
-            students_with_attendance.append(student_data)
+        # Enrolled students and their attendance for the date in one LEFT JOIN
+        student_columns = student_serializer.columns(ROLL_CALL_FIELDS)
+        attendance_keys = list(attendance_serializer.fields)
+        attendance_columns = attendance_serializer.columns(attendance_keys)
+        
+        rows = db.session.query(
+            *student_columns, *attendance_columns
+        ).select_from(StudentClass).join(
+            Student, Student.id == StudentClass.student_id
+        ).outerjoin(
+            Attendance, and_(
+                Attendance.student_id == StudentClass.student_id,
+                Attendance.class_id == class_id,
+                Attendance.date == attendance_date
+            )
+        ).filter(
+            StudentClass.class_id == class_id,
+            StudentClass.active == True
+        ).order_by(StudentClass.id).all()
+        
+        split = len(student_columns)
+        students_with_attendance = student_serializer.serialize_rows([row[:split] for row in rows], ROLL_CALL_FIELDS)
+        attendances = attendance_serializer.serialize_rows([row[split:] for row in rows], attendance_keys)
+        for student_data, attendance, row in zip(students_with_attendance, attendances, rows):
+            # Attendance.id vem primeiro nas colunas de presença; NULL = sem registro no dia
+            student_data['attendance'] = attendance if row[split] is not None else None
         
         return jsonify(students_with_attendance)
     except Exception as e:
@@ -0,0 +1,50 @@
+import json
+from datetime import datetime
+from flask import Blueprint, current_app, jsonify, url_for
+from flask_login import login_required
+from models.job import Job
+from models.user import db
+
+jobs_bp = Blueprint('jobs', __name__)
+
+def _find_job(job_id):
+    job = db.session.get(Job, job_id)
+    if job is None or (job.expires_at is not None and job.expires_at < datetime.utcnow()):
+        return None
+    return job
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+@login_required
+def get_job(job_id):
+    """Status e progresso de um job; resultados JSON vêm junto quando prontos"""
+    try:
+        job = _find_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found or expired'}), 404
+        
+        payload = job.to_dict()
+        if job.status == 'done':
+            payload['result_url'] = url_for('jobs.get_job_result', job_id=job.id)
+            if job.content_type == 'application/json':
+                payload['result'] = json.loads(job.result)
+        return jsonify(payload)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@jobs_bp.route('/jobs/<job_id>/result', methods=['GET'])
+@login_required
+def get_job_result(job_id):
+    """Resultado armazenado do job (JSON ou o arquivo exportado)"""
+    try:
+        job = _find_job(job_id)
+        if job is None:
+            return jsonify({'error': 'Job not found or expired'}), 404
+        if job.status != 'done':
+            return jsonify({'error': f'Job is {job.status}', 'status': job.status}), 409
+        
+        headers = {}
+        if job.filename:
+            headers['Content-Disposition'] = f'attachment; filename={job.filename}'
+        return current_app.response_class(job.result, content_type=job.content_type, headers=headers)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
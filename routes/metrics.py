@@ -0,0 +1,39 @@
+import hmac
+from flask import Blueprint, Response, current_app, jsonify, request
+from flask_login import current_user
+from models.user import db
+from services.database import pool_stats
+from services.instrumentation import instrumentation, render_gauges
+
+metrics_bp = Blueprint('metrics', __name__)
+
+def _authorized():
+    """Sessão logada ou `Authorization: Bearer <METRICS_TOKEN>` (para o Prometheus)"""
+    token = current_app.config.get('METRICS_TOKEN')
+    header = request.headers.get('Authorization', '')
+    if token and header.startswith('Bearer ') and hmac.compare_digest(header[7:], token):
+        return True
+    return current_user.is_authenticated
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Latência por rota, queries e N+1 no formato texto do Prometheus"""
+    try:
+        if not _authorized():
+            return jsonify({'error': 'Unauthorized'}), 401
+        text = instrumentation.render_prometheus() + render_gauges(
+            'db_pool', pool_stats(db.engine), 'Database connection pool of this process.'
+        )
+        return Response(text, content_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@metrics_bp.route('/metrics/pool', methods=['GET'])
+def get_pool_metrics():
+    """Uso e espera do pool de conexões deste processo (para dimensionar workers)"""
+    try:
+        if not _authorized():
+            return jsonify({'error': 'Unauthorized'}), 401
+        return jsonify(pool_stats(db.engine))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
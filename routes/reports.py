@@ -1,18 +1,34 @@
-from flask import Blueprint, jsonify, request
+import math
+from flask import Blueprint, current_app, jsonify, request
 from flask_login import login_required
-from datetime import datetime, timedelta
-from sqlalchemy import func, and_
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, and_, select
 from models.student import Student
 from models.attendance import Attendance
 from models.class_model import Class
 from models.user import db
+from services.aggregations import (
+    build_general_stats, class_frequency_report, frequency_rate, present_sum, student_frequency_summary
+)
+from services.export import export_bytes, export_response, validate_export_format
+from services.jobs import async_requested, enqueue_response, job_queue
+from services import streaks
+from services.pagination import DEFAULT_PAGE_SIZE, keyset_list, parse_limit
+from services.report_cache import cached_report, report_cache
+from services.rollups import class_daily
+from services.serializers import attendance_detail_serializer
 
 reports_bp = Blueprint('reports', __name__)
 
 @reports_bp.route('/reports/frequency/<int:student_id>', methods=['GET'])
 @login_required
+@cached_report('attendance', 'students', 'classes')
 def get_student_frequency(student_id):
-    """Gera relatório de frequência individual do aluno"""
+    """Gera relatório de frequência individual do aluno.
+
+    O detalhe das presenças só vem com `detail=1`, paginado por cursor
+    (limit=, cursor=, fields=), mais recentes primeiro.
+    """
     try:
         # Parâmetros de data
         start_date = request.args.get('start_date')
@@ -32,67 +48,173 @@ def get_student_frequency(student_id):
         # Buscar aluno
         student = Student.query.get_or_404(student_id)
         
-        # Buscar todas as presenças do período
-        attendances = Attendance.query.filter(
-            and_(
-                Attendance.student_id == student_id,
-                Attendance.date >= start_date,
-                Attendance.date <= end_date
+        # Resumo e série mensal agregados no banco (rollup mensal do aluno + pontas)
+        summary, monthly_chart = student_frequency_summary(student_id, start_date, end_date)
+        
+        report = {
+            'student': student.to_dict(),
+            'period': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat()
+            },
+            'summary': summary,
+            'monthly_data': monthly_chart
+        }
+        
+        if request.args.get('detail') in ('1', 'true'):
+            # Sempre paginado: um relatório de vários anos não serializa milhares de linhas de uma vez
+            args = request.args.copy()
+            args.setdefault('limit', str(DEFAULT_PAGE_SIZE))
+            query = db.session.query(Attendance).join(Class, Class.id == Attendance.class_id).filter(
+                and_(
+                    Attendance.student_id == student_id,
+                    Attendance.date >= start_date,
+                    Attendance.date <= end_date
+                )
             )
-        ).all()
+            try:
+                report['detailed_attendance'] = keyset_list(
+                    query, attendance_detail_serializer, [Attendance.date, Attendance.id], args, descending=True
+                )
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
         
-        # Calcular estatísticas
-        total_classes = len(attendances)
-        present_count = sum(1 for att in attendances if att.present)
-        absent_count = total_classes - present_count
-        frequency_rate = (present_count / total_classes * 100) if total_classes > 0 else 0
+        return jsonify(report)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/reports/class/<int:class_id>/frequency', methods=['GET'])
+@login_required
+@cached_report('attendance', 'students', 'classes', 'enrollments')
+def get_class_frequency(class_id):
+    """Frequência de todos os alunos matriculados na turma (boletim da turma)"""
+    try:
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
         
-        # Agrupar por mês para gráfico
-        monthly_data = {}
-        for attendance in attendances:
-            month_key = attendance.date.strftime('%Y-%m')
-            if month_key not in monthly_data:
-                monthly_data[month_key] = {'present': 0, 'absent': 0}
-            
-            if attendance.present:
-                monthly_data[month_key]['present'] += 1
-            else:
-                monthly_data[month_key]['absent'] += 1
+        # Se não especificado, usar últimos 30 dias
+        if not start_date or not end_date:
+            end_date = datetime.now().date()
+            start_date = end_date - timedelta(days=30)
+        else:
+            try:
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        
+        class_obj = db.session.get(Class, class_id)
+        if not class_obj:
+            return jsonify({'error': 'Class not found'}), 404
         
-        # Converter para lista ordenada
-        monthly_chart = []
-        for month, data in sorted(monthly_data.items()):
-            monthly_chart.append({
-                'month': month,
-                'present': data['present'],
-                'absent': data['absent'],
-                'total': data['present'] + data['absent']
-            })
+        students, summary, monthly_chart = class_frequency_report(class_id, start_date, end_date)
         
         return jsonify({
-            'student': student.to_dict(),
+            'class': class_obj.to_dict(),
             'period': {
                 'start_date': start_date.isoformat(),
                 'end_date': end_date.isoformat()
             },
-            'summary': {
-                'total_classes': total_classes,
-                'present_count': present_count,
-                'absent_count': absent_count,
-                'frequency_rate': round(frequency_rate, 2)
-            },
+            'summary': summary,
             'monthly_data': monthly_chart,
-            'detailed_attendance': [att.to_dict() for att in attendances]
+            'students': students
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@reports_bp.route('/reports/general-stats', methods=['GET'])
+def _number_arg(name, cast, default=None):
+    """Parâmetro numérico opcional da query string; valor inválido vira ValueError (400) em vez de ser ignorado"""
+    raw = request.args.get(name)
+    if raw is None or raw == '':
+        return default
+    try:
+        value = cast(raw)
+    except ValueError:
+        raise ValueError(f'{name} must be a number') from None
+    if not math.isfinite(value):
+        raise ValueError(f'{name} must be a number')
+    return value
+
+@reports_bp.route('/reports/at-risk', methods=['GET'])
 @login_required
-def get_general_stats():
-    """Gera estatísticas gerais do sistema"""
+@cached_report('attendance', 'students', 'classes', 'enrollments')
+def get_at_risk_students():
+    """Alunos em risco: faltas seguidas (min_absences, padrão 3) e/ou taxa recente baixa (max_rate_30, max_rate_90)"""
+    try:
+        try:
+            min_absences = _number_arg('min_absences', int, 3)
+            max_rate_30 = _number_arg('max_rate_30', float)
+            max_rate_90 = _number_arg('max_rate_90', float)
+            class_id = _number_arg('class_id', int)
+            limit = parse_limit(request.args) or DEFAULT_PAGE_SIZE
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if min_absences < 0:
+            return jsonify({'error': 'min_absences must be zero or positive'}), 400
+        
+        # Consulta indexada na tabela de sequências, sem varrer o histórico de presenças
+        return jsonify({
+            'thresholds': {
+                'min_absences': min_absences,
+                'max_rate_30': max_rate_30,
+                'max_rate_90': max_rate_90
+            },
+            'students': streaks.at_risk(min_absences, max_rate_30, max_rate_90, class_id, limit)
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+FREQUENCY_EXPORT_COLUMNS = [
+    'student_id', 'student_name', 'active', 'total_classes',
+    'present_count', 'absent_count', 'frequency_rate'
+]
+
+def frequency_export_statement(start_date, end_date):
+    """Presenças e total por aluno no período, para a exportação de frequência"""
+    return select(
+        Student.id,
+        Student.name,
+        Student.active,
+        func.count(Attendance.id),
+        present_sum(Attendance.present)
+    ).join(
+        Attendance, Attendance.student_id == Student.id
+    ).filter(
+        Attendance.date >= start_date,
+        Attendance.date <= end_date
+    ).group_by(Student.id, Student.name, Student.active).order_by(Student.id)
+
+def frequency_row(row):
+    student_id, name, active, total, present = row
+    return (student_id, name, active, total, present, total - present, frequency_rate(present, total))
+
+@job_queue.task('frequency_export')
+def frequency_export_job(params, progress):
+    """Job de /reports/frequency/export?async=1"""
+    start_date = date.fromisoformat(params['start_date'])
+    end_date = date.fromisoformat(params['end_date'])
+    return export_bytes(
+        frequency_export_statement(start_date, end_date),
+        FREQUENCY_EXPORT_COLUMNS,
+        params['format'],
+        f'frequency_{start_date.isoformat()}_{end_date.isoformat()}',
+        transform=frequency_row,
+        progress=progress
+    )
+
+@job_queue.task('general_stats')
+def general_stats_job(params, progress):
+    """Job de /reports/general-stats?async=1"""
+    stats = build_general_stats(
+        date.fromisoformat(params['start_date']), date.fromisoformat(params['end_date']), progress=progress
+    )
+    return current_app.json.dumps(stats).encode('utf-8'), 'application/json', None
+
+@reports_bp.route('/reports/frequency/export', methods=['GET'])
+@login_required
+def export_frequency():
+    """Exporta (CSV ou NDJSON, em streaming) a frequência de cada aluno no período; `async=1` gera num job"""
     try:
-        # Parâmetros de data
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
         
@@ -107,119 +229,63 @@ def get_general_stats():
             except ValueError:
                 return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
-        # Estatísticas básicas
-        total_students = Student.query.filter_by(active=True).count()
-        total_classes = Class.query.filter_by(active=True).count()
-        
-        # Presenças no período
-        attendances_period = Attendance.query.filter(
-            and_(
-                Attendance.date >= start_date,
-                Attendance.date <= end_date
+        export_format = request.args.get('format', 'csv')
+        try:
+            if async_requested():
+                validate_export_format(export_format)
+                return enqueue_response('frequency_export', {
+                    'start_date': start_date.isoformat(),
+                    'end_date': end_date.isoformat(),
+                    'format': export_format
+                }, depends_on=('attendance', 'students'))
+            
+            return export_response(
+                frequency_export_statement(start_date, end_date),
+                FREQUENCY_EXPORT_COLUMNS,
+                export_format,
+                f'frequency_{start_date.isoformat()}_{end_date.isoformat()}',
+                transform=frequency_row
             )
-        ).all()
-        
-        total_attendances = len(attendances_period)
-        present_count = sum(1 for att in attendances_period if att.present)
-        absent_count = total_attendances - present_count
-        overall_frequency = (present_count / total_attendances * 100) if total_attendances > 0 else 0
-        
-        # Distribuição por faixa etária
-        age_distribution = {
-            'children': 0,    # 0-12
-            'teens': 0,       # 13-17
-            'adults': 0,      # 18+
-            'unknown': 0      # sem data de nascimento
-        }
-        
-        students = Student.query.filter_by(active=True).all()
-        for student in students:
-            age = student.get_age()
-            if age is None:
-                age_distribution['unknown'] += 1
-            elif age <= 12:
-                age_distribution['children'] += 1
-            elif age <= 17:
-                age_distribution['teens'] += 1
-            else:
-                age_distribution['adults'] += 1
-        
-        # Top 5 alunos com melhor frequência
-        student_frequencies = []
-        for student in students:
-            student_attendances = [att for att in attendances_period if att.student_id == student.id]
-            if student_attendances:
-                student_present = sum(1 for att in student_attendances if att.present)
-                student_total = len(student_attendances)
-                frequency = (student_present / student_total * 100) if student_total > 0 else 0
-                student_frequencies.append({
-                    'student': student.to_dict(),
-                    'frequency_rate': round(frequency, 2),
-                    'total_classes': student_total,
-                    'present_count': student_present
-                })
-        
-        # Ordenar por frequência e pegar top 5
-        top_students = sorted(student_frequencies, key=lambda x: x['frequency_rate'], reverse=True)[:5]
-        
-        # Frequência por turma
-        class_frequencies = []
-        classes = Class.query.filter_by(active=True).all()
-        for class_obj in classes:
-            class_attendances = [att for att in attendances_period if att.class_id == class_obj.id]
-            if class_attendances:
-                class_present = sum(1 for att in class_attendances if att.present)
-                class_total = len(class_attendances)
-                frequency = (class_present / class_total * 100) if class_total > 0 else 0
-                class_frequencies.append({
-                    'class': class_obj.to_dict(),
-                    'frequency_rate': round(frequency, 2),
-                    'total_attendances': class_total,
-                    'present_count': class_present
-                })
-        
-        # Presenças por dia da semana
-        weekday_stats = {i: {'present': 0, 'absent': 0} for i in range(7)}
-        for attendance in attendances_period:
-            weekday = attendance.date.weekday()
-            if attendance.present:
-                weekday_stats[weekday]['present'] += 1
-            else:
-                weekday_stats[weekday]['absent'] += 1
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/reports/general-stats', methods=['GET'])
+@login_required
+@cached_report('attendance', 'students', 'classes', 'enrollments')
+def get_general_stats():
+    """Gera estatísticas gerais do sistema (`async=1` calcula num job em segundo plano)"""
+    try:
+        # Parâmetros de data
+        start_date = request.args.get('start_date')
+        end_date = request.args.get('end_date')
         
-        weekday_chart = []
-        weekday_names = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
-        for i, name in enumerate(weekday_names):
-            weekday_chart.append({
-                'day': name,
-                'present': weekday_stats[i]['present'],
-                'absent': weekday_stats[i]['absent'],
-                'total': weekday_stats[i]['present'] + weekday_stats[i]['absent']
-            })
+        # Se não especificado, usar últimos 30 dias
+        if not start_date or not end_date:
+            end_date = datetime.now().date()
+            start_date = end_date - timedelta(days=30)
+        else:
+            try:
+                start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+                end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+            except ValueError:
+                return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
         
-        return jsonify({
-            'period': {
+        if async_requested():
+            return enqueue_response('general_stats', {
                 'start_date': start_date.isoformat(),
                 'end_date': end_date.isoformat()
-            },
-            'overview': {
-                'total_students': total_students,
-                'total_classes': total_classes,
-                'total_attendances': total_attendances,
-                'present_count': present_count,
-                'absent_count': absent_count,
-                'overall_frequency': round(overall_frequency, 2)
-            },
-            'age_distribution': age_distribution,
-            'top_students': top_students,
-            'class_frequencies': class_frequencies,
-            'weekday_distribution': weekday_chart
-        })
+            }, depends_on=('attendance', 'students', 'classes', 'enrollments'))
+        
+        # Agregações feitas no banco (GROUP BY), sem carregar os registros
+        return jsonify(build_general_stats(start_date, end_date))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @reports_bp.route('/reports/dashboard-stats', methods=['GET'])
 @login_required
+@cached_report('attendance', 'students', 'classes', 'users')
 def get_dashboard_stats():
     """Estatísticas rápidas para o dashboard"""
     try:
@@ -229,17 +295,14 @@ def get_dashboard_stats():
         total_students = Student.query.filter_by(active=True).count()
         total_classes = Class.query.filter_by(active=True).count()
         
-        # Presenças de hoje
-        today_attendances = Attendance.query.filter(
-            and_(
-                Attendance.date == today,
-                Attendance.present == True
-            )
-        ).count()
+        # Presenças de hoje (rollup diário por turma)
+        today_attendances = db.session.query(
+            func.coalesce(func.sum(class_daily.c.present_count), 0)
+        ).filter(class_daily.c.date == today).scalar()
         
         # Usuários ativos (logaram nos últimos 30 dias)
-        from models.user import User
-        thirty_days_ago = datetime.now() - timedelta(days=30)
+        from models.user import ACTIVE_USER_DAYS, User
+        thirty_days_ago = datetime.now() - timedelta(days=ACTIVE_USER_DAYS)
         active_users = User.query.filter(
             and_(
                 User.active == True,
@@ -255,3 +318,12 @@ def get_dashboard_stats():
         })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+@reports_bp.route('/reports/cache-stats', methods=['GET'])
+@login_required
+def get_report_cache_stats():
+    """Estatísticas do cache de relatórios deste processo (hits, misses, evictions)"""
+    try:
+        return jsonify(report_cache.stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
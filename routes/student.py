@@ -1,18 +1,61 @@
+import io
 from flask import Blueprint, jsonify, request
 from flask_login import login_required
 from datetime import datetime
 from models.student import Student, db
-from models.class_model import StudentClass
+from models.class_model import Class, StudentClass
+from services import change_log, versions
+from services.etags import versioned_etag
+from services.pagination import keyset_list
+from services.search import DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT, search_student_ids
+from services.serializers import class_serializer, student_serializer
+from services.student_import import IMPORT_CHUNK_SIZE, StudentImport
 
 student_bp = Blueprint('student', __name__)
 
 @student_bp.route('/students', methods=['GET'])
 @login_required
+@versioned_etag('students', daily=True)
 def get_students():
-    """Get all active students"""
+    """Get active students (supports fields=, limit= and cursor=)"""
     try:
-        students = Student.query.filter_by(active=True).all()
-        return jsonify([student.to_dict() for student in students])
+        try:
+            result = keyset_list(Student.query.filter_by(active=True), student_serializer, [Student.id], request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@student_bp.route('/students/search', methods=['GET'])
+@login_required
+@versioned_etag('students', daily=True)
+def search_students():
+    """Busca alunos por nome, e-mail ou responsável (prefixo, sem acentos), ordenados por relevância"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        try:
+            limit = int(request.args.get('limit', DEFAULT_SEARCH_LIMIT))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if not 1 <= limit <= MAX_SEARCH_LIMIT:
+            return jsonify({'error': f'limit must be between 1 and {MAX_SEARCH_LIMIT}'}), 400
+        try:
+            keys = student_serializer.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        student_ids = search_student_ids(query, limit, active_only=request.args.get('include_inactive') != '1')
+        if not student_ids:
+            return jsonify([])
+        
+        rows = db.session.query(*student_serializer.columns(keys), Student.id).filter(Student.id.in_(student_ids)).all()
+        # Mantém a ordem de relevância da busca
+        position = {student_id: i for i, student_id in enumerate(student_ids)}
+        rows.sort(key=lambda row: position[row[-1]])
+        return jsonify(student_serializer.serialize_rows(rows, keys))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -50,14 +93,43 @@ def create_student():
         )
         
         db.session.add(student)
+        db.session.flush()
+        versions.bump('students')
+        change_log.record('student', student.id)
         db.session.commit()
         return jsonify(student.to_dict()), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@student_bp.route('/students/import', methods=['POST'])
+@login_required
+def import_students():
+    """Importa alunos (e matrículas, coluna classes) de um CSV enviado como arquivo `file` ou no corpo.
+
+    Com dry_run=1 só valida. Devolve os totais e os erros por linha.
+    """
+    try:
+        upload = request.files.get('file')
+        raw = upload.stream if upload else io.BufferedReader(request.stream)
+        # utf-8-sig: aceita o BOM que o Excel grava no início do CSV
+        text_stream = io.TextIOWrapper(raw, encoding='utf-8-sig', newline='')
+        try:
+            importer = StudentImport(
+                dry_run=request.args.get('dry_run') in ('1', 'true'),
+                chunk_size=request.args.get('chunk_size', IMPORT_CHUNK_SIZE, type=int)
+            )
+            return jsonify(importer.run(text_stream))
+        except (ValueError, UnicodeDecodeError) as e:
+            db.session.rollback()
+            return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @student_bp.route('/students/<int:student_id>', methods=['GET'])
 @login_required
+@versioned_etag('students', daily=True)
 def get_student(student_id):
     """Get a specific student"""
     try:
@@ -96,6 +168,8 @@ def update_student(student_id):
             except ValueError:
                 return jsonify({'error': 'Invalid birth_date format. Use YYYY-MM-DD'}), 400
         
+        versions.bump('students')
+        change_log.record('student', student.id)
         db.session.commit()
         return jsonify(student.to_dict())
     except Exception as e:
@@ -109,6 +183,8 @@ def delete_student(student_id):
     try:
         student = Student.query.get_or_404(student_id)
         student.active = False
+        versions.bump('students')
+        change_log.record('student', student.id)
         db.session.commit()
         return '', 204
     except Exception as e:
@@ -117,17 +193,28 @@ def delete_student(student_id):
 
 @student_bp.route('/students/<int:student_id>/classes', methods=['GET'])
 @login_required
+@versioned_etag('classes', 'enrollments')
 def get_student_classes(student_id):
-    """Get all classes a student is enrolled in"""
+    """Get all classes a student is enrolled in (supports fields=)"""
     try:
         student = Student.query.get_or_404(student_id)
-        student_classes = StudentClass.query.filter_by(student_id=student_id, active=True).all()
+        try:
+            keys = class_serializer.parse_fields(request.args.get('fields'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        rows = db.session.query(
+            *class_serializer.columns(keys), StudentClass.enrollment_date
+        ).join(
+            StudentClass, StudentClass.class_id == Class.id
+        ).filter(
+            StudentClass.student_id == student_id,
+            StudentClass.active == True
+        ).order_by(StudentClass.id).all()
         
-        classes_data = []
-        for sc in student_classes:
-            class_data = sc.class_obj.to_dict()
-            class_data['enrollment_date'] = sc.enrollment_date.isoformat()
-            classes_data.append(class_data)
+        classes_data = class_serializer.serialize_rows(rows, keys)
+        for class_data, row in zip(classes_data, rows):
+            class_data['enrollment_date'] = row[-1].isoformat()
         
         return jsonify(classes_data)
     except Exception as e:
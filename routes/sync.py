@@ -0,0 +1,65 @@
+from flask import Blueprint, jsonify, request
+from flask_login import login_required
+from models.attendance import Attendance
+from models.change_log import ChangeLog
+from models.class_model import Class, StudentClass
+from models.student import Student
+from models.user import db
+from services import change_log
+from services.pagination import MAX_PAGE_SIZE, decode_cursor, encode_cursor, parse_limit
+from services.serializers import attendance_serializer, class_serializer, enrollment_serializer, student_serializer
+
+sync_bp = Blueprint('sync', __name__)
+
+# entidade do change log -> (chave na resposta, modelo, serializer)
+SYNC_ENTITIES = {
+    'student': ('students', Student, student_serializer),
+    'class': ('classes', Class, class_serializer),
+    'enrollment': ('enrollments', StudentClass, enrollment_serializer),
+    'attendance': ('attendance', Attendance, attendance_serializer),
+}
+
+@sync_bp.route('/sync', methods=['GET'])
+@login_required
+def sync():
+    """Registros alterados ou removidos desde o cursor.
+
+    Sem `since` devolve só o cursor atual: o cliente pega o cursor, carrega
+    as listas completas e daí em diante pede /sync?since=<cursor>.
+    """
+    try:
+        try:
+            limit = parse_limit(request.args) or MAX_PAGE_SIZE
+            since = request.args.get('since')
+            seq = decode_cursor(since, [ChangeLog.seq])[0] if since else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        if seq is None:
+            return jsonify({'cursor': encode_cursor([change_log.current_seq()]), 'has_more': False})
+        
+        if seq < change_log.pruned_through():
+            return jsonify({'error': 'Cursor expired, full resync required'}), 410
+        
+        changes = change_log.changes_since(seq, limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        
+        payload = {
+            'cursor': encode_cursor([changes[-1].last_seq if changes else seq]),
+            'has_more': has_more
+        }
+        for entity, (key, model, serializer) in SYNC_ENTITIES.items():
+            ids = [change.entity_id for change in changes if change.entity == entity]
+            keys = list(serializer.fields)
+            rows = db.session.query(*serializer.columns(keys)).filter(model.id.in_(ids)).all() if ids else []
+            updated = serializer.serialize_rows(rows, keys)
+            found = {item['id'] for item in updated}
+            payload[key] = {
+                'updated': updated,
+                'deleted': [entity_id for entity_id in ids if entity_id not in found]
+            }
+        
+        return jsonify(payload)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
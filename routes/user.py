@@ -1,16 +1,26 @@
 from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 from models.user import User, db
+from services import versions
+from services.etags import versioned_etag
+from services.pagination import keyset_list
+from services.password_hashing import PasswordHashingBusy
+from services.serializers import user_serializer
+from services.user_cache import user_cache
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
 @login_required
+@versioned_etag('users')
 def get_users():
-    """Get all users"""
+    """Get users (supports fields=, limit= and cursor=)"""
     try:
-        users = User.query.all()
-        return jsonify([user.to_dict() for user in users])
+        try:
+            result = keyset_list(User.query, user_serializer, [User.id], request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify(result)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -41,15 +51,20 @@ def create_user():
         user.set_password(data['password'])
         
         db.session.add(user)
+        versions.bump('users')
         db.session.commit()
         
         return jsonify(user.to_dict()), 201
+    except PasswordHashingBusy:
+        # 503 pelo errorhandler de main.py
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 @login_required
+@versioned_etag('users')
 def get_user(user_id):
     """Get a specific user"""
     try:
@@ -86,8 +101,13 @@ def update_user(user_id):
         if data.get('password'):
             user.set_password(data['password'])
         
+        versions.bump('users')
         db.session.commit()
+        user_cache.invalidate(user.id)
         return jsonify(user.to_dict())
+    except PasswordHashingBusy:
+        # 503 pelo errorhandler de main.py
+        raise
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -104,7 +124,9 @@ def delete_user(user_id):
             return jsonify({'error': 'Cannot delete your own account'}), 400
         
         db.session.delete(user)
+        versions.bump('users')
         db.session.commit()
+        user_cache.invalidate(user_id)
         return '', 204
     except Exception as e:
         db.session.rollback()
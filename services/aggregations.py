@@ -0,0 +1,260 @@
+from datetime import date
+from sqlalchemy import Float, and_, case, cast, extract, func, select
+from models.user import db
+from models.student import Student
+from models.class_model import Class, StudentClass
+from models.attendance import Attendance
+from services.rollups import class_daily, class_daily_in_period, student_month_counts
+from services.sql import month_start
+
+WEEKDAY_NAMES = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+def present_sum(column):
+    """SUM de presenças (NULL conta como falta, igual ao `if att.present` antigo)"""
+    return func.coalesce(func.sum(case((column == True, 1), else_=0)), 0)
+
+def frequency_rate(present, total):
+    """Taxa de frequência em porcentagem, arredondada como nos relatórios"""
+    return round(present / total * 100, 2) if total > 0 else 0
+
+def years_before(today, years):
+    """Mesma data `years` anos antes (29/02 vira 28/02 em anos não bissextos)"""
+    try:
+        return today.replace(year=today.year - years)
+    except ValueError:
+        return today.replace(year=today.year - years, day=28)
+
+def attendance_totals(start_date, end_date):
+    """Total de registros e presenças no período (rollup diário por turma)"""
+    present, absent = db.session.query(
+        func.coalesce(func.sum(class_daily.c.present_count), 0),
+        func.coalesce(func.sum(class_daily.c.absent_count), 0)
+    ).filter(class_daily_in_period(start_date, end_date)).one()
+    return present + absent, present
+
+def age_distribution(today=None):
+    """Distribuição dos alunos ativos por faixa etária, calculada no banco"""
+    today = today or date.today()
+    # idade >= N  <=>  birth_date <= hoje - N anos
+    teen_cutoff = years_before(today, 13)
+    adult_cutoff = years_before(today, 18)
+    birth_date = Student.birth_date
+
+    unknown, children, teens, adults = db.session.query(
+        func.coalesce(func.sum(case((birth_date.is_(None), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((birth_date > teen_cutoff, 1), else_=0)), 0),
+        func.coalesce(func.sum(case((and_(birth_date <= teen_cutoff, birth_date > adult_cutoff), 1), else_=0)), 0),
+        func.coalesce(func.sum(case((birth_date <= adult_cutoff, 1), else_=0)), 0)
+    ).filter(Student.active == True).one()
+
+    return {
+        'children': children,    # 0-12
+        'teens': teens,          # 13-17
+        'adults': adults,        # 18+
+        'unknown': unknown       # sem data de nascimento
+    }
+
+def top_students(start_date, end_date, limit=5):
+    """Alunos ativos com melhor frequência no período (rollup mensal + pontas)"""
+    counts = student_month_counts(start_date, end_date)
+    present = func.sum(counts.c.present)
+    total = present + func.sum(counts.c.absent)
+    rows = db.session.query(
+        counts.c.student_id, total, present
+    ).join(
+        Student, Student.id == counts.c.student_id
+    ).filter(
+        Student.active == True
+    ).group_by(
+        counts.c.student_id
+    ).having(
+        total > 0
+    ).order_by(
+        (cast(present, Float) / total).desc(),
+        counts.c.student_id
+    ).limit(limit).all()
+
+    students = {
+        student.id: student
+        for student in Student.query.filter(Student.id.in_([row[0] for row in rows]))
+    } if rows else {}
+
+    return [{
+        'student': students[student_id].to_dict(),
+        'frequency_rate': frequency_rate(student_present, student_total),
+        'total_classes': student_total,
+        'present_count': student_present
+    } for student_id, student_total, student_present in rows]
+
+def class_frequencies(start_date, end_date):
+    """Frequência de cada turma ativa com registros no período"""
+    present = func.sum(class_daily.c.present_count)
+    total = present + func.sum(class_daily.c.absent_count)
+    rows = db.session.query(
+        Class, total, present
+    ).join(
+        class_daily, class_daily.c.class_id == Class.id
+    ).filter(
+        Class.active == True,
+        class_daily_in_period(start_date, end_date)
+    ).group_by(Class.id).having(total > 0).order_by(Class.id).all()
+
+    return [{
+        'class': class_obj.to_dict(),
+        'frequency_rate': frequency_rate(class_present, class_total),
+        'total_attendances': class_total,
+        'present_count': class_present
+    } for class_obj, class_total, class_present in rows]
+
+def weekday_distribution(start_date, end_date):
+    """Presenças e faltas por dia da semana (Segunda..Domingo)"""
+    dow = extract('dow', class_daily.c.date)
+    rows = db.session.query(
+        dow, func.sum(class_daily.c.present_count), func.sum(class_daily.c.absent_count)
+    ).filter(class_daily_in_period(start_date, end_date)).group_by(dow).all()
+
+    weekday_stats = {i: {'present': 0, 'absent': 0} for i in range(7)}
+    for day, present, absent in rows:
+        # dow do banco: 0=Domingo; weekday() do Python: 0=Segunda
+        weekday = (int(day) + 6) % 7
+        weekday_stats[weekday] = {'present': present, 'absent': absent}
+
+    return [{
+        'day': name,
+        'present': weekday_stats[i]['present'],
+        'absent': weekday_stats[i]['absent'],
+        'total': weekday_stats[i]['present'] + weekday_stats[i]['absent']
+    } for i, name in enumerate(WEEKDAY_NAMES)]
+
+def student_frequency_summary(student_id, start_date, end_date):
+    """Resumo e série mensal da frequência de um aluno (rollup mensal + pontas)"""
+    counts = student_month_counts(start_date, end_date, student_id=student_id)
+    rows = db.session.query(
+        counts.c.month, func.sum(counts.c.present), func.sum(counts.c.absent)
+    ).group_by(counts.c.month).order_by(counts.c.month).all()
+
+    monthly_chart = [{
+        'month': month.strftime('%Y-%m'),
+        'present': present,
+        'absent': absent,
+        'total': present + absent
+    } for month, present, absent in rows if present + absent > 0]
+
+    present_count = sum(month['present'] for month in monthly_chart)
+    total_classes = sum(month['total'] for month in monthly_chart)
+    summary = {
+        'total_classes': total_classes,
+        'present_count': present_count,
+        'absent_count': total_classes - present_count,
+        'frequency_rate': frequency_rate(present_count, total_classes)
+    }
+    return summary, monthly_chart
+
+def class_frequency_report(class_id, start_date, end_date):
+    """Frequência de cada aluno matriculado na turma e série mensal da turma.
+
+    Uma única consulta: presenças agrupadas por aluno e mês, com LEFT JOIN a
+    partir das matrículas ativas (alunos sem registros aparecem zerados).
+    """
+    month = month_start(Attendance.date)
+    counts = select(
+        Attendance.student_id,
+        month.label('month'),
+        present_sum(Attendance.present).label('present'),
+        func.count(Attendance.id).label('total')
+    ).where(
+        Attendance.class_id == class_id,
+        Attendance.date >= start_date,
+        Attendance.date <= end_date
+    ).group_by(Attendance.student_id, month).subquery()
+
+    rows = db.session.query(
+        Student.id, Student.name, counts.c.month, counts.c.present, counts.c.total
+    ).join(
+        StudentClass, and_(
+            StudentClass.student_id == Student.id,
+            StudentClass.class_id == class_id,
+            StudentClass.active == True
+        )
+    ).outerjoin(
+        counts, counts.c.student_id == Student.id
+    ).order_by(Student.name, Student.id, counts.c.month).all()
+
+    students = {}
+    months = {}
+    for student_id, name, month_value, present, total in rows:
+        student = students.setdefault(student_id, {'student_id': student_id, 'name': name, 'present': 0, 'total': 0})
+        if month_value is None:
+            continue
+        student['present'] += present
+        student['total'] += total
+        month_totals = months.setdefault(month_value, [0, 0])
+        month_totals[0] += present
+        month_totals[1] += total
+
+    student_rows = [{
+        'student_id': student['student_id'],
+        'name': student['name'],
+        'total_classes': student['total'],
+        'present_count': student['present'],
+        'absent_count': student['total'] - student['present'],
+        'frequency_rate': frequency_rate(student['present'], student['total'])
+    } for student in students.values()]
+
+    monthly_chart = [{
+        'month': month_value.strftime('%Y-%m'),
+        'present': present,
+        'absent': total - present,
+        'total': total,
+        'frequency_rate': frequency_rate(present, total)
+    } for month_value, (present, total) in sorted(months.items())]
+
+    present_count = sum(month['present'] for month in monthly_chart)
+    total_classes = sum(month['total'] for month in monthly_chart)
+    summary = {
+        'total_students': len(student_rows),
+        'total_classes': total_classes,
+        'present_count': present_count,
+        'absent_count': total_classes - present_count,
+        'frequency_rate': frequency_rate(present_count, total_classes)
+    }
+    return student_rows, summary, monthly_chart
+
+def build_general_stats(start_date, end_date, progress=None):
+    """Monta a resposta de /reports/general-stats com poucas consultas agregadas.
+
+    `progress(porcentagem)` é chamado entre as etapas (usado pelo job assíncrono).
+    """
+    progress = progress or (lambda value: None)
+    total_students = Student.query.filter_by(active=True).count()
+    total_classes = Class.query.filter_by(active=True).count()
+    total_attendances, present_count = attendance_totals(start_date, end_date)
+    absent_count = total_attendances - present_count
+    progress(20)
+
+    ages = age_distribution()
+    progress(35)
+    top = top_students(start_date, end_date)
+    progress(60)
+    classes = class_frequencies(start_date, end_date)
+    progress(80)
+    weekdays = weekday_distribution(start_date, end_date)
+
+    return {
+        'period': {
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat()
+        },
+        'overview': {
+            'total_students': total_students,
+            'total_classes': total_classes,
+            'total_attendances': total_attendances,
+            'present_count': present_count,
+            'absent_count': absent_count,
+            'overall_frequency': frequency_rate(present_count, total_attendances)
+        },
+        'age_distribution': ages,
+        'top_students': top,
+        'class_frequencies': classes,
+        'weekday_distribution': weekdays
+    }
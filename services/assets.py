@@ -0,0 +1,203 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import sys
+from collections import namedtuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli é opcional
+    brotli = None
+
+# Pasta (dentro de static/) gerada pelo build; não entra como fonte
+BUILD_DIRNAME = 'dist'
+MANIFEST_NAME = 'manifest.json'
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+# name: caminho lógico (ex.: app.js); fingerprinted: app.<hash>.js; variants: encoding -> bytes
+Asset = namedtuple('Asset', ['name', 'fingerprinted', 'content_type', 'etag', 'variants'])
+
+def _content_type(name):
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+def _fingerprint(name, digest):
+    root, ext = os.path.splitext(name)
+    return f'{root}.{digest[:10]}{ext}'
+
+def _compress(content, content_type):
+    """Variantes pré-comprimidas que ficam menores que o original"""
+    variants = {'identity': content}
+    if not content_type.startswith(COMPRESSIBLE_TYPES):
+        return variants
+    gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+    if len(gzipped) < len(content):
+        variants['gzip'] = gzipped
+    if brotli is not None:
+        compressed = brotli.compress(content, quality=11)
+        if len(compressed) < len(content):
+            variants['br'] = compressed
+    return variants
+
+def _sources(static_folder):
+    """Arquivos fonte: caminho relativo (com /) -> bytes"""
+    sources = {}
+    for root, dirs, files in os.walk(static_folder):
+        if os.path.abspath(root) == os.path.abspath(static_folder) and BUILD_DIRNAME in dirs:
+            dirs.remove(BUILD_DIRNAME)
+        for filename in files:
+            path = os.path.join(root, filename)
+            name = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                sources[name] = f.read()
+    return sources
+
+def _source_digest(sources):
+    digest = hashlib.sha256()
+    for name in sorted(sources):
+        digest.update(name.encode() + b'\0' + sources[name] + b'\0')
+    return digest.hexdigest()
+
+def build(static_folder):
+    """Fingerprint + compressão de todos os arquivos de static/, em memória.
+
+    Páginas HTML não ganham hash no nome (são a entrada do SPA); as
+    referências delas (src/href) a outros arquivos são trocadas pelos nomes
+    com hash. Retorna (assets por nome lógico, digest das fontes).
+    """
+    sources = _sources(static_folder)
+    fingerprinted = {
+        name: _fingerprint(name, hashlib.sha256(content).hexdigest())
+        for name, content in sources.items()
+        if not name.endswith('.html')
+    }
+
+    def rewrite(match):
+        return f'{match.group(1)}="{fingerprinted.get(match.group(2), match.group(2))}"'
+
+    assets = {}
+    for name, content in sources.items():
+        content_type = _content_type(name)
+        if name.endswith('.html'):
+            content = re.sub(r'(src|href)="([^"]+)"', rewrite, content.decode('utf-8')).encode('utf-8')
+        digest = hashlib.sha256(content).hexdigest()
+        assets[name] = Asset(
+            name=name,
+            fingerprinted=fingerprinted.get(name, name),
+            content_type=content_type,
+            etag=digest[:24],
+            variants=_compress(content, content_type)
+        )
+    return assets, _source_digest(sources)
+
+def write_build(static_folder, assets, source_digest):
+    """Grava os arquivos com hash (e .gz/.br) e o manifest em static/dist"""
+    build_dir = os.path.join(static_folder, BUILD_DIRNAME)
+    os.makedirs(build_dir, exist_ok=True)
+    suffixes = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+    manifest = {'source_digest': source_digest, 'assets': {}}
+    for asset in assets.values():
+        target = os.path.join(build_dir, *asset.fingerprinted.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        for encoding, content in asset.variants.items():
+            with open(target + suffixes[encoding], 'wb') as f:
+                f.write(content)
+        manifest['assets'][asset.name] = {
+            'file': asset.fingerprinted,
+            'content_type': asset.content_type,
+            'etag': asset.etag,
+            'encodings': sorted(asset.variants),
+        }
+    with open(os.path.join(build_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def load_build(static_folder):
+    """Assets do último build, ou None se não existe ou está desatualizado"""
+    build_dir = os.path.join(static_folder, BUILD_DIRNAME)
+    try:
+        with open(os.path.join(build_dir, MANIFEST_NAME), encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest['source_digest'] != _source_digest(_sources(static_folder)):
+            return None
+        suffixes = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+        assets = {}
+        for name, entry in manifest['assets'].items():
+            target = os.path.join(build_dir, *entry['file'].split('/'))
+            variants = {}
+            for encoding in entry['encodings']:
+                with open(target + suffixes[encoding], 'rb') as f:
+                    variants[encoding] = f.read()
+            assets[name] = Asset(name, entry['file'], entry['content_type'], entry['etag'], variants)
+        return assets
+    except (OSError, ValueError, KeyError):
+        return None
+
+class AssetStore:
+    """Manifest em memória dos arquivos estáticos, servidos sem tocar no disco.
+
+    Na inicialização carrega static/dist (gerado por `flask --app main assets
+    build`); se ele não existe ou não corresponde mais às fontes, monta tudo
+    em memória.
+    """
+
+    def __init__(self):
+        self.assets = {}
+        self._by_fingerprint = {}
+
+    def init_app(self, app):
+        static_folder = app.static_folder
+        if not static_folder or not os.path.isdir(static_folder):
+            return
+        assets = load_build(static_folder)
+        if assets is None:
+            assets, _ = build(static_folder)
+        self.assets = assets
+        self._by_fingerprint = {asset.fingerprinted: asset for asset in assets.values()}
+
+    def lookup(self, path):
+        """(asset, imutável?) para o caminho pedido; None se não é um arquivo estático"""
+        asset = self._by_fingerprint.get(path)
+        if asset is not None and asset.fingerprinted != asset.name:
+            return asset, True
+        asset = self.assets.get(path)
+        return (asset, False) if asset is not None else None
+
+    def respond(self, asset, request, response_class, immutable=False):
+        """Resposta com a melhor codificação aceita pelo cliente e cache adequado"""
+        encoding = 'identity'
+        for candidate in ('br', 'gzip'):
+            if candidate in asset.variants and request.accept_encodings[candidate]:
+                encoding = candidate
+                break
+        etag = asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}'
+
+        headers = {
+            'Cache-Control': IMMUTABLE_CACHE if immutable else REVALIDATE_CACHE,
+            'Vary': 'Accept-Encoding',
+        }
+        if request.if_none_match.contains(etag):
+            response = response_class(status=304, headers=headers)
+        else:
+            response = response_class(asset.variants[encoding], content_type=asset.content_type, headers=headers)
+            if encoding != 'identity':
+                response.headers['Content-Encoding'] = encoding
+        response.set_etag(etag)
+        return response
+
+asset_store = AssetStore()
+
+if __name__ == '__main__':
+    # python -m services.assets [static_folder]: build sem importar o app (ex.: no buildCommand do Render)
+    folder = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+    built, digest = build(folder)
+    write_build(folder, built, digest)
+    print(f'Built {len(built)} static assets into {os.path.join(folder, BUILD_DIRNAME)}')
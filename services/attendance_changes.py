@@ -0,0 +1,23 @@
+from collections import namedtuple
+from services import rollups, streaks, versions
+
+# Mudança em um registro de presença. old/new: True (presente), False (falta)
+# ou None (registro inexistente antes/depois da escrita). Rollups e sequências
+# recontam as chaves afetadas a partir de attendances, então um `old` lido
+# antes de uma escrita concorrente não desvia os totais.
+AttendanceChange = namedtuple('AttendanceChange', ['student_id', 'class_id', 'date', 'old', 'new'])
+
+def presence_state(present):
+    """Estado de um registro existente (NULL conta como falta, como nos relatórios)"""
+    return bool(present)
+
+def apply_attendance_changes(changes):
+    """Propaga as mudanças para as tabelas derivadas, na mesma transação da escrita.
+
+    Chamar depois que a escrita já está na sessão: as sequências de faltas
+    são recalculadas a partir do estado atual dos registros.
+    """
+    if changes:
+        rollups.apply_changes(changes)
+        streaks.apply_changes(changes)
+        versions.bump('attendance')
@@ -0,0 +1,66 @@
+from datetime import datetime
+from sqlalchemy import delete, func, select
+from models.change_log import ChangeLog
+from models.user import db
+from services import versions
+
+log_table = ChangeLog.__table__
+
+ENTITIES = ('student', 'class', 'enrollment', 'attendance')
+
+# pg_advisory_xact_lock: escritores do change log entram em fila até o commit,
+# então a ordem de seq é a ordem de commit e um cursor nunca pula uma linha
+# que ainda ia aparecer (no SQLite já existe um único escritor por vez)
+ADVISORY_LOCK_KEY = 7_216_555
+
+# data_versions guarda até qual seq o log já foi podado
+PRUNED_VERSION = 'change_log_pruned'
+
+def record(entity, *entity_ids):
+    """Registra alterações na transação da sessão atual (ids de linhas criadas exigem flush antes)"""
+    if entity not in ENTITIES:
+        raise ValueError(f'Unknown change log entity {entity}')
+    entity_ids = [entity_id for entity_id in entity_ids if entity_id is not None]
+    if not entity_ids:
+        return
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(select(func.pg_advisory_xact_lock(ADVISORY_LOCK_KEY)))
+    now = datetime.utcnow()
+    db.session.execute(log_table.insert(), [
+        {'entity': entity, 'entity_id': entity_id, 'changed_at': now}
+        for entity_id in entity_ids
+    ])
+
+def current_seq():
+    """Seq mais recente (com o log vazio após a poda, o último seq podado)"""
+    latest = db.session.execute(select(func.max(log_table.c.seq))).scalar()
+    return latest if latest is not None else pruned_through()
+
+def pruned_through():
+    return versions.current(PRUNED_VERSION)[0]
+
+def changes_since(seq, limit):
+    """[(entity, entity_id, último seq)] alterados depois de `seq`, na ordem do último seq.
+
+    Cada registro aparece uma vez; com mais de `limit` registros, o último seq
+    devolvido serve de cursor para a página seguinte.
+    """
+    last_seq = func.max(log_table.c.seq).label('last_seq')
+    return db.session.execute(
+        select(log_table.c.entity, log_table.c.entity_id, last_seq)
+        .where(log_table.c.seq > seq)
+        .group_by(log_table.c.entity, log_table.c.entity_id)
+        .order_by(last_seq)
+        .limit(limit)
+    ).all()
+
+def prune(before):
+    """Apaga entradas anteriores a `before`; cursores mais antigos passam a pedir resync completo"""
+    through = db.session.execute(
+        select(func.max(log_table.c.seq)).where(log_table.c.changed_at < before)
+    ).scalar()
+    if through is None:
+        return 0
+    deleted = db.session.execute(delete(log_table).where(log_table.c.seq <= through)).rowcount
+    versions.assign(PRUNED_VERSION, through)
+    return deleted
@@ -0,0 +1,119 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que mede quanto tempo cada checkout esperou por uma conexão"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_wait = 0.0
+        self.checkout_wait_max = 0.0
+        self.checkout_timeouts = 0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.checkout_wait += waited
+                self.checkout_wait_max = max(self.checkout_wait_max, waited)
+
+def engine_options(database_uri, config):
+    """SQLALCHEMY_ENGINE_OPTIONS conforme o banco (perfil PostgreSQL ou SQLite)"""
+    url = make_url(database_uri)
+
+    if url.get_backend_name() == 'postgresql':
+        options = {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+            # O Postgres do Render derruba conexões ociosas; recicla antes disso
+            'pool_recycle': config['DB_POOL_RECYCLE'],
+            'pool_pre_ping': config['DB_POOL_PRE_PING'],
+        }
+        if config['DB_STATEMENT_TIMEOUT_MS']:
+            options['connect_args'] = {'options': f'-c statement_timeout={config["DB_STATEMENT_TIMEOUT_MS"]}'}
+        return options
+
+    if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:'):
+        # Arquivo SQLite: pool por thread como o padrão do SQLAlchemy, mas instrumentado
+        return {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': config['DB_POOL_SIZE'],
+            'max_overflow': config['DB_MAX_OVERFLOW'],
+            'pool_timeout': config['DB_POOL_TIMEOUT'],
+        }
+
+    return {}
+
+def sqlite_pragmas(config):
+    """PRAGMAs aplicados em cada conexão SQLite nova"""
+    return [
+        # WAL: leitores não bloqueiam o escritor durante a chamada
+        ('journal_mode', config['SQLITE_JOURNAL_MODE']),
+        ('synchronous', config['SQLITE_SYNCHRONOUS']),
+        ('busy_timeout', config['SQLITE_BUSY_TIMEOUT_MS']),
+        # cache_size negativo = KiB
+        ('cache_size', -config['SQLITE_CACHE_SIZE_KB']),
+        ('mmap_size', config['SQLITE_MMAP_SIZE']),
+    ]
+
+def init_engine(app, engine):
+    """Registra os hooks de conexão do perfil do banco no engine já criado"""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = sqlite_pragmas(app.config)
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+
+def set_statement_timeout(conn, milliseconds):
+    """statement_timeout só para a transação atual (0 = sem limite); no SQLite não faz nada"""
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql(f'SET LOCAL statement_timeout = {int(milliseconds)}')
+
+def without_statement_timeout(conn):
+    """Desliga o statement_timeout na transação atual (migrações, rebuilds)"""
+    set_statement_timeout(conn, 0)
+
+def pool_stats(engine):
+    """Tamanho, uso e espera do pool de conexões deste processo"""
+    pool = engine.pool
+    stats = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': pool.overflow(),
+            'max_overflow': pool._max_overflow,
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        with pool._stats_lock:
+            stats.update({
+                'checkouts': pool.checkouts,
+                'checkout_wait_seconds': round(pool.checkout_wait, 6),
+                'checkout_wait_max_seconds': round(pool.checkout_wait_max, 6),
+                'checkout_timeouts': pool.checkout_timeouts,
+            })
+    return stats
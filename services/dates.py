@@ -0,0 +1,11 @@
+from datetime import date
+from flask import g, has_request_context
+
+def request_today():
+    """date.today() calculado uma vez por requisição (idades, menoridade)"""
+    if not has_request_context():
+        return date.today()
+    today = g.get('today')
+    if today is None:
+        today = g.today = date.today()
+    return today
@@ -0,0 +1,118 @@
+from datetime import datetime
+from sqlalchemy import func, or_, select, update
+from models.class_model import Class, StudentClass
+from models.student import Student
+from models.user import db
+from services import change_log, versions
+from services.sql import insert_returning_ids
+
+classes_table = Class.__table__
+enrollments_table = StudentClass.__table__
+
+def lock_class(class_id):
+    """Trava a linha da turma até o fim da transação; False se a turma não existe.
+
+    Quem matricula trava a turma antes de ler as matrículas existentes, então
+    duas matrículas simultâneas do mesmo aluno não passam ambas pela
+    verificação de "já matriculado". É um UPDATE que não muda nada (em vez de
+    SELECT ... FOR UPDATE) para travar também no SQLite.
+    """
+    return db.session.execute(
+        update(classes_table)
+        .where(classes_table.c.id == class_id)
+        .values(enrolled_count=classes_table.c.enrolled_count)
+    ).rowcount > 0
+
+def reserve_seats(class_id, requested):
+    """Reserva até `requested` vagas na turma e devolve quantas conseguiu.
+
+    O UPDATE condicional em classes.enrolled_count é atômico: duas
+    matrículas simultâneas nunca passam de max_students. Se o pedido
+    inteiro não cabe, relê o contador e tenta com as vagas que restam.
+    O contador faz parte da turma, então a turma entra no change log.
+    """
+    granted = requested
+    while granted > 0:
+        reserved = db.session.execute(
+            update(classes_table)
+            .where(
+                classes_table.c.id == class_id,
+                or_(
+                    classes_table.c.max_students == None,
+                    classes_table.c.enrolled_count + granted <= classes_table.c.max_students
+                )
+            )
+            .values(enrolled_count=classes_table.c.enrolled_count + granted)
+        ).rowcount
+        if reserved:
+            change_log.record('class', class_id)
+            return granted
+        enrolled_count, max_students = db.session.execute(
+            select(classes_table.c.enrolled_count, classes_table.c.max_students)
+            .where(classes_table.c.id == class_id)
+        ).one()
+        granted = min(requested, max_students - enrolled_count) if max_students is not None else requested
+    return 0
+
+def release_seats(class_id, count=1):
+    db.session.execute(
+        update(classes_table)
+        .where(classes_table.c.id == class_id)
+        .values(enrolled_count=classes_table.c.enrolled_count - count)
+    )
+    change_log.record('class', class_id)
+
+def enroll_students(class_id, student_ids):
+    """Matricula os alunos na turma, na transação da sessão atual (quem chama faz o commit).
+
+    Retorna um resultado por aluno, na ordem pedida: a matrícula criada ou o
+    motivo da recusa. As vagas vão para os primeiros da lista.
+    """
+    student_ids = list(dict.fromkeys(student_ids))
+    lock_class(class_id)
+    found = set(db.session.execute(select(Student.id).where(Student.id.in_(student_ids))).scalars())
+    enrolled = set(db.session.execute(
+        select(StudentClass.student_id).where(
+            StudentClass.class_id == class_id,
+            StudentClass.student_id.in_(student_ids),
+            StudentClass.active == True
+        )
+    ).scalars())
+
+    candidates = [student_id for student_id in student_ids if student_id in found and student_id not in enrolled]
+    granted = candidates[:reserve_seats(class_id, len(candidates))] if candidates else []
+
+    now = datetime.utcnow()
+    rows = [{'student_id': student_id, 'class_id': class_id, 'enrollment_date': now, 'active': True} for student_id in granted]
+    ids = insert_returning_ids(enrollments_table, rows) if rows else []
+    if ids:
+        versions.bump('enrollments')
+        change_log.record('enrollment', *ids)
+    created = {row['student_id']: dict(row, id=enrollment_id) for row, enrollment_id in zip(rows, ids)}
+
+    results = []
+    for student_id in student_ids:
+        if student_id not in found:
+            results.append({'student_id': student_id, 'error': 'Student not found'})
+        elif student_id in enrolled:
+            results.append({'student_id': student_id, 'error': 'Student already enrolled in this class'})
+        elif student_id not in created:
+            results.append({'student_id': student_id, 'error': 'Class is full'})
+        else:
+            enrollment = created[student_id]
+            results.append({'student_id': student_id, 'status': 'enrolled', 'enrollment': {
+                'id': enrollment['id'],
+                'student_id': student_id,
+                'class_id': class_id,
+                'enrollment_date': now.isoformat(),
+                'active': True
+            }})
+    return results
+
+def recount(conn):
+    """Recalcula classes.enrolled_count a partir das matrículas ativas (backfill)"""
+    active_count = select(func.count(enrollments_table.c.id)).where(
+        enrollments_table.c.class_id == classes_table.c.id,
+        enrollments_table.c.active == True
+    ).scalar_subquery()
+    conn.execute(update(classes_table).values(enrolled_count=active_count))
@@ -0,0 +1,40 @@
+import hashlib
+from functools import wraps
+from flask import current_app, request
+from services import versions
+from services.dates import request_today
+
+def _cacheable(response, etag):
+    response.set_etag(etag)
+    # O navegador guarda a resposta mas sempre revalida com If-None-Match
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+def versioned_etag(*depends_on, daily=False):
+    """ETag forte calculado só dos contadores de services.versions (e da URL).
+
+    Com If-None-Match igual, responde 304 sem executar a view nem consultar
+    as linhas; o único acesso ao banco é a leitura dos contadores. `daily`
+    inclui a data de hoje (idades e menoridade mudam com o dia).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            parts = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                versions.current(*depends_on),
+                request_today().isoformat() if daily else None
+            )
+            etag = hashlib.sha1(repr(parts).encode()).hexdigest()[:24]
+
+            if request.if_none_match.contains(etag):
+                return _cacheable(current_app.response_class(status=304), etag)
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                _cacheable(response, etag)
+            return response
+        return wrapper
+    return decorator
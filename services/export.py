@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from flask import Response, stream_with_context
+from sqlalchemy import func, select
+from models.user import db
+
+# Linhas buscadas por vez no cursor do servidor (cursor nomeado no PostgreSQL)
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+}
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _json_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+def _csv_chunks(result, columns, transform):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+
+    for partition in result.partitions():
+        buffer.seek(0)
+        buffer.truncate()
+        for row in partition:
+            writer.writerow([_csv_value(value) for value in transform(row)])
+        yield buffer.getvalue()
+
+def _ndjson_chunks(result, columns, transform):
+    for partition in result.partitions():
+        yield ''.join(
+            json.dumps(dict(zip(columns, (_json_value(value) for value in transform(row)))), ensure_ascii=False) + '\n'
+            for row in partition
+        )
+
+def _export_format(export_format):
+    """(content_type, extensão, gerador de pedaços) do formato pedido"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f'Invalid format. Use one of: {", ".join(EXPORT_FORMATS)}')
+    content_type, extension = EXPORT_FORMATS[export_format]
+    return content_type, extension, (_csv_chunks if export_format == 'csv' else _ndjson_chunks)
+
+def validate_export_format(export_format):
+    """ValueError se o formato não é suportado (checado antes de enfileirar um job)"""
+    _export_format(export_format)
+
+def export_response(statement, columns, export_format, filename, transform=tuple):
+    """Resposta em streaming (CSV ou NDJSON) lendo `statement` em lotes.
+
+    A memória usada fica constante: cada lote vira um pedaço da resposta e é
+    descartado antes de buscar o próximo.
+    """
+    content_type, extension, chunks = _export_format(export_format)
+
+    def generate():
+        result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        try:
+            yield from chunks(result, columns, transform)
+        finally:
+            result.close()
+
+    return Response(
+        stream_with_context(generate()),
+        content_type=content_type,
+        headers={'Content-Disposition': f'attachment; filename={filename}.{extension}'}
+    )
+
+def export_bytes(statement, columns, export_format, filename, transform=tuple, progress=None):
+    """Exportação completa em memória, para jobs em segundo plano: (bytes, content_type, nome do arquivo).
+
+    `progress(porcentagem)` é chamado a cada lote, com base num COUNT prévio.
+    """
+    content_type, extension, chunks = _export_format(export_format)
+    total = 0
+    if progress is not None:
+        total = db.session.execute(select(func.count()).select_from(statement.order_by(None).subquery())).scalar()
+    done = 0
+
+    def counted(row):
+        nonlocal done
+        done += 1
+        return transform(row)
+
+    output = io.BytesIO()
+    result = db.session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    try:
+        for chunk in chunks(result, columns, counted):
+            output.write(chunk.encode('utf-8'))
+            if total:
+                progress(done * 100 / total)
+    finally:
+        result.close()
+    return output.getvalue(), content_type, f'{filename}.{extension}'
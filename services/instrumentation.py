@@ -0,0 +1,193 @@
+import logging
+import threading
+import time
+from collections import Counter
+from flask import request
+from sqlalchemy import event
+from models.user import db
+
+logger = logging.getLogger(__name__)
+
+# Limites (segundos) do histograma de latência por rota
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class RequestStats:
+    """Queries e tempo de banco de uma requisição"""
+
+    __slots__ = ('started', 'queries', 'db_time', 'statements')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.statements = Counter()
+
+class RouteMetrics:
+    """Histograma de latência e totais de banco de uma rota"""
+
+    __slots__ = ('buckets', 'count', 'sum', 'queries', 'db_time', 'n_plus_one', 'statuses')
+
+    def __init__(self, bucket_count):
+        self.buckets = [0] * bucket_count
+        self.count = 0
+        self.sum = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+        self.n_plus_one = 0
+        self.statuses = Counter()
+
+class Instrumentation:
+    """Instrumentação por requisição: contagem/tempo de SQL, N+1 e latência por rota.
+
+    Os hooks do engine só somam números num objeto thread-local; agregação e
+    logs ficam para o fim da requisição, então o custo por query é mínimo.
+    As métricas são por processo (cada worker do gunicorn tem as suas).
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS, n_plus_one_threshold=5):
+        self.bucket_bounds = buckets
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.enabled = True
+        self._local = threading.local()
+        self._routes = {}
+        self._flagged = set()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config.get('METRICS_ENABLED', True)
+        self.n_plus_one_threshold = app.config.get('N_PLUS_ONE_THRESHOLD', self.n_plus_one_threshold)
+        if not self.enabled:
+            return
+
+        with app.app_context():
+            engine = db.engine
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = getattr(self._local, 'stats', None)
+        if stats is not None:
+            # No contexto da execução (e não numa pilha em conn.info): um statement que falha
+            # não deixa nada para trás na conexão do pool
+            context._instrumentation_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = getattr(self._local, 'stats', None)
+        if stats is None:
+            return
+        started = getattr(context, '_instrumentation_started', None)
+        if started is not None:
+            stats.db_time += time.perf_counter() - started
+        stats.queries += 1
+        stats.statements[statement] += 1
+
+    def _start_request(self):
+        self._local.stats = RequestStats()
+
+    def _finish_request(self, response):
+        stats = getattr(self._local, 'stats', None)
+        if stats is None:
+            return response
+        elapsed = time.perf_counter() - stats.started
+        endpoint = request.endpoint or 'unmatched'
+
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries", '
+            f'app;dur={elapsed * 1000:.1f}'
+        )
+
+        repeated = [
+            (statement, count) for statement, count in stats.statements.items()
+            if count >= self.n_plus_one_threshold
+        ]
+        self._record(endpoint, request.method, response.status_code, elapsed, stats, bool(repeated))
+        for statement, count in repeated:
+            key = (endpoint, statement)
+            if key not in self._flagged:
+                self._flagged.add(key)
+                logger.warning('Possible N+1 in %s: statement executed %d times in one request: %s',
+                               endpoint, count, ' '.join(statement.split())[:300])
+        return response
+
+    def _teardown_request(self, exc):
+        self._local.stats = None
+
+    def _record(self, endpoint, method, status, elapsed, stats, n_plus_one):
+        key = (endpoint, method)
+        with self._lock:
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = RouteMetrics(len(self.bucket_bounds))
+            for i, bound in enumerate(self.bucket_bounds):
+                if elapsed <= bound:
+                    metrics.buckets[i] += 1
+                    break
+            metrics.count += 1
+            metrics.sum += elapsed
+            metrics.queries += stats.queries
+            metrics.db_time += stats.db_time
+            metrics.n_plus_one += n_plus_one
+            metrics.statuses[status] += 1
+
+    def render_prometheus(self):
+        """Métricas no formato texto do Prometheus"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            routes = sorted(
+                (endpoint, method, metrics.count, metrics.sum, list(metrics.buckets), metrics.queries,
+                 metrics.db_time, metrics.n_plus_one, dict(metrics.statuses))
+                for (endpoint, method), metrics in self._routes.items()
+            )
+
+        family('http_request_duration_seconds', 'histogram', 'Request latency by route.')
+        for endpoint, method, count, total, buckets, *_ in routes:
+            labels = f'endpoint="{endpoint}",method="{method}"'
+            cumulative = 0
+            for bound, bucket in zip(self.bucket_bounds, buckets):
+                cumulative += bucket
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {total:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {count}')
+
+        family('http_requests_total', 'counter', 'Requests by route and status code.')
+        for endpoint, method, *_, statuses in routes:
+            for status, count in sorted(statuses.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+        family('db_queries_total', 'counter', 'SQL statements executed by route.')
+        for endpoint, method, _, _, _, queries, *_ in routes:
+            lines.append(f'db_queries_total{{endpoint="{endpoint}",method="{method}"}} {queries}')
+
+        family('db_query_duration_seconds_total', 'counter', 'Time spent in SQL statements by route.')
+        for endpoint, method, _, _, _, _, db_time, *_ in routes:
+            lines.append(f'db_query_duration_seconds_total{{endpoint="{endpoint}",method="{method}"}} {db_time:.6f}')
+
+        family('db_n_plus_one_requests_total', 'counter',
+               f'Requests that ran an identical statement {self.n_plus_one_threshold}+ times.')
+        for endpoint, method, *_, n_plus_one, _ in routes:
+            lines.append(f'db_n_plus_one_requests_total{{endpoint="{endpoint}",method="{method}"}} {n_plus_one}')
+
+        return '\n'.join(lines) + '\n'
+
+def render_gauges(prefix, stats, help_text):
+    """Valores numéricos de um dict como gauges do Prometheus (`prefix_chave`)"""
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            continue
+        name = f'{prefix}_{key}'
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {value}')
+    return '\n'.join(lines) + '\n' if lines else ''
+
+instrumentation = Instrumentation()
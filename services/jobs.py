@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import jsonify, request, url_for
+from flask_login import current_user
+from sqlalchemy import and_, delete, or_, select, update
+from werkzeug.datastructures import MultiDict
+from models.job import Job
+from models.user import db
+from services import versions
+from services.database import set_statement_timeout
+
+logger = logging.getLogger(__name__)
+
+jobs_table = Job.__table__
+
+class JobQueue:
+    """Fila de jobs na tabela `jobs`, processada por threads dentro de cada worker do gunicorn.
+
+    Relatórios pesados viram um job em vez de segurar a requisição: o
+    cliente recebe o id e consulta /api/jobs/<id>. Jobs com os mesmos
+    parâmetros e as mesmas versões dos dados reaproveitam o job existente,
+    e o resultado expira após `result_ttl` segundos. Sem broker externo:
+    qualquer processo pega o próximo job com um UPDATE condicional.
+    """
+
+    def __init__(self, workers=2, poll_interval=2.0, result_ttl=3600, timeout=900, statement_timeout_ms=900000):
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.result_ttl = result_ttl
+        self.timeout = timeout
+        self.statement_timeout_ms = statement_timeout_ms
+        self.tasks = {}
+        self.app = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._last_cleanup = 0.0
+
+    def init_app(self, app):
+        self.app = app
+        self.workers = app.config.get('JOB_WORKERS', self.workers)
+        self.poll_interval = app.config.get('JOB_POLL_INTERVAL', self.poll_interval)
+        self.result_ttl = app.config.get('JOB_RESULT_TTL', self.result_ttl)
+        self.timeout = app.config.get('JOB_TIMEOUT', self.timeout)
+        self.statement_timeout_ms = app.config.get('JOB_STATEMENT_TIMEOUT_MS', self.statement_timeout_ms)
+        if self.workers > 0:
+            # Threads não sobrevivem ao fork do gunicorn: cada processo sobe as suas na primeira requisição
+            app.before_request(self._ensure_workers)
+
+    def task(self, kind):
+        """Registra a função do job: fn(params, progress) -> (bytes, content_type, filename)"""
+        def decorator(fn):
+            self.tasks[kind] = fn
+            return fn
+        return decorator
+
+    def _ensure_workers(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True).start()
+            self._pid = os.getpid()
+
+    def enqueue(self, kind, params, depends_on=(), user_id=None):
+        """Job para (kind, params); reaproveita um igual pendente ou com resultado ainda válido"""
+        if kind not in self.tasks:
+            raise ValueError(f'Unknown job kind {kind}')
+        dedupe_key = hashlib.sha256(
+            json.dumps([kind, params, versions.current(*depends_on)], sort_keys=True, default=str).encode()
+        ).hexdigest()
+        now = datetime.utcnow()
+
+        job = Job.query.filter(
+            Job.dedupe_key == dedupe_key,
+            or_(
+                Job.status.in_(('queued', 'running')),
+                and_(Job.status == 'done', Job.expires_at > now)
+            )
+        ).order_by(Job.created_at.desc()).first()
+        if job is not None:
+            return job
+
+        job = Job(
+            id=uuid.uuid4().hex,
+            kind=kind,
+            params=json.dumps(params, sort_keys=True),
+            dedupe_key=dedupe_key,
+            status='queued',
+            progress=0,
+            created_by=user_id,
+            created_at=now
+        )
+        db.session.add(job)
+        db.session.commit()
+        self._wake.set()
+        return job
+
+    def _work(self):
+        worker = f'{socket.gethostname()}:{os.getpid()}:{threading.current_thread().name}'
+        while True:
+            try:
+                with self.app.app_context():
+                    job_id = self._claim()
+                    if job_id is not None:
+                        logger.info('Job %s started on %s', job_id, worker)
+                        self._run(job_id)
+                        continue
+                    self._cleanup()
+            except Exception:
+                logger.exception('Job worker %s failed', worker)
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+
+    def _claim(self):
+        """Marca o job mais antigo da fila como running; None se a fila está vazia"""
+        while True:
+            job_id = db.session.execute(
+                select(jobs_table.c.id)
+                .where(jobs_table.c.status == 'queued')
+                .order_by(jobs_table.c.created_at)
+                .limit(1)
+            ).scalar()
+            if job_id is None:
+                db.session.rollback()
+                return None
+            now = datetime.utcnow()
+            claimed = db.session.execute(
+                update(jobs_table)
+                .where(jobs_table.c.id == job_id, jobs_table.c.status == 'queued')
+                .values(status='running', started_at=now, heartbeat_at=now)
+            ).rowcount
+            db.session.commit()
+            if claimed:
+                return job_id
+            # Outro worker pegou o mesmo job; tenta o próximo
+
+    def _set(self, job_id, **values):
+        # Conexão própria: não interfere na transação (nem no cursor aberto) do job
+        with db.engine.begin() as conn:
+            conn.execute(update(jobs_table).where(jobs_table.c.id == job_id).values(**values))
+
+    def _progress(self, job_id):
+        last = {'value': 0, 'at': time.monotonic()}
+
+        def progress(value):
+            value = max(0, min(99, int(value)))
+            now = time.monotonic()
+            # No máximo uma gravação a cada 5 pontos ou 2 segundos
+            if value - last['value'] >= 5 or (value > last['value'] and now - last['at'] >= 2):
+                last['value'], last['at'] = value, now
+                self._set(job_id, progress=value, heartbeat_at=datetime.utcnow())
+        return progress
+
+    def _run(self, job_id):
+        job = db.session.get(Job, job_id)
+        params = MultiDict(json.loads(job.params))
+        try:
+            # O engine é o mesmo das requisições: troca o statement_timeout delas pelo dos jobs
+            set_statement_timeout(db.session.connection(), self.statement_timeout_ms)
+            body, content_type, filename = self.tasks[job.kind](params, self._progress(job_id))
+        except Exception as e:
+            db.session.rollback()
+            logger.exception('Job %s (%s) failed', job_id, job.kind)
+            now = datetime.utcnow()
+            self._set(job_id, status='failed', error=str(e), finished_at=now,
+                      expires_at=now + timedelta(seconds=self.result_ttl))
+            return
+        db.session.rollback()
+        now = datetime.utcnow()
+        self._set(job_id, status='done', progress=100, result=body, content_type=content_type,
+                  filename=filename, finished_at=now, expires_at=now + timedelta(seconds=self.result_ttl))
+
+    def _cleanup(self):
+        """Apaga resultados expirados e falha jobs cujo worker parou (sem heartbeat)"""
+        if time.monotonic() - self._last_cleanup < 60:
+            return
+        self._last_cleanup = time.monotonic()
+        now = datetime.utcnow()
+        with db.engine.begin() as conn:
+            conn.execute(delete(jobs_table).where(jobs_table.c.expires_at < now))
+            conn.execute(
+                update(jobs_table)
+                .where(
+                    jobs_table.c.status == 'running',
+                    jobs_table.c.heartbeat_at < now - timedelta(seconds=self.timeout)
+                )
+                .values(status='failed', error='Job stopped responding', finished_at=now,
+                        expires_at=now + timedelta(seconds=self.result_ttl))
+            )
+
+job_queue = JobQueue()
+
+def async_requested():
+    """`?async=1` na query string"""
+    return request.args.get('async') in ('1', 'true')
+
+def enqueue_response(kind, params, depends_on=()):
+    """202 com o job (novo ou reaproveitado) e a URL para acompanhar"""
+    job = job_queue.enqueue(kind, params, depends_on, user_id=current_user.id)
+    payload = job.to_dict()
+    payload['status_url'] = url_for('jobs.get_job', job_id=job.id)
+    return jsonify(payload), 202, {'Location': payload['status_url']}
@@ -0,0 +1,40 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON do Flask codificado com orjson quando disponível (stdlib como fallback).
+
+    A saída continua compatível com o provider padrão: chaves ordenadas e
+    date/datetime/Decimal/UUID convertidos pelo mesmo `default` do Flask.
+    A única diferença é que caracteres não ASCII saem em UTF-8 em vez de
+    escapes \\uXXXX.
+    """
+
+    ORJSON_OPTIONS = (
+        orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_APPEND_NEWLINE
+    ) if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.ORJSON_OPTIONS)[:-1].decode()
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None or self._app.debug:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        # bytes direto para a resposta, sem passar por str
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.ORJSON_OPTIONS),
+            mimetype=self.mimetype
+        )
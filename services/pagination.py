@@ -0,0 +1,85 @@
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def encode_cursor(values):
+    """Cursor opaco com os valores da chave do último item da página"""
+    values = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token, keyset):
+    """Valores da chave contidos no cursor, convertidos para o tipo de cada coluna"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(keyset):
+            raise ValueError
+        converted = []
+        for column, value in zip(keyset, values):
+            python_type = column.type.python_type
+            if python_type is date:
+                converted.append(date.fromisoformat(value))
+            elif python_type is datetime:
+                converted.append(datetime.fromisoformat(value))
+            else:
+                converted.append(python_type(value))
+        return converted
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+
+def parse_limit(args):
+    """`limit` da query string (None quando ausente)"""
+    limit = args.get('limit')
+    if limit is None:
+        return None
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise ValueError('limit must be an integer')
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'limit must be between 1 and {MAX_PAGE_SIZE}')
+    return limit
+
+def keyset_list(query, serializer, keyset, args, descending=False):
+    """Lista com projeção (fields=) e paginação por cursor (limit=, cursor=).
+
+    Sem limit/cursor devolve a lista completa, como antes. Com eles devolve
+    {'items': [...], 'next_cursor': ...}, filtrando pela chave do último item
+    em vez de OFFSET, então cada página custa o mesmo em qualquer posição.
+    """
+    keys = serializer.parse_fields(args.get('fields'))
+    limit = parse_limit(args)
+    cursor = args.get('cursor')
+
+    columns = serializer.columns(keys)
+    query = query.with_entities(*columns, *keyset)
+
+    if cursor:
+        values = decode_cursor(cursor, keyset)
+        if len(keyset) == 1:
+            bound, after = keyset[0], values[0]
+        else:
+            bound, after = tuple_(*keyset), tuple_(*values)
+        query = query.filter(bound < after if descending else bound > after)
+
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in keyset])
+
+    if limit is None and not cursor:
+        return serializer.serialize_rows(query.all(), keys)
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][len(columns):])
+
+    return {
+        'items': serializer.serialize_rows(rows, keys),
+        'next_cursor': next_cursor
+    }
@@ -0,0 +1,84 @@
+import os
+import threading
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+class PasswordHashingBusy(Exception):
+    """Nenhuma vaga de hashing liberou dentro do tempo de espera"""
+
+def _method_prefix(method):
+    """Parâmetros efetivos gravados no hash por `method` (ex.: "scrypt:32768:8:1"), sem calcular um hash.
+
+    Usa os mesmos padrões do werkzeug para as partes omitidas.
+    """
+    name, *args = (method or 'scrypt').split(':')
+    if name == 'scrypt':
+        n, r, p = map(int, args) if args else (2 ** 15, 8, 1)
+        return f'scrypt:{n}:{r}:{p}'
+    if name == 'pbkdf2':
+        hash_name = args[0] if args else 'sha256'
+        iterations = int(args[1]) if len(args) > 1 else DEFAULT_PBKDF2_ITERATIONS
+        return f'pbkdf2:{hash_name}:{iterations}'
+    raise ValueError(f'Invalid hash method {method!r}')
+
+class PasswordHasher:
+    """Hash de senhas com um limite de hashes simultâneos por processo.
+
+    No máximo `concurrency` threads de requisição calculam hashes ao mesmo
+    tempo; quem chega depois espera até `queue_timeout` segundos por uma vaga
+    e então recebe PasswordHashingBusy. O limite só tem efeito com workers de
+    várias threads (gthread, ver Procfile): assim um pico de logins ocupa no
+    máximo `concurrency` das threads de cada worker e as demais continuam
+    atendendo as outras rotas. Com workers sync (uma thread) ele não limita nada.
+    """
+
+    def __init__(self, method=None, concurrency=2, queue_timeout=10):
+        self.method = method
+        self.concurrency = concurrency
+        self.queue_timeout = queue_timeout
+        self._prefix = _method_prefix(method)
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.method = app.config.get('PASSWORD_HASH_METHOD') or None
+        self.concurrency = app.config.get('PASSWORD_HASH_CONCURRENCY', self.concurrency)
+        self.queue_timeout = app.config.get('PASSWORD_HASH_QUEUE_TIMEOUT', self.queue_timeout)
+        self._prefix = _method_prefix(self.method)
+        self._pid = None
+
+    def _ensure_slots(self):
+        # Um semáforo por processo (criado de novo depois do fork do gunicorn)
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._slots = threading.BoundedSemaphore(self.concurrency)
+            self._pid = os.getpid()
+
+    def _run(self, fn, *args):
+        self._ensure_slots()
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            raise PasswordHashingBusy('Password hashing is saturated')
+        try:
+            return fn(*args)
+        finally:
+            self._slots.release()
+
+    def _generate(self, password):
+        if self.method:
+            return generate_password_hash(password, method=self.method)
+        return generate_password_hash(password)
+
+    def hash(self, password):
+        return self._run(self._generate, password)
+
+    def verify(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True se o hash foi gerado com parâmetros diferentes dos configurados"""
+        return password_hash.split('$', 1)[0] != self._prefix
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,159 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import case, delete, select
+from models.rate_limit import RateLimitCounter
+from models.user import db
+from services.sql import upsert_insert
+
+counters = RateLimitCounter.__table__
+
+class MemoryRateLimitStore:
+    """Contadores no próprio processo, limitados a `max_keys` chaves (LRU)"""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._counters.get(key)
+
+    def hit(self, key, window, expires_at):
+        with self._lock:
+            state = self._counters.pop(key, None)
+            if state is None or state[0] < window - 1:
+                state = (window, 1, 0, expires_at)
+            elif state[0] == window - 1:
+                state = (window, 1, state[1], expires_at)
+            else:
+                state = (window, state[1] + 1, state[2], expires_at)
+            self._counters[key] = state
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+
+    def sweep(self, now):
+        with self._lock:
+            for key in [key for key, state in self._counters.items() if state[3] < now]:
+                del self._counters[key]
+
+class DatabaseRateLimitStore:
+    """Contadores na tabela rate_limit_counters, valendo para todos os workers e reinícios"""
+
+    def get(self, key):
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(counters.c.window_index, counters.c.current_count, counters.c.previous_count, counters.c.expires_at)
+                .where(counters.c.key == key)
+            ).first()
+        return tuple(row) if row else None
+
+    def hit(self, key, window, expires_at):
+        stmt = upsert_insert(counters).values(
+            key=key, window_index=window, current_count=1, previous_count=0, expires_at=expires_at
+        )
+        # Incremento atômico: o SET avalia tudo com os valores antigos da linha
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['key'],
+            set_={
+                'previous_count': case(
+                    (counters.c.window_index == stmt.excluded.window_index, counters.c.previous_count),
+                    (counters.c.window_index == stmt.excluded.window_index - 1, counters.c.current_count),
+                    else_=0
+                ),
+                'current_count': case(
+                    (counters.c.window_index == stmt.excluded.window_index, counters.c.current_count + 1),
+                    else_=1
+                ),
+                'window_index': stmt.excluded.window_index,
+                'expires_at': stmt.excluded.expires_at
+            }
+        )
+        with db.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def sweep(self, now):
+        with db.engine.begin() as conn:
+            conn.execute(delete(counters).where(counters.c.expires_at < now))
+
+STORES = {
+    'database': DatabaseRateLimitStore,
+    'memory': MemoryRateLimitStore,
+}
+
+class RateLimiter:
+    """Limite de eventos por chave com contador de janela deslizante.
+
+    Guarda só (janela, contagem atual, contagem anterior) por chave e estima
+    os eventos nos últimos `window_seconds` ponderando a janela anterior.
+    """
+
+    def __init__(self, name, limit, window_seconds):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.store = None
+        self._app = None
+        self._sweeper_pid = None
+        self._sweeper_lock = threading.Lock()
+
+    def init_app(self, app):
+        backend = app.config.get('RATE_LIMIT_BACKEND', 'database')
+        if backend not in STORES:
+            raise ValueError(f'Unknown RATE_LIMIT_BACKEND {backend}')
+        self.store = STORES[backend]()
+        self._app = app
+
+    def _key(self, key):
+        return f'{self.name}:{key}'
+
+    def is_limited(self, key, now=None):
+        """Verifica se a chave atingiu o limite (sem contar um novo evento)"""
+        self._ensure_sweeper()
+        now = now or time.time()
+        window = int(now // self.window_seconds)
+        state = self.store.get(self._key(key))
+        if state is None:
+            return False
+
+        state_window, current, previous = state[:3]
+        elapsed = (now % self.window_seconds) / self.window_seconds
+        if state_window == window:
+            estimated = previous * (1 - elapsed) + current
+        elif state_window == window - 1:
+            estimated = current * (1 - elapsed)
+        else:
+            estimated = 0
+        return estimated >= self.limit
+
+    def hit(self, key, now=None):
+        """Conta um evento para a chave"""
+        self._ensure_sweeper()
+        now = now or time.time()
+        window = int(now // self.window_seconds)
+        # Depois de duas janelas a contagem não influencia mais a estimativa
+        expires_at = (window + 2) * self.window_seconds
+        self.store.hit(self._key(key), window, expires_at)
+
+    def _ensure_sweeper(self):
+        # Um sweeper por processo (threads não sobrevivem ao fork do gunicorn)
+        if self._sweeper_pid == os.getpid():
+            return
+        with self._sweeper_lock:
+            if self._sweeper_pid == os.getpid():
+                return
+            self._sweeper_pid = os.getpid()
+            interval = self._app.config.get('RATE_LIMIT_SWEEP_INTERVAL', 300)
+            thread = threading.Thread(target=self._sweep_loop, args=(interval,), daemon=True)
+            thread.start()
+
+    def _sweep_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                with self._app.app_context():
+                    self.store.sweep(time.time())
+            except Exception as e:
+                print(f'Rate limit sweep failed: {e}')
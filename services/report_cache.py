@@ -0,0 +1,96 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from flask import current_app, request
+from services import versions
+
+class ReportCache:
+    """Cache LRU com TTL para respostas de relatórios (um por processo).
+
+    A chave inclui as versões dos dados de que o relatório depende; qualquer
+    escrita incrementa a versão, então entradas antigas nunca mais são
+    encontradas e saem pelo LRU ou pelo TTL.
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('REPORT_CACHE_SIZE', self.max_entries)
+        self.ttl = app.config.get('REPORT_CACHE_TTL', self.ttl)
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups * 100, 2) if lookups else 0
+            }
+
+report_cache = ReportCache()
+
+def cached_report(*depends_on):
+    """Cacheia a resposta JSON da view; `depends_on` são os contadores de services.versions"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            # date.today() entra na chave porque períodos padrão e idades dependem do dia
+            key = (
+                request.endpoint,
+                tuple(sorted(kwargs.items())),
+                tuple(sorted(request.args.items(multi=True))),
+                versions.current(*depends_on),
+                date.today()
+            )
+            body = report_cache.get(key)
+            if body is not None:
+                response = current_app.response_class(body, mimetype='application/json')
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code == 200 and response.mimetype == 'application/json':
+                report_cache.set(key, response.get_data())
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,166 @@
+from datetime import timedelta
+from sqlalchemy import Date, and_, case, delete, false, func, literal, or_, select, tuple_, union_all
+from models.attendance import Attendance
+from models.attendance_rollup import ClassDailyAttendance, StudentMonthlyAttendance
+from models.user import db
+from services.sql import month_start, upsert_insert
+
+class_daily = ClassDailyAttendance.__table__
+student_monthly = StudentMonthlyAttendance.__table__
+
+def _first_of_next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+_present = func.sum(case((Attendance.present == True, 1), else_=0))
+_absent = func.sum(case((Attendance.present == True, 0), else_=1))
+
+def _refresh(table, key_columns, keys, totals):
+    """Regrava as linhas `keys` do rollup com os totais recontados de attendances.
+
+    As linhas são travadas antes da contagem (upsert que não muda nada, em
+    ordem de chave): uma escrita concorrente na mesma chave espera o commit
+    desta e, no próximo comando, já enxerga os registros dela. Por isso o
+    valor gravado é sempre a contagem real, nunca um delta sobre uma
+    leitura antiga.
+    """
+    keys = sorted(keys)
+    lock = upsert_insert(table).values([
+        dict(zip(key_columns, key), present_count=0, absent_count=0) for key in keys
+    ])
+    db.session.execute(lock.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={'present_count': table.c.present_count}
+    ))
+
+    rows = [
+        dict(zip(key_columns + ['present_count', 'absent_count'], row))
+        for row in db.session.execute(totals)
+    ]
+    if rows:
+        stmt = upsert_insert(table).values(rows)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=key_columns,
+            set_={'present_count': stmt.excluded.present_count, 'absent_count': stmt.excluded.absent_count}
+        ))
+
+    # Chaves sem nenhum registro restante (presenças apagadas)
+    remaining = {tuple(row[column] for column in key_columns) for row in rows}
+    gone = [key for key in keys if key not in remaining]
+    if gone:
+        db.session.execute(delete(table).where(tuple_(*[table.c[column] for column in key_columns]).in_(gone)))
+
+def apply_changes(changes):
+    """Recalcula as linhas do rollup afetadas pelas mudanças, na transação da sessão atual.
+
+    Chamar depois que a escrita já está na sessão (como em streaks.apply_changes).
+    """
+    class_keys = {(change.class_id, change.date) for change in changes}
+    if not class_keys:
+        return
+    _refresh(class_daily, ['class_id', 'date'], class_keys, select(
+        Attendance.class_id, Attendance.date, _present, _absent
+    ).where(
+        tuple_(Attendance.class_id, Attendance.date).in_(sorted(class_keys))
+    ).group_by(Attendance.class_id, Attendance.date))
+
+    students_by_month = {}
+    for change in changes:
+        students_by_month.setdefault(change.date.replace(day=1), set()).add(change.student_id)
+    month = month_start(Attendance.date)
+    _refresh(student_monthly, ['student_id', 'month'], {
+        (student_id, first_day) for first_day, student_ids in students_by_month.items() for student_id in student_ids
+    }, select(
+        Attendance.student_id, month, _present, _absent
+    ).where(or_(*[
+        and_(
+            Attendance.student_id.in_(sorted(student_ids)),
+            Attendance.date >= first_day,
+            Attendance.date < _first_of_next_month(first_day)
+        )
+        for first_day, student_ids in sorted(students_by_month.items())
+    ])).group_by(Attendance.student_id, month))
+
+def rebuild(conn):
+    """Recalcula os rollups a partir da tabela attendances (backfill)"""
+    month = month_start(Attendance.date)
+
+    conn.execute(delete(class_daily))
+    conn.execute(class_daily.insert().from_select(
+        ['class_id', 'date', 'present_count', 'absent_count'],
+        select(Attendance.class_id, Attendance.date, _present, _absent)
+        .group_by(Attendance.class_id, Attendance.date)
+    ))
+
+    conn.execute(delete(student_monthly))
+    conn.execute(student_monthly.insert().from_select(
+        ['student_id', 'month', 'present_count', 'absent_count'],
+        select(Attendance.student_id, month, _present, _absent)
+        .group_by(Attendance.student_id, month)
+    ))
+
+def month_pieces(start_date, end_date):
+    """Divide o período em meses inteiros (lidos do rollup) e pontas parciais.
+
+    Retorna ((primeiro_mes, ultimo_mes) ou None, [(inicio, fim, mes), ...]).
+    """
+    full = []
+    partial = []
+    month = start_date.replace(day=1)
+    while month <= end_date:
+        next_month = _first_of_next_month(month)
+        month_end = next_month - timedelta(days=1)
+        if month >= start_date and month_end <= end_date:
+            full.append(month)
+        else:
+            partial.append((max(start_date, month), min(end_date, month_end), month))
+        month = next_month
+
+    return ((full[0], full[-1]) if full else None), partial
+
+def student_month_counts(start_date, end_date, student_id=None):
+    """Subquery (student_id, month, present, absent) para o período.
+
+    Meses inteiros vêm de attendance_student_monthly; os no máximo dois meses
+    parciais das pontas são agregados direto de attendances.
+    """
+    full, partial = month_pieces(start_date, end_date)
+    selects = []
+
+    if full:
+        stmt = select(
+            student_monthly.c.student_id,
+            student_monthly.c.month,
+            student_monthly.c.present_count.label('present'),
+            student_monthly.c.absent_count.label('absent')
+        ).where(student_monthly.c.month.between(*full))
+        if student_id is not None:
+            stmt = stmt.where(student_monthly.c.student_id == student_id)
+        selects.append(stmt)
+
+    for piece_start, piece_end, month in partial:
+        stmt = select(
+            Attendance.student_id,
+            literal(month, Date).label('month'),
+            func.sum(case((Attendance.present == True, 1), else_=0)).label('present'),
+            func.sum(case((Attendance.present == True, 0), else_=1)).label('absent')
+        ).where(
+            and_(Attendance.date >= piece_start, Attendance.date <= piece_end)
+        ).group_by(Attendance.student_id)
+        if student_id is not None:
+            stmt = stmt.where(Attendance.student_id == student_id)
+        selects.append(stmt)
+
+    if not selects:
+        # Período vazio (início depois do fim)
+        selects.append(select(
+            student_monthly.c.student_id,
+            student_monthly.c.month,
+            student_monthly.c.present_count.label('present'),
+            student_monthly.c.absent_count.label('absent')
+        ).where(false()))
+
+    return (selects[0] if len(selects) == 1 else union_all(*selects)).subquery()
+
+def class_daily_in_period(start_date, end_date):
+    """Filtro do rollup diário por turma para o período"""
+    return and_(class_daily.c.date >= start_date, class_daily.c.date <= end_date)
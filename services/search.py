@@ -0,0 +1,90 @@
+import re
+from sqlalchemy import text
+from models.user import db
+from models.student import Student
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+# Campos indexados para a busca (nome, e-mail e responsável)
+SEARCH_COLUMNS = ['name', 'email', 'guardian_name', 'guardian_email']
+
+# PostgreSQL: documento sem acentos e em minúsculas; o índice GIN (pg_trgm) da
+# migração 0005 é sobre exatamente esta expressão, então ela não pode mudar
+# sem uma nova migração
+PG_SEARCH_DOCUMENT = "f_unaccent(lower({}))".format(
+    " || ' ' || ".join(f"coalesce({column}, '')" for column in SEARCH_COLUMNS)
+)
+
+# SQLite: tabela FTS5 (external content) mantida por triggers em students
+SQLITE_FTS_TABLE = 'students_fts'
+
+def search_terms(query):
+    """Palavras da busca (letras e dígitos), no máximo 8"""
+    return re.findall(r'\w+', query.lower())[:8]
+
+# (url do banco, nome) -> se o objeto de busca criado pela migração 0005 existe
+_index_cache = {}
+
+def _index_available(name):
+    """Verifica uma vez por processo se a migração 0005 criou o índice de busca"""
+    key = (db.engine.url.render_as_string(), name)
+    if key not in _index_cache:
+        if db.engine.dialect.name == 'postgresql':
+            found = db.session.execute(text('SELECT to_regproc(:name) IS NOT NULL'), {'name': name}).scalar()
+        else:
+            found = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {'name': name}
+            ).first() is not None
+        _index_cache[key] = found
+    return _index_cache[key]
+
+def _sqlite_fts_ids(terms, limit, active_only):
+    # Cada palavra vira um prefixo ("joa"*); o tokenizer remove acentos dos dois lados
+    match = ' '.join(f'"{term}"*' for term in terms)
+    active = 'AND s.active' if active_only else ''
+    rows = db.session.execute(text(
+        f'SELECT s.id FROM {SQLITE_FTS_TABLE} f JOIN students s ON s.id = f.rowid '
+        f'WHERE {SQLITE_FTS_TABLE} MATCH :match {active} '
+        f'ORDER BY bm25({SQLITE_FTS_TABLE}, 10.0, 2.0, 4.0, 1.0), s.name, s.id LIMIT :limit'
+    ), {'match': match, 'limit': limit})
+    return [row[0] for row in rows]
+
+def _postgres_ids(terms, limit, active_only):
+    # \m = início de palavra; o índice trigram atende a regex e a similaridade ordena
+    conditions = ' AND '.join(
+        f"{PG_SEARCH_DOCUMENT} ~ ('\\m' || f_unaccent(:term_{i}))" for i in range(len(terms))
+    )
+    params = {f'term_{i}': term for i, term in enumerate(terms)}
+    params.update(query=' '.join(terms), limit=limit)
+    active = 'AND active' if active_only else ''
+    rows = db.session.execute(text(
+        f'SELECT id FROM students WHERE {conditions} {active} '
+        f'ORDER BY word_similarity(f_unaccent(:query), {PG_SEARCH_DOCUMENT}) DESC, name, id LIMIT :limit'
+    ), params)
+    return [row[0] for row in rows]
+
+def _fallback_ids(terms, limit, active_only):
+    # Sem índice (migração não aplicada ou extensão indisponível): LIKE simples
+    query = db.session.query(Student.id)
+    for term in terms:
+        pattern = f'%{term}%'
+        query = query.filter(db.or_(*[
+            db.func.lower(getattr(Student, column)).like(pattern) for column in SEARCH_COLUMNS
+        ]))
+    if active_only:
+        query = query.filter(Student.active == True)
+    return [row[0] for row in query.order_by(Student.name, Student.id).limit(limit)]
+
+def search_student_ids(query, limit=DEFAULT_SEARCH_LIMIT, active_only=True):
+    """IDs dos alunos que casam com a busca, do mais relevante para o menos"""
+    terms = search_terms(query)
+    if not terms:
+        return []
+
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql' and _index_available('f_unaccent'):
+        return _postgres_ids(terms, limit, active_only)
+    if dialect == 'sqlite' and _index_available(SQLITE_FTS_TABLE):
+        return _sqlite_fts_ids(terms, limit, active_only)
+    return _fallback_ids(terms, limit, active_only)
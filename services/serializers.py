@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+from models.student import Student
+from models.class_model import Class, StudentClass
+from models.attendance import Attendance
+from models.user import User
+from services.dates import request_today
+
+def uses_today(formatter):
+    """Marca formatadores que recebem também a data de hoje (calculada uma vez por requisição)"""
+    formatter.uses_today = True
+    return formatter
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+def _hour_minute(value):
+    return value.strftime('%H:%M') if value else None
+
+@uses_today
+def _age(birth_date, today):
+    if not birth_date:
+        return None
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+@uses_today
+def _is_minor(birth_date, today):
+    age = _age(birth_date, today)
+    return age is not None and age < 18
+
+def _transform(formatter):
+    """Formatador no formato (valor, hoje) -> valor; None quando o valor vai como está"""
+    if formatter is None or getattr(formatter, 'uses_today', False):
+        return formatter
+    return lambda value, today: formatter(value)
+
+# Planos compilados mantidos por serializer (LRU): fields= vem do cliente
+COMPILED_PLANS_MAX = 128
+
+class ModelSerializer:
+    """Plano chave -> coluna(s) de um modelo, para selecionar só as colunas pedidas (fields=)"""
+
+    def __init__(self, fields):
+        # fields: chave -> (coluna, formatador opcional), na ordem do to_dict()
+        self.fields = fields
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+
+    def parse_fields(self, raw):
+        """Chaves pedidas em `fields=a,b,c` (todas quando ausente)"""
+        if not raw:
+            return list(self.fields)
+        keys = [key.strip() for key in raw.split(',') if key.strip()]
+        unknown = [key for key in keys if key not in self.fields]
+        if unknown:
+            raise ValueError(f'Unknown field(s): {", ".join(unknown)}')
+        return keys
+
+    def compile(self, keys):
+        """(colunas, função tupla -> dict) para as chaves pedidas, montadas uma vez e reutilizadas.
+
+        O plano (chave, índice da coluna, formatador) é resolvido aqui, então
+        cada linha custa só os acessos por índice e os formatadores. As
+        chaves são normalizadas (sem repetição, na ordem declarada) antes de
+        consultar o cache, então a ordem pedida pelo cliente não gera planos novos.
+        """
+        requested = set(keys)
+        keys = tuple(key for key in self.fields if key in requested)
+        with self._lock:
+            compiled = self._compiled.get(keys)
+            if compiled is not None:
+                self._compiled.move_to_end(keys)
+                return compiled
+
+        columns = []
+        plan = []
+        for key in keys:
+            column, formatter = self.fields[key]
+            index = next((i for i, existing in enumerate(columns) if existing is column), None)
+            if index is None:
+                index = len(columns)
+                columns.append(column)
+            plan.append((key, index, _transform(formatter)))
+        plan = tuple(plan)
+
+        def row_to_dict(row, today):
+            return {
+                key: row[index] if transform is None else transform(row[index], today)
+                for key, index, transform in plan
+            }
+
+        compiled = (columns, row_to_dict)
+        with self._lock:
+            self._compiled[keys] = compiled
+            while len(self._compiled) > COMPILED_PLANS_MAX:
+                self._compiled.popitem(last=False)
+        return compiled
+
+    def columns(self, keys):
+        """Colunas distintas necessárias para montar as chaves pedidas"""
+        return self.compile(keys)[0]
+
+    def serialize_rows(self, rows, keys):
+        """Converte tuplas (na ordem de `columns(keys)`) em dicts"""
+        row_to_dict = self.compile(keys)[1]
+        today = request_today()
+        return [row_to_dict(row, today) for row in rows]
+
+student_serializer = ModelSerializer({
+    'id': (Student.id, None),
+    'name': (Student.name, None),
+    'birth_date': (Student.birth_date, _isoformat),
+    'age': (Student.birth_date, _age),
+    'phone': (Student.phone, None),
+    'email': (Student.email, None),
+    'address': (Student.address, None),
+    'cord_level': (Student.cord_level, None),
+    'registration_date': (Student.registration_date, _isoformat),
+    'active': (Student.active, None),
+    'is_minor': (Student.birth_date, _is_minor),
+    'guardian_name': (Student.guardian_name, None),
+    'guardian_email': (Student.guardian_email, None),
+    'guardian_phone': (Student.guardian_phone, None),
+    'guardian_cpf': (Student.guardian_cpf, None),
+    'guardian_address': (Student.guardian_address, None),
+    'guardian_relationship': (Student.guardian_relationship, None),
+})
+
+class_serializer = ModelSerializer({
+    'id': (Class.id, None),
+    'name': (Class.name, None),
+    'description': (Class.description, None),
+    'day_of_week': (Class.day_of_week, None),
+    'start_time': (Class.start_time, _hour_minute),
+    'end_time': (Class.end_time, _hour_minute),
+    'instructor': (Class.instructor, None),
+    'location': (Class.location, None),
+    'max_students': (Class.max_students, None),
+    'enrolled_count': (Class.enrolled_count, None),
+    'active': (Class.active, None),
+    'created_date': (Class.created_date, _isoformat),
+})
+
+user_serializer = ModelSerializer({
+    'id': (User.id, None),
+    'username': (User.username, None),
+    'email': (User.email, None),
+    'full_name': (User.full_name, None),
+    'role': (User.role, None),
+    'active': (User.active, None),
+    'created_at': (User.created_at, _isoformat),
+    'last_login': (User.last_login, _isoformat),
+})
+
+attendance_serializer = ModelSerializer({
+    'id': (Attendance.id, None),
+    'student_id': (Attendance.student_id, None),
+    'class_id': (Attendance.class_id, None),
+    'date': (Attendance.date, _isoformat),
+    'present': (Attendance.present, None),
+    'notes': (Attendance.notes, None),
+    'recorded_by': (Attendance.recorded_by, None),
+    'recorded_at': (Attendance.recorded_at, _isoformat),
+})
+
+# Presença com o nome da turma (JOIN com classes), para o detalhe dos relatórios
+attendance_detail_serializer = ModelSerializer({
+    **attendance_serializer.fields,
+    'class_name': (Class.name, None),
+})
+
+enrollment_serializer = ModelSerializer({
+    'id': (StudentClass.id, None),
+    'student_id': (StudentClass.student_id, None),
+    'class_id': (StudentClass.class_id, None),
+    'enrollment_date': (StudentClass.enrollment_date, _isoformat),
+    'active': (StudentClass.active, None),
+})
@@ -0,0 +1,45 @@
+from sqlalchemy import Date, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from models.user import db
+
+# Dialetos suportados pelas URLs que o main.py pode selecionar
+_INSERT_BY_DIALECT = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+def dialect_name():
+    """Nome do dialeto do engine atual (sqlite ou postgresql)"""
+    return db.engine.dialect.name
+
+def upsert_insert(table):
+    """INSERT com suporte a ON CONFLICT para o dialeto atual"""
+    name = dialect_name()
+    if name not in _INSERT_BY_DIALECT:
+        raise RuntimeError(f'ON CONFLICT upsert is not supported for dialect {name}')
+    return _INSERT_BY_DIALECT[name](table)
+
+def insert_returning_ids(table, rows):
+    """Ids gerados para `rows`, na ordem das linhas, com INSERTs em lote (insertmanyvalues)"""
+    stmt = insert(table)
+    if dialect_name() == 'sqlite':
+        # Sem sentinela implícita no SQLite, sort_by_parameter_order faria um INSERT por linha;
+        # o rowid é alocado em ordem crescente dentro de cada INSERT, então basta ordenar
+        return sorted(db.session.execute(stmt.returning(table.c.id), rows).scalars())
+    return list(db.session.execute(stmt.returning(table.c.id, sort_by_parameter_order=True), rows).scalars())
+
+class month_start(FunctionElement):
+    """Primeiro dia do mês de uma coluna de data, compilado para cada dialeto"""
+    type = Date()
+    inherit_cache = True
+    name = 'month_start'
+
+@compiles(month_start, 'sqlite')
+def _month_start_sqlite(element, compiler, **kw):
+    return "date(%s, 'start of month')" % compiler.process(element.clauses, **kw)
+
+@compiles(month_start, 'postgresql')
+def _month_start_postgresql(element, compiler, **kw):
+    return "CAST(date_trunc('month', %s) AS DATE)" % compiler.process(element.clauses, **kw)
@@ -0,0 +1,132 @@
+from datetime import date, timedelta
+from sqlalchemy import Float, and_, case, cast, delete, func, literal, or_, select, tuple_
+from models.attendance import Attendance
+from models.attendance_rollup import AttendanceStreak
+from models.class_model import Class, StudentClass
+from models.student import Student
+from models.user import db
+from services.sql import upsert_insert
+
+streaks = AttendanceStreak.__table__
+
+# Janelas (dias) das taxas de presença recentes
+RATE_WINDOWS = (30, 90)
+
+COLUMNS = [
+    'student_id', 'class_id', 'current_absences', 'last_present_date',
+    'last_attendance_date', 'rate_30', 'rate_90', 'refreshed_on'
+]
+
+def _rate(since):
+    """% de presença a partir de `since` (NULL quando não houve aula na janela)"""
+    in_window = Attendance.date >= since
+    total = func.sum(case((in_window, 1), else_=0))
+    present = func.sum(case((and_(in_window, Attendance.present == True), 1), else_=0))
+    return case((total > 0, cast(present, Float) * 100 / total), else_=None)
+
+def streak_select(today, pairs=None):
+    """SELECT com o estado de cada par (aluno, turma), opcionalmente só dos `pairs` informados.
+
+    As faltas seguidas são os registros depois da última presença, então uma
+    única passada agrupada pelo histórico do par basta (via índice por aluno).
+    """
+    pair = tuple_(Attendance.student_id, Attendance.class_id)
+    last_present = select(
+        Attendance.student_id,
+        Attendance.class_id,
+        func.max(case((Attendance.present == True, Attendance.date))).label('last_present_date')
+    ).group_by(Attendance.student_id, Attendance.class_id)
+    if pairs is not None:
+        last_present = last_present.where(pair.in_(pairs))
+    last_present = last_present.subquery()
+
+    stmt = select(
+        Attendance.student_id,
+        Attendance.class_id,
+        func.sum(case((
+            or_(last_present.c.last_present_date == None, Attendance.date > last_present.c.last_present_date), 1
+        ), else_=0)),
+        last_present.c.last_present_date,
+        func.max(Attendance.date),
+        *[_rate(today - timedelta(days=days - 1)) for days in RATE_WINDOWS],
+        literal(today, Attendance.date.type)
+    ).join(
+        last_present, and_(
+            last_present.c.student_id == Attendance.student_id,
+            last_present.c.class_id == Attendance.class_id
+        )
+    ).group_by(Attendance.student_id, Attendance.class_id, last_present.c.last_present_date)
+    if pairs is not None:
+        stmt = stmt.where(pair.in_(pairs))
+    return stmt
+
+def apply_changes(changes):
+    """Recalcula o estado dos pares (aluno, turma) afetados, na transação da sessão atual"""
+    pairs = sorted({(change.student_id, change.class_id) for change in changes})
+    if not pairs:
+        return
+
+    rows = [dict(zip(COLUMNS, row)) for row in db.session.execute(streak_select(date.today(), pairs))]
+    if rows:
+        stmt = upsert_insert(streaks).values(rows)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=['student_id', 'class_id'],
+            set_={name: stmt.excluded[name] for name in COLUMNS[2:]}
+        ))
+
+    # Pares sem nenhum registro restante (presenças apagadas)
+    remaining = {(row['student_id'], row['class_id']) for row in rows}
+    gone = [pair for pair in pairs if pair not in remaining]
+    if gone:
+        db.session.execute(delete(streaks).where(tuple_(streaks.c.student_id, streaks.c.class_id).in_(gone)))
+
+def rebuild(conn, today=None):
+    """Recalcula todos os pares a partir da tabela attendances (backfill e atualização diária das janelas)"""
+    conn.execute(delete(streaks))
+    conn.execute(streaks.insert().from_select(COLUMNS, streak_select(today or date.today())))
+
+def _round(rate):
+    return round(rate, 2) if rate is not None else None
+
+def at_risk(min_absences=0, max_rate_30=None, max_rate_90=None, class_id=None, limit=100):
+    """Matrículas ativas cujo estado passa dos limites (todos os filtros combinados com AND)"""
+    query = db.session.query(
+        streaks, Student.name.label('student_name'), Class.name.label('class_name')
+    ).join(
+        Student, Student.id == streaks.c.student_id
+    ).join(
+        Class, Class.id == streaks.c.class_id
+    ).join(
+        StudentClass, and_(
+            StudentClass.student_id == streaks.c.student_id,
+            StudentClass.class_id == streaks.c.class_id,
+            StudentClass.active == True
+        )
+    ).filter(Student.active == True, Class.active == True)
+
+    if min_absences:
+        query = query.filter(streaks.c.current_absences >= min_absences)
+    if max_rate_30 is not None:
+        query = query.filter(streaks.c.rate_30 <= max_rate_30)
+    if max_rate_90 is not None:
+        query = query.filter(streaks.c.rate_90 <= max_rate_90)
+    if class_id is not None:
+        query = query.filter(streaks.c.class_id == class_id)
+
+    rows = query.order_by(
+        streaks.c.current_absences.desc(), streaks.c.last_attendance_date.desc(),
+        streaks.c.student_id, streaks.c.class_id
+    ).limit(limit).all()
+
+    return [{
+        'student_id': row.student_id,
+        'student_name': row.student_name,
+        'class_id': row.class_id,
+        'class_name': row.class_name,
+        'consecutive_absences': row.current_absences,
+        'last_present_date': row.last_present_date.isoformat() if row.last_present_date else None,
+        'last_attendance_date': row.last_attendance_date.isoformat(),
+        'rate_30': _round(row.rate_30),
+        'rate_90': _round(row.rate_90),
+        'refreshed_on': row.refreshed_on.isoformat()
+    } for row in rows]
@@ -0,0 +1,276 @@
+import csv
+import itertools
+from datetime import datetime
+from sqlalchemy import func, or_, select
+from models.class_model import Class, StudentClass
+from models.student import Student
+from models.user import db
+from services import change_log, versions
+from services.enrollments import lock_class, reserve_seats
+from services.sql import insert_returning_ids
+
+students_table = Student.__table__
+enrollments_table = StudentClass.__table__
+
+STUDENT_COLUMNS = [
+    'name', 'birth_date', 'phone', 'email', 'address', 'cord_level',
+    'guardian_name', 'guardian_email', 'guardian_phone', 'guardian_cpf',
+    'guardian_address', 'guardian_relationship'
+]
+# Turmas do aluno: ids ou nomes separados por | ou ;
+CLASSES_COLUMN = 'classes'
+
+# Linhas validadas e gravadas por transação (o máximo limita os IN da busca por duplicados)
+IMPORT_CHUNK_SIZE = 500
+MAX_IMPORT_CHUNK_SIZE = 5000
+
+BIRTH_DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y')
+
+def _reader(text_stream):
+    """(colunas normalizadas, csv.reader das linhas); o separador (, ; ou tab) é detectado no cabeçalho"""
+    header = text_stream.readline()
+    if not header.strip():
+        raise ValueError('CSV is empty')
+    try:
+        dialect = csv.Sniffer().sniff(header, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    reader = csv.reader(itertools.chain([header], text_stream), dialect)
+    fields = [name.strip().lower() for name in next(reader)]
+    if 'name' not in fields:
+        raise ValueError('CSV must have a name column')
+    return fields, reader
+
+def _parse_birth_date(value):
+    for date_format in BIRTH_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise ValueError('birth_date must be YYYY-MM-DD or DD/MM/YYYY')
+
+def _validate(record, classes_by_key):
+    """(valores do aluno, ids das turmas, erros) de uma linha"""
+    values = {}
+    errors = []
+    for column in STUDENT_COLUMNS:
+        value = (record.get(column) or '').strip() or None
+        length = getattr(students_table.c[column].type, 'length', None)
+        if value is not None and length and len(value) > length:
+            errors.append(f'{column} is longer than {length} characters')
+        values[column] = value
+
+    if not values['name']:
+        errors.append('name is required')
+    if values['birth_date']:
+        try:
+            values['birth_date'] = _parse_birth_date(values['birth_date'])
+        except ValueError as e:
+            errors.append(str(e))
+    for column in ('email', 'guardian_email'):
+        if values[column] and '@' not in values[column]:
+            errors.append(f'{column} is not a valid e-mail')
+
+    class_ids = []
+    for key in (record.get(CLASSES_COLUMN) or '').replace(';', '|').split('|'):
+        key = key.strip()
+        if not key:
+            continue
+        class_id = classes_by_key.get(key.lower())
+        if class_id is None:
+            errors.append(f'Class not found: {key}')
+        elif class_id not in class_ids:
+            class_ids.append(class_id)
+    return values, class_ids, errors
+
+class StudentImport:
+    """Importação de alunos e matrículas a partir de um CSV, em lotes.
+
+    Cada lote é validado, comparado com os alunos existentes (e-mail sem
+    diferenciar maiúsculas ou telefone, pelos índices da migração 0007) e
+    gravado com um INSERT em lote numa transação própria. Linhas inválidas
+    entram no relatório de erros sem impedir as demais; matrículas em turmas
+    lotadas são listadas à parte (a linha em si foi importada).
+    """
+
+    def __init__(self, dry_run=False, chunk_size=IMPORT_CHUNK_SIZE):
+        if not 1 <= chunk_size <= MAX_IMPORT_CHUNK_SIZE:
+            raise ValueError(f'chunk_size must be between 1 and {MAX_IMPORT_CHUNK_SIZE}')
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.rows = 0
+        self.created = 0
+        self.existing = 0
+        self.enrollments = 0
+        self.errors = []
+        # Matrículas recusadas por falta de vaga (o aluno da linha é gravado normalmente)
+        self.refused = []
+        # e-mail/telefone -> id do aluno já visto neste arquivo (ids negativos no dry run)
+        self._seen = {}
+        # (aluno, turma) matriculados por esta importação
+        self._enrolled = set()
+        self._next_dry_run_id = -1
+
+    def run(self, text_stream):
+        fields, reader = _reader(text_stream)
+        classes = db.session.execute(
+            select(Class.id, Class.name, Class.max_students, Class.enrolled_count).where(Class.active == True)
+        ).all()
+        classes_by_key = {}
+        for class_id, name, _max_students, _enrolled_count in classes:
+            classes_by_key[str(class_id)] = class_id
+            classes_by_key.setdefault(name.strip().lower(), class_id)
+
+        # Vagas restantes por turma no dry run (None = sem limite); na importação real vêm de reserve_seats
+        self._remaining = {
+            class_id: (max_students - enrolled_count if max_students is not None else None)
+            for class_id, _name, max_students, enrolled_count in classes
+        }
+
+        # Linha 1 é o cabeçalho
+        lines = ((line, dict(zip(fields, values))) for line, values in enumerate(reader, start=2) if any(values))
+        while True:
+            chunk = list(itertools.islice(lines, self.chunk_size))
+            if not chunk:
+                break
+            self._import_chunk(chunk, classes_by_key)
+        return self.report()
+
+    def _dedupe_keys(self, values):
+        keys = []
+        if values['email']:
+            keys.append(('email', values['email'].lower()))
+        if values['phone']:
+            keys.append(('phone', values['phone']))
+        return keys
+
+    def _import_chunk(self, chunk, classes_by_key):
+        self.rows += len(chunk)
+        valid = []
+        for line, record in chunk:
+            values, class_ids, errors = _validate(record, classes_by_key)
+            if errors:
+                self.errors.append({'line': line, 'errors': errors})
+            else:
+                valid.append((line, values, class_ids))
+
+        # Alunos já cadastrados com o mesmo e-mail ou telefone (uma consulta por lote)
+        emails = {values['email'].lower() for _, values, _ in valid if values['email']}
+        phones = {values['phone'] for _, values, _ in valid if values['phone']}
+        if emails or phones:
+            for student_id, email, phone in db.session.execute(
+                select(Student.id, func.lower(Student.email), Student.phone).where(or_(
+                    func.lower(Student.email).in_(emails), Student.phone.in_(phones)
+                ))
+            ):
+                if email in emails:
+                    self._seen.setdefault(('email', email), student_id)
+                if phone in phones:
+                    self._seen.setdefault(('phone', phone), student_id)
+
+        # Resolve cada linha para um aluno existente ou para um novo (índice em new_rows)
+        new_rows = []
+        resolved = []
+        pending = []
+        for line, values, class_ids in valid:
+            keys = self._dedupe_keys(values)
+            student = next((self._seen[key] for key in keys if key in self._seen), None)
+            if student is None:
+                student = ('new', len(new_rows))
+                new_rows.append(values)
+                self.created += 1
+            else:
+                self.existing += 1
+            for key in keys:
+                if key not in self._seen:
+                    self._seen[key] = student
+                    pending.append(key)
+            resolved.append((line, student, class_ids))
+
+        new_ids = self._insert_students(new_rows)
+        for key in pending:
+            if isinstance(self._seen[key], tuple):
+                self._seen[key] = new_ids[self._seen[key][1]]
+
+        pairs = [
+            (line, new_ids[student[1]] if isinstance(student, tuple) else student, class_ids)
+            for line, student, class_ids in resolved
+        ]
+        enrollment_ids = self._enroll(pairs)
+
+        if self.dry_run:
+            db.session.rollback()
+            return
+        if new_ids:
+            versions.bump('students')
+            change_log.record('student', *new_ids)
+        if enrollment_ids:
+            versions.bump('enrollments')
+            change_log.record('enrollment', *enrollment_ids)
+        db.session.commit()
+
+    def _insert_students(self, rows):
+        if not rows:
+            return []
+        if self.dry_run:
+            ids = list(range(self._next_dry_run_id, self._next_dry_run_id - len(rows), -1))
+            self._next_dry_run_id -= len(rows)
+            return ids
+        return insert_returning_ids(students_table, rows)
+
+    def _enroll(self, pairs):
+        """Matricula os alunos nas turmas da linha, pulando matrículas ativas e turmas lotadas"""
+        student_ids = {student_id for _, student_id, class_ids in pairs if class_ids and student_id > 0}
+        if not self.dry_run:
+            # Turmas travadas (em ordem de id) antes de ler as matrículas ativas, como em enroll_students
+            for class_id in sorted({class_id for _, _, class_ids in pairs for class_id in class_ids}):
+                lock_class(class_id)
+        active = set()
+        if student_ids:
+            active = set(db.session.execute(
+                select(StudentClass.student_id, StudentClass.class_id)
+                .where(StudentClass.student_id.in_(student_ids), StudentClass.active == True)
+            ).all())
+
+        requested = {}
+        for line, student_id, class_ids in pairs:
+            for class_id in class_ids:
+                if (student_id, class_id) in active or (student_id, class_id) in self._enrolled:
+                    continue
+                self._enrolled.add((student_id, class_id))
+                requested.setdefault(class_id, []).append((line, student_id))
+
+        # Vagas reservadas por turma com o UPDATE condicional; as linhas que sobram recebem erro
+        rows = []
+        for class_id, requests in requested.items():
+            granted = self._reserve(class_id, len(requests))
+            for line, student_id in requests[:granted]:
+                rows.append({'student_id': student_id, 'class_id': class_id})
+            for line, student_id in requests[granted:]:
+                self.refused.append({'line': line, 'class_id': class_id, 'error': 'Class is full'})
+
+        self.enrollments += len(rows)
+        if not rows or self.dry_run:
+            return []
+        return insert_returning_ids(enrollments_table, rows)
+
+    def _reserve(self, class_id, requested):
+        if not self.dry_run:
+            return reserve_seats(class_id, requested)
+        remaining = self._remaining[class_id]
+        granted = requested if remaining is None else max(0, min(requested, remaining))
+        if remaining is not None:
+            self._remaining[class_id] = remaining - granted
+        return granted
+
+    def report(self):
+        return {
+            'dry_run': self.dry_run,
+            'rows': self.rows,
+            'created': self.created,
+            'existing': self.existing,
+            'enrollments': self.enrollments,
+            'rows_with_errors': len({error['line'] for error in self.errors}),
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+            'enrollments_refused': sorted(self.refused, key=lambda refusal: (refusal['line'], refusal['class_id']))
+        }
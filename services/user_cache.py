@@ -0,0 +1,75 @@
+import threading
+import time
+from collections import OrderedDict
+from flask_login import UserMixin
+from models.user import User
+
+class UserSnapshot(UserMixin):
+    """Cópia somente leitura de um User, desacoplada da sessão do SQLAlchemy.
+
+    É o que `current_user` passa a ser nas requisições autenticadas; quem
+    precisa alterar o usuário carrega o User de verdade pelo id.
+    """
+
+    __slots__ = ('id', 'username', 'email', 'full_name', 'role', 'active', 'created_at', 'last_login')
+
+    def __init__(self, user):
+        for name in self.__slots__:
+            setattr(self, name, getattr(user, name))
+
+    @property
+    def is_active(self):
+        return bool(self.active)
+
+    def to_dict(self):
+        return User.to_dict(self)
+
+    def __repr__(self):
+        return f'<UserSnapshot {self.username}>'
+
+class UserCache:
+    """Cache LRU com TTL de snapshots de usuários para o user_loader (um por processo).
+
+    Escritas em usuários invalidam a entrada neste processo na hora; nos
+    outros workers a entrada expira pelo TTL, que limita por quanto tempo um
+    usuário desativado ainda é aceito.
+    """
+
+    def __init__(self, max_entries=1024, ttl=60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_entries = app.config.get('USER_CACHE_SIZE', self.max_entries)
+        self.ttl = app.config.get('USER_CACHE_TTL', self.ttl)
+
+    def load(self, user_id):
+        """Snapshot do usuário ativo `user_id` (None se não existe ou está inativo)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] >= now:
+                self._entries.move_to_end(user_id)
+                return entry[1]
+
+        user = User.query.get(user_id)
+        snapshot = UserSnapshot(user) if user is not None and user.active else None
+
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+user_cache = UserCache()
@@ -0,0 +1,31 @@
+from sqlalchemy import select
+from models.data_version import DataVersion
+from models.user import db
+from services.sql import upsert_insert
+
+data_versions = DataVersion.__table__
+
+def bump(*names):
+    """Incrementa os contadores na transação da sessão atual (desfeito junto em rollback)"""
+    stmt = upsert_insert(data_versions).values([{'name': name, 'version': 1} for name in names])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': data_versions.c.version + 1}
+    )
+    db.session.execute(stmt)
+
+def assign(name, version):
+    """Define um contador diretamente (ex.: até onde o change log foi podado)"""
+    stmt = upsert_insert(data_versions).values(name=name, version=version)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['name'],
+        set_={'version': stmt.excluded.version}
+    )
+    db.session.execute(stmt)
+
+def current(*names):
+    """Versões atuais dos conjuntos pedidos, na ordem pedida (0 quando nunca alterado)"""
+    rows = dict(db.session.execute(
+        select(data_versions.c.name, data_versions.c.version).where(data_versions.c.name.in_(names))
+    ).all())
+    return tuple(rows.get(name, 0) for name in names)
@@ -0,0 +1,45 @@
+import os
+import sys
+import tempfile
+from datetime import time
+
+import pytest
+
+# Banco SQLite temporário e sem threads de job: precisa vir antes de importar o app
+_db_dir = tempfile.mkdtemp()
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'test.db')
+os.environ['JOB_WORKERS'] = '0'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from main import app
+from models.class_model import Class, StudentClass
+from models.student import Student
+from models.user import db
+
+def login(test_client):
+    response = test_client.post('/api/auth/login', json={'username': 'admin', 'password': 'admin123'})
+    assert response.status_code == 200
+    return test_client
+
+@pytest.fixture
+def client():
+    return login(app.test_client())
+
+def make_class(name, max_students=None, enrolled=()):
+    """Turma nova (com as matrículas `enrolled` e o contador coerente); devolve o id"""
+    with app.app_context():
+        class_obj = Class(name=name, day_of_week=0, start_time=time(18), end_time=time(19),
+                          max_students=max_students, enrolled_count=len(enrolled))
+        db.session.add(class_obj)
+        db.session.flush()
+        db.session.add_all(StudentClass(student_id=student_id, class_id=class_obj.id) for student_id in enrolled)
+        db.session.commit()
+        return class_obj.id
+
+def make_students(count, **values):
+    """Alunos novos; devolve os ids"""
+    with app.app_context():
+        students = [Student(name=f'Aluno {i}', **values) for i in range(count)]
+        db.session.add_all(students)
+        db.session.commit()
+        return [student.id for student in students]
@@ -0,0 +1,94 @@
+from datetime import date
+
+import pytest
+
+from conftest import app, make_class, make_students
+from models.attendance import Attendance
+from models.attendance_rollup import ClassDailyAttendance, StudentMonthlyAttendance
+from models.user import db
+from services import rollups
+from services.attendance_changes import AttendanceChange, apply_attendance_changes
+
+DAY = date(2024, 3, 4)
+OTHER_DAY = date(2024, 3, 11)
+
+@pytest.fixture
+def roster():
+    """Turma com três alunos matriculados: (class_id, [student_ids])"""
+    student_ids = make_students(3)
+    return make_class('Rollups', enrolled=student_ids), student_ids
+
+def _rollup_rows():
+    return (
+        sorted((row.class_id, row.date, row.present_count, row.absent_count)
+               for row in ClassDailyAttendance.query),
+        sorted((row.student_id, row.month, row.present_count, row.absent_count)
+               for row in StudentMonthlyAttendance.query)
+    )
+
+def assert_rollups_match_rebuild():
+    with app.app_context():
+        maintained = _rollup_rows()
+        with db.engine.begin() as conn:
+            rollups.rebuild(conn)
+        db.session.expire_all()
+        assert _rollup_rows() == maintained
+
+def test_create_update_delete(client, roster):
+    class_id, (first, second, _) = roster
+    payload = {'student_id': first, 'class_id': class_id, 'date': DAY.isoformat(), 'present': True}
+
+    response = client.post('/api/attendance', json=payload)
+    assert response.status_code == 201
+    attendance_id = response.json['id']
+    assert_rollups_match_rebuild()
+
+    # Mesmo aluno e dia de novo: atualiza o registro existente
+    assert client.post('/api/attendance', json=dict(payload, present=False)).status_code == 200
+    assert_rollups_match_rebuild()
+
+    assert client.put(f'/api/attendance/{attendance_id}', json={'present': True}).status_code == 200
+    response = client.post('/api/attendance', json=dict(payload, student_id=second, date=OTHER_DAY.isoformat()))
+    assert response.status_code == 201
+    assert_rollups_match_rebuild()
+
+    assert client.delete(f'/api/attendance/{attendance_id}').status_code == 204
+    assert_rollups_match_rebuild()
+    with app.app_context():
+        assert db.session.get(ClassDailyAttendance, (class_id, DAY)) is None
+
+def test_repeated_bulk_submission(client, roster):
+    class_id, student_ids = roster
+    payload = {
+        'class_id': class_id,
+        'date': DAY.isoformat(),
+        'students': [{'student_id': student_id, 'present': index != 1} for index, student_id in enumerate(student_ids)]
+    }
+
+    for _ in range(2):
+        assert client.post('/api/attendance/bulk', json=payload).status_code == 200
+        assert_rollups_match_rebuild()
+
+    payload['students'][0]['present'] = False
+    assert client.post('/api/attendance/bulk', json=payload).status_code == 200
+    assert_rollups_match_rebuild()
+    with app.app_context():
+        row = db.session.get(ClassDailyAttendance, (class_id, DAY))
+        assert (row.present_count, row.absent_count) == (1, 2)
+
+def test_stale_previous_state_does_not_double_count(roster):
+    """Duas submissões concorrentes que leram "sem registro" propagam a mesma mudança duas vezes"""
+    class_id, (student_id, _, _) = roster
+    change = AttendanceChange(student_id, class_id, DAY, None, True)
+    with app.app_context():
+        db.session.add(Attendance(student_id=student_id, class_id=class_id, date=DAY, present=True))
+        db.session.flush()
+        apply_attendance_changes([change])
+        db.session.commit()
+
+        apply_attendance_changes([change])
+        db.session.commit()
+
+        row = db.session.get(StudentMonthlyAttendance, (student_id, DAY.replace(day=1)))
+        assert (row.present_count, row.absent_count) == (1, 0)
+    assert_rollups_match_rebuild()
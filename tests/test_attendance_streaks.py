@@ -0,0 +1,112 @@
+from datetime import date, timedelta
+
+import pytest
+
+from conftest import app, make_class, make_students
+from models.attendance_rollup import AttendanceStreak
+from models.user import db
+from services import streaks
+
+TODAY = date.today()
+
+@pytest.fixture
+def roster():
+    """Turma com dois alunos matriculados: (class_id, [student_ids])"""
+    student_ids = make_students(2)
+    return make_class('Sequências', enrolled=student_ids), student_ids
+
+def _streak_rows():
+    return sorted(
+        (row.student_id, row.class_id, row.current_absences, row.last_present_date, row.last_attendance_date,
+         None if row.rate_30 is None else round(row.rate_30, 6),
+         None if row.rate_90 is None else round(row.rate_90, 6), row.refreshed_on)
+        for row in AttendanceStreak.query
+    )
+
+def assert_streaks_match_rebuild():
+    with app.app_context():
+        maintained = _streak_rows()
+        with db.engine.begin() as conn:
+            streaks.rebuild(conn, TODAY)
+        db.session.expire_all()
+        assert _streak_rows() == maintained
+
+def _streak(student_id, class_id):
+    with app.app_context():
+        return db.session.get(AttendanceStreak, (student_id, class_id))
+
+def _record(client, class_id, student_id, days_ago, present):
+    response = client.post('/api/attendance', json={
+        'student_id': student_id, 'class_id': class_id,
+        'date': (TODAY - timedelta(days=days_ago)).isoformat(), 'present': present
+    })
+    assert response.status_code in (200, 201)
+    return response.json['id']
+
+def test_absences_since_last_presence(client, roster):
+    class_id, (student_id, _) = roster
+    present_id = _record(client, class_id, student_id, 20, True)
+    for days_ago in (13, 6):
+        _record(client, class_id, student_id, days_ago, False)
+    assert_streaks_match_rebuild()
+    streak = _streak(student_id, class_id)
+    assert (streak.current_absences, streak.last_present_date) == (2, TODAY - timedelta(days=20))
+
+    # Presença mais antiga que as faltas não zera a sequência; uma mais nova zera
+    _record(client, class_id, student_id, 27, True)
+    assert _streak(student_id, class_id).current_absences == 2
+    last_id = _record(client, class_id, student_id, 0, True)
+    assert _streak(student_id, class_id).current_absences == 0
+    assert_streaks_match_rebuild()
+
+    # Apagar a presença de hoje devolve as faltas; trocar a falta por presença encurta a sequência
+    assert client.delete(f'/api/attendance/{last_id}').status_code == 204
+    assert _streak(student_id, class_id).current_absences == 2
+    _record(client, class_id, student_id, 13, True)
+    assert _streak(student_id, class_id).current_absences == 1
+    assert_streaks_match_rebuild()
+
+    assert client.put(f'/api/attendance/{present_id}', json={'present': False}).status_code == 200
+    assert_streaks_match_rebuild()
+
+def test_bulk_and_removed_pairs(client, roster):
+    class_id, student_ids = roster
+    for days_ago in (14, 7, 0):
+        response = client.post('/api/attendance/bulk', json={
+            'class_id': class_id,
+            'date': (TODAY - timedelta(days=days_ago)).isoformat(),
+            'students': [{'student_id': student_ids[0], 'present': False},
+                         {'student_id': student_ids[1], 'present': days_ago != 0}]
+        })
+        assert response.status_code == 200
+    assert_streaks_match_rebuild()
+    assert _streak(student_ids[0], class_id).current_absences == 3
+    assert _streak(student_ids[0], class_id).rate_30 == 0
+    assert _streak(student_ids[1], class_id).current_absences == 1
+
+    # Sem nenhum registro restante o par sai da tabela
+    response = client.get(f'/api/attendance?student_id={student_ids[1]}&class_id={class_id}')
+    for attendance in response.json:
+        assert client.delete(f"/api/attendance/{attendance['id']}").status_code == 204
+    assert _streak(student_ids[1], class_id) is None
+    assert_streaks_match_rebuild()
+
+def test_at_risk_report(client, roster):
+    class_id, (student_id, other_id) = roster
+    for days_ago in (21, 14, 7):
+        _record(client, class_id, student_id, days_ago, False)
+    _record(client, class_id, other_id, 7, True)
+
+    response = client.get(f'/api/reports/at-risk?class_id={class_id}')
+    assert response.status_code == 200
+    assert [row['student_id'] for row in response.json['students']] == [student_id]
+
+    response = client.get(f'/api/reports/at-risk?class_id={class_id}&min_absences=0&max_rate_30=50')
+    assert [row['student_id'] for row in response.json['students']] == [student_id]
+
+@pytest.mark.parametrize('query', [
+    'max_rate_30=abc', 'max_rate_90=x', 'max_rate_30=nan', 'min_absences=1.5', 'min_absences=-1', 'class_id=a'
+])
+def test_at_risk_rejects_invalid_filters(client, query):
+    response = client.get(f'/api/reports/at-risk?{query}')
+    assert response.status_code == 400
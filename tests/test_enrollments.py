@@ -0,0 +1,130 @@
+import importlib
+import threading
+
+from sqlalchemy import text
+
+from conftest import app, login, make_class, make_students
+from models.class_model import Class, StudentClass
+from models.user import db
+from services.enrollments import lock_class
+
+def _enrollment_state(class_id):
+    """(matrículas ativas, enrolled_count, pares ativos duplicados) da turma"""
+    with app.app_context():
+        active = StudentClass.query.filter_by(class_id=class_id, active=True).count()
+        duplicates = db.session.execute(text(
+            'SELECT COUNT(*) FROM (SELECT student_id FROM student_classes '
+            'WHERE class_id = :class_id AND active GROUP BY student_id HAVING COUNT(*) > 1) AS dup'
+        ), {'class_id': class_id}).scalar()
+        return active, db.session.get(Class, class_id).enrolled_count, duplicates
+
+def test_bulk_fills_class_exactly_to_capacity(client):
+    class_id = make_class('Capacidade', max_students=3)
+    student_ids = make_students(5)
+
+    response = client.post(f'/api/classes/{class_id}/students/bulk', json={'student_ids': student_ids})
+    assert response.status_code == 200
+    assert response.json['enrolled'] == 3
+    # As vagas vão para os primeiros da lista
+    assert [result.get('status') for result in response.json['results']] == ['enrolled'] * 3 + [None] * 2
+    assert _enrollment_state(class_id) == (3, 3, 0)
+
+    response = client.post(f'/api/classes/{class_id}/students/{student_ids[4]}')
+    assert response.status_code == 400
+    assert response.json['error'] == 'Class is full'
+    assert _enrollment_state(class_id) == (3, 3, 0)
+
+def test_bulk_results_per_student(client):
+    enrolled, new, overflow = make_students(3)
+    class_id = make_class('Resultados', max_students=2, enrolled=[enrolled])
+
+    response = client.post(f'/api/classes/{class_id}/students/bulk', json={
+        'student_ids': [enrolled, 999999, new, new, overflow]
+    })
+    assert response.status_code == 200
+    results = {result['student_id']: result for result in response.json['results']}
+    assert len(response.json['results']) == 4  # repetidos contam uma vez
+    assert results[enrolled]['error'] == 'Student already enrolled in this class'
+    assert results[999999]['error'] == 'Student not found'
+    assert results[new]['status'] == 'enrolled'
+    assert results[new]['enrollment']['class_id'] == class_id
+    assert results[overflow]['error'] == 'Class is full'
+    assert _enrollment_state(class_id) == (2, 2, 0)
+
+def test_bulk_validation(client):
+    class_id = make_class('Validação')
+    assert client.post(f'/api/classes/{class_id}/students/bulk', json={'student_ids': []}).status_code == 400
+    assert client.post(f'/api/classes/{class_id}/students/bulk', json={'student_ids': ['1']}).status_code == 400
+    assert client.post('/api/classes/999999/students/bulk', json={'student_ids': [1]}).status_code == 404
+
+def test_count_after_removal_and_reenrollment(client):
+    student_ids = make_students(2)
+    class_id = make_class('Remoção', max_students=2)
+    for student_id in student_ids:
+        assert client.post(f'/api/classes/{class_id}/students/{student_id}').status_code == 201
+    assert _enrollment_state(class_id) == (2, 2, 0)
+
+    assert client.delete(f'/api/classes/{class_id}/students/{student_ids[0]}').status_code == 204
+    assert _enrollment_state(class_id) == (1, 1, 0)
+
+    assert client.post(f'/api/classes/{class_id}/students/{student_ids[0]}').status_code == 201
+    assert client.post(f'/api/classes/{class_id}/students/{student_ids[0]}').status_code == 400
+    assert _enrollment_state(class_id) == (2, 2, 0)
+
+def test_concurrent_overlapping_bulk_enrollments():
+    class_id = make_class('Concorrência', max_students=5)
+    student_ids = make_students(8)
+    enrolled = []
+
+    def enroll(ids):
+        response = login(app.test_client()).post(f'/api/classes/{class_id}/students/bulk', json={'student_ids': ids})
+        enrolled.append(response.json['enrolled'])
+
+    threads = [threading.Thread(target=enroll, args=(student_ids[i:] + student_ids[:i],)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sum(enrolled) == 5
+    assert _enrollment_state(class_id) == (5, 5, 0)
+
+def test_lock_class_reports_missing_class():
+    class_id = make_class('Trava')
+    with app.app_context():
+        assert lock_class(class_id)
+        assert not lock_class(999999)
+        db.session.rollback()
+
+def test_backfill_migrations_fix_duplicates_and_counts():
+    """0008 recalcula enrolled_count; 0009 desativa duplicadas e recria o índice único"""
+    student_id, other_id = make_students(2)
+    class_id = make_class('Backfill', enrolled=[student_id, other_id])
+    with app.app_context():
+        with db.engine.begin() as conn:
+            # Estado de um banco anterior às migrações: duplicada ativa e contador errado
+            conn.execute(text('DROP INDEX ux_student_classes_active_pair'))
+            conn.execute(text(
+                "INSERT INTO student_classes (student_id, class_id, enrollment_date, active) "
+                "VALUES (:student_id, :class_id, '2024-01-01', TRUE)"
+            ), {'student_id': student_id, 'class_id': class_id})
+            conn.execute(text('UPDATE classes SET enrolled_count = 0 WHERE id = :id'), {'id': class_id})
+
+        assert _enrollment_state(class_id) == (3, 0, 1)
+        with db.engine.begin() as conn:
+            importlib.import_module('migrations.versions.0008_class_enrolled_count').upgrade(conn)
+        assert _enrollment_state(class_id) == (3, 3, 1)
+
+        with db.engine.begin() as conn:
+            importlib.import_module('migrations.versions.0009_unique_active_enrollment').upgrade(conn)
+        assert _enrollment_state(class_id) == (2, 2, 0)
+        kept = db.session.execute(text(
+            'SELECT MIN(id) = MIN(CASE WHEN active THEN id END) FROM student_classes '
+            'WHERE student_id = :student_id AND class_id = :class_id'
+        ), {'student_id': student_id, 'class_id': class_id}).scalar()
+        assert kept  # a matrícula mais antiga é a que continua ativa
+        db.session.rollback()
+
+        with db.engine.connect() as conn:
+            indexes = {row[0] for row in conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        assert 'ux_student_classes_active_pair' in indexes
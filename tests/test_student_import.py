@@ -0,0 +1,139 @@
+import io
+import uuid
+
+from sqlalchemy import func
+
+from conftest import app, make_class
+from models.class_model import StudentClass
+from models.student import Student
+from models.user import db
+from services.sql import insert_returning_ids
+from services.student_import import StudentImport
+
+def run_import(csv_text, **options):
+    with app.app_context():
+        return StudentImport(**options).run(io.StringIO(csv_text))
+
+def _tag():
+    """Sufixo único: os testes compartilham o banco"""
+    return uuid.uuid4().hex[:8]
+
+def _students(tag):
+    with app.app_context():
+        return {
+            student.name: student.id
+            for student in Student.query.filter(Student.name.like(f'%{tag}%'))
+        }
+
+def test_dedupe_against_existing_students():
+    tag = _tag()
+    with app.app_context():
+        db.session.add_all([
+            Student(name=f'Ana {tag}', email=f'Ana.{tag}@Example.com'),
+            Student(name=f'Bia {tag}', phone=f'11-{tag}'),
+        ])
+        db.session.commit()
+
+    report = run_import(
+        'name,email,phone\n'
+        f'Ana de novo {tag},ana.{tag}@example.com,\n'
+        f'Bia de novo {tag},,11-{tag}\n'
+        f'Caio {tag},caio.{tag}@example.com,\n'
+    )
+    assert (report['rows'], report['created'], report['existing']) == (3, 1, 2)
+    assert set(_students(tag)) == {f'Ana {tag}', f'Bia {tag}', f'Caio {tag}'}
+
+def test_dedupe_within_file_across_chunks():
+    tag = _tag()
+    report = run_import(
+        'name;email;phone\n'
+        f'Duda {tag};duda.{tag}@example.com;\n'
+        f'Edu {tag};;22-{tag}\n'
+        # Próximo lote (chunk_size=2): mesmos e-mail (outra caixa) e telefone das linhas anteriores
+        f'Duda repetida {tag};DUDA.{tag}@example.com;\n'
+        f'Edu repetido {tag};edu.{tag}@example.com;22-{tag}\n'
+        f'Edu pelo e-mail {tag};EDU.{tag}@example.com;\n',
+        chunk_size=2
+    )
+    assert (report['rows'], report['created'], report['existing']) == (5, 2, 3)
+    assert set(_students(tag)) == {f'Duda {tag}', f'Edu {tag}'}
+
+def test_dry_run_reports_like_a_real_run_without_writing():
+    tag = _tag()
+    class_id = make_class(f'Lotada {tag}', max_students=1)
+    csv_text = (
+        'name,email,classes\n'
+        f'Fabi {tag},fabi.{tag}@example.com,{class_id}\n'
+        f'Gabi {tag},gabi.{tag}@example.com,{class_id}\n'
+        f'Fabi de novo {tag},FABI.{tag}@example.com,{class_id}\n'
+        f',sem.nome.{tag}@example.com,\n'
+    )
+    with app.app_context():
+        students_before = db.session.query(func.count(Student.id)).scalar()
+
+    dry_run = run_import(csv_text, dry_run=True, chunk_size=2)
+    with app.app_context():
+        assert db.session.query(func.count(Student.id)).scalar() == students_before
+        assert StudentClass.query.filter_by(class_id=class_id).count() == 0
+
+    real = run_import(csv_text, chunk_size=2)
+    assert dict(dry_run, dry_run=False) == real
+    assert (real['created'], real['existing'], real['enrollments']) == (2, 1, 1)
+
+def test_full_class_is_reported_apart_from_row_errors():
+    tag = _tag()
+    class_id = make_class(f'Uma vaga {tag}', max_students=1)
+    report = run_import(
+        'name,birth_date,classes\n'
+        f'Hugo {tag},2010-05-01,Uma vaga {tag}\n'
+        f'Iris {tag},01/02/2011,Uma vaga {tag}\n'
+        f'Joca {tag},31/31/2011,\n'
+        f'Kiko {tag},,turma inexistente {tag}\n'
+    )
+    # Iris foi cadastrada; só a matrícula dela foi recusada
+    assert report['created'] == 2
+    assert report['enrollments'] == 1
+    assert report['enrollments_refused'] == [{'line': 3, 'class_id': class_id, 'error': 'Class is full'}]
+    assert report['rows_with_errors'] == 2
+    assert [error['line'] for error in report['errors']] == [4, 5]
+    assert set(_students(tag)) == {f'Hugo {tag}', f'Iris {tag}'}
+
+def test_enrollments_go_to_the_right_students():
+    """Os ids de insert_returning_ids seguem a ordem das linhas (inclusive no SQLite)"""
+    tag = _tag()
+    class_id = make_class(f'Ordem {tag}')
+    names = [f'Aluno {index:03d} {tag}' for index in range(45)]
+    csv_text = 'name,classes\n' + ''.join(
+        f'{name},{class_id}\n' if index % 3 == 0 else f'{name},\n' for index, name in enumerate(names)
+    )
+    report = run_import(csv_text, chunk_size=20)
+    assert (report['created'], report['enrollments']) == (45, 15)
+
+    students = _students(tag)
+    with app.app_context():
+        enrolled = {enrollment.student_id for enrollment in StudentClass.query.filter_by(class_id=class_id)}
+    assert enrolled == {students[name] for index, name in enumerate(names) if index % 3 == 0}
+
+def test_insert_returning_ids_order():
+    tag = _tag()
+    rows = [{'name': f'Ordem {index} {tag}'} for index in range(30)]
+    with app.app_context():
+        ids = insert_returning_ids(Student.__table__, rows)
+        names = dict(db.session.query(Student.id, Student.name).filter(Student.id.in_(ids)).all())
+        assert [names[student_id] for student_id in ids] == [row['name'] for row in rows]
+        db.session.rollback()
+
+def test_import_endpoint_validates_chunk_size(client):
+    body = b'name\nX\n'
+    for chunk_size in (0, -1, 5001):
+        response = client.post(f'/api/students/import?chunk_size={chunk_size}', data=body, content_type='text/csv')
+        assert response.status_code == 400
+
+    tag = _tag()
+    response = client.post(
+        '/api/students/import?dry_run=1',
+        data={'file': (io.BytesIO(f'name\nLia {tag}\n'.encode()), 'alunos.csv')},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 200
+    assert (response.json['dry_run'], response.json['created']) == (True, 1)